@@ -2,11 +2,22 @@
 """
 狼人杀游戏 - 9人局
 支持人类玩家与AI混合对战，或纯AI对战
+
+用法：
+    python main.py                                  # 开始新游戏
+    python main.py --resume checkpoints/<对局ID>.json.gz   # 从存档继续
+    python main.py --usage-jsonl usage.jsonl --usage-summary usage.json   # 导出LLM用量
+    python main.py --summary-model                  # 用廉价模型生成AI玩家的记忆摘要
 """
 
+import argparse
+import os
 import sys
 from src.utils.llm_client import LLMClient
+from src.game.checkpoint import checkpoint_path_for
+from src.game.output import ConsoleSink, JsonlSink, MultiSink
 from src.game.werewolf_game import WerewolfGame
+from src.players.memory_summary import LLMSummarizer
 
 
 def print_welcome():
@@ -49,10 +60,86 @@ def get_player_count():
             print("请输入有效的数字！")
 
 
+def create_output(events_path: str = None):
+    """控制台输出；指定了事件文件时同时写入JSON Lines"""
+    if events_path:
+        return MultiSink(ConsoleSink(), JsonlSink(events_path))
+    return ConsoleSink()
+
+
+def export_usage(llm_client, usage_jsonl: str = None, usage_summary: str = None):
+    """对局结束（或中断）时导出本次运行的LLM调用记录和用量汇总"""
+    if llm_client is None:
+        return
+    if usage_jsonl:
+        llm_client.usage.export_jsonl(usage_jsonl)
+        print(f"LLM调用记录已写入：{usage_jsonl}")
+    if usage_summary:
+        llm_client.usage.export_summary(usage_summary)
+        print(f"LLM用量汇总已写入：{usage_summary}")
+
+
+def create_summarizer(llm_client: LLMClient, summary_model: str = None):
+    """指定了摘要模型时用它生成记忆摘要，否则使用默认的规则摘要"""
+    return LLMSummarizer(llm_client, summary_model) if summary_model else None
+
+
+def resume_game(checkpoint_path: str, events_path: str = None,
+                usage_jsonl: str = None, usage_summary: str = None, summary_model: str = None):
+    """从存档继续游戏"""
+    game = None
+    llm_client = None
+    output = create_output(events_path)
+    try:
+        print("\n初始化AI系统...")
+        llm_client = LLMClient()
+
+        game = WerewolfGame.resume(checkpoint_path, llm_client, output=output,
+                                   memory_summarizer=create_summarizer(llm_client, summary_model))
+        print(f"已加载存档：{checkpoint_path}")
+
+        game.start_game()
+
+        print("\n感谢游玩！")
+
+    except KeyboardInterrupt:
+        print_interrupted(game)
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n发生错误: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+    finally:
+        output.close()
+        export_usage(llm_client, usage_jsonl, usage_summary)
+
+
+def print_interrupted(game):
+    """游戏被中断时提示如何继续"""
+    print("\n\n游戏被中断。")
+    if game is not None and game.checkpoint_path and os.path.exists(game.checkpoint_path):
+        print(f"进度已保存（开局或最近一个阶段结束时）：{game.checkpoint_path}")
+        print(f"继续游戏：python main.py --resume {game.checkpoint_path}")
+
+
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description="狼人杀游戏 - 9人局")
+    parser.add_argument("--resume", metavar="CHECKPOINT", help="从存档继续游戏")
+    parser.add_argument("--events", metavar="PATH", help="同时把对局事件写入JSON Lines文件")
+    parser.add_argument("--usage-jsonl", metavar="PATH", help="游戏结束时把LLM调用记录写入JSONL文件")
+    parser.add_argument("--usage-summary", metavar="PATH", help="游戏结束时把LLM用量汇总写入JSON文件")
+    parser.add_argument("--summary-model", metavar="MODEL", nargs="?", const=LLMSummarizer.DEFAULT_MODEL,
+                        help="用廉价模型把前几天的记忆折叠为摘要（不带参数时使用Haiku；默认使用规则摘要）")
+    args = parser.parse_args()
+
     print_welcome()
 
+    if args.resume:
+        resume_game(args.resume, args.events, args.usage_jsonl, args.usage_summary, args.summary_model)
+        return
+
     # 获取人类玩家数量
     human_count = get_player_count()
 
@@ -65,13 +152,18 @@ def main():
 
     input("\n按回车键开始游戏...")
 
+    game = None
+    llm_client = None
+    output = create_output(args.events)
     try:
         # 初始化LLM客户端
         print("\n初始化AI系统...")
         llm_client = LLMClient()
 
-        # 创建游戏
-        game = WerewolfGame(llm_client)
+        # 创建游戏（每个阶段结束时自动存档）
+        game = WerewolfGame(llm_client, output=output,
+                            memory_summarizer=create_summarizer(llm_client, args.summary_model))
+        game.checkpoint_path = checkpoint_path_for(game.game_id)
 
         # 设置游戏
         game.setup_game(human_player_count=human_count)
@@ -84,13 +176,16 @@ def main():
         print("\n感谢游玩！")
 
     except KeyboardInterrupt:
-        print("\n\n游戏被中断。")
+        print_interrupted(game)
         sys.exit(0)
     except Exception as e:
         print(f"\n发生错误: {str(e)}")
         import traceback
         traceback.print_exc()
         sys.exit(1)
+    finally:
+        output.close()
+        export_usage(llm_client, args.usage_jsonl, args.usage_summary)
 
 
 if __name__ == "__main__":
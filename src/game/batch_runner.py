@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+批量对局：无交互地运行多局纯AI游戏（多进程，每个进程在一个事件循环上同时运行多局），
+汇总胜负、天数、死因和用量
+
+用法示例：
+    python -m src.game.batch_runner --games 200 --workers 8 --seed-start 1000
+    python -m src.game.batch_runner --games 48 --workers 1 --concurrency 24
+    python -m src.game.batch_runner --games 50 --backend fake --output results.jsonl
+    python -m src.game.batch_runner --games 20 --model us.anthropic.claude-haiku-4-5-20251001-v1:0
+    python -m src.game.batch_runner --games 20 --usage-jsonl usage.jsonl --usage-summary usage.json
+    python -m src.game.batch_runner --games 20 --summary-model us.anthropic.claude-haiku-4-5-20251001-v1:0
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import sys
+import time
+import traceback
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Tuple
+from src.game.output import NullSink
+from src.game.werewolf_game import WerewolfGame
+from src.players.memory_summary import LLMSummarizer, MemorySummarizer
+from src.utils.backends import FakeBackend
+from src.utils.llm_client import LLMClient
+from src.utils.response_cache import ResponseCache
+from src.utils.scheduler import FairScheduler
+from src.utils.usage_tracker import UsageTracker
+
+
+def _create_client(config: Dict) -> LLMClient:
+    """创建进程内所有对局共用的LLM客户端（带公平调度器）"""
+    backend = FakeBackend(seed=config.get("fake_seed", 0)) if config.get("backend") == "fake" else None
+    cache_dir = config.get("cache_dir")
+    return LLMClient(max_workers=config["max_workers"],
+                     model_concurrency=config.get("model_concurrency"),
+                     response_cache=ResponseCache(cache_dir) if cache_dir else None,
+                     backend=backend,
+                     endpoint_url=config.get("endpoint_url"),
+                     model_assignment=config.get("model_assignment"),
+                     scheduler=FairScheduler())
+
+
+async def _play_game(llm_client: LLMClient, seed: int,
+                     memory_summarizer: Optional[MemorySummarizer] = None) -> Dict:
+    """
+    运行一局纯AI游戏
+
+    Args:
+        llm_client: 共用的LLM客户端
+        seed: 随机种子（决定身份分配、平票和随机兜底选择）
+        memory_summarizer: AI玩家的记忆摘要器（None表示规则摘要）
+
+    Returns:
+        对局结果：seed, game_id, winner, days, deaths, calls, input_tokens, output_tokens,
+        cost_usd, scheduler_wait, duration, error
+    """
+    result = {"seed": seed, "game_id": None, "winner": None, "days": 0, "deaths": {},
+              "calls": 0, "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0,
+              "scheduler_wait": 0.0, "duration": 0.0, "error": None}
+    start = time.time()
+
+    try:
+        game = WerewolfGame(llm_client, seed=seed, output=NullSink(), memory_summarizer=memory_summarizer)
+        result["game_id"] = game.game_id
+        game.setup_game(human_player_count=0)
+        await game.play()
+    except Exception:
+        result["error"] = traceback.format_exc(limit=5)
+
+    if result["game_id"] is not None:
+        result["winner"] = game.winner.value if game.winner else None
+        result["days"] = game.day_count
+        result["deaths"] = dict(Counter(p.death_reason for p in game.players if not p.is_alive))
+        total = llm_client.usage.summarize(game_id=game.game_id).get("total", {})
+        for field in ("calls", "input_tokens", "output_tokens", "cost_usd"):
+            result[field] = total.get(field, result[field])
+        result["scheduler_wait"] = round(llm_client.scheduler.total_wait.get(game.game_id, 0.0), 3)
+    result["duration"] = round(time.time() - start, 3)
+    return result
+
+
+async def _play_games(llm_client: LLMClient, seeds: List[int], concurrency: int,
+                      on_result: Optional[Callable[[Dict], None]],
+                      memory_summarizer: Optional[MemorySummarizer] = None) -> List[Dict]:
+    """在一个事件循环上同时运行最多 concurrency 局"""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(seed: int) -> Dict:
+        async with semaphore:
+            result = await _play_game(llm_client, seed, memory_summarizer)
+        if on_result:
+            on_result(result)
+        return result
+
+    return await asyncio.gather(*(run(seed) for seed in seeds))
+
+
+def run_games_in_process(seeds: List[int], config: Dict, concurrency: int = 1,
+                         on_result: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+    """
+    在当前进程中运行一组对局（控制台输出全部丢弃）
+
+    所有对局共用一个LLM客户端：连接池、限流器和延迟统计共享，
+    各模型的并发名额由公平调度器在对局之间分配。
+
+    Args:
+        seeds: 各局的随机种子
+        config: 客户端配置（见 run_batch）
+        concurrency: 同时进行的对局数
+        on_result: 每局结束时的回调
+    """
+    return _run_games(seeds, config, concurrency, on_result)[0]
+
+
+def _run_games(seeds: List[int], config: Dict, concurrency: int,
+               on_result: Optional[Callable[[Dict], None]]) -> Tuple[List[Dict], Dict]:
+    """
+    运行一组对局，同时返回本进程客户端的统计
+
+    Returns:
+        (各局结果, {"response_cache": 响应缓存的命中统计（未启用时为None）,
+                    "usage_records": 调用记录（config["collect_usage"] 为真时，否则为空列表）})
+    """
+    llm_client = _create_client(config)
+    summary_model = config.get("summary_model")
+    memory_summarizer = LLMSummarizer(llm_client, summary_model) if summary_model else None
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            results = asyncio.run(_play_games(llm_client, seeds, concurrency, on_result, memory_summarizer))
+    finally:
+        llm_client.shutdown()
+
+    cache = llm_client.response_cache
+    usage_records = llm_client.usage.get_records() if config.get("collect_usage") else []
+    return results, {"response_cache": cache.get_stats() if cache else None, "usage_records": usage_records}
+
+
+def _print_progress(result: Dict):
+    """输出单局进度（标准输出已被丢弃，写到标准错误）"""
+    status = "出错" if result["error"] else f"{result['winner']}，{result['days']}天"
+    print(f"[pid {os.getpid()}] 种子 {result['seed']}：{status}（{result['duration']}s）", file=sys.stderr)
+
+
+def _run_shard(seeds: List[int], config: Dict, concurrency: int, progress: bool) -> Tuple[List[Dict], Dict]:
+    """工作进程入口：运行分配给本进程的对局，返回结果和客户端统计"""
+    return _run_games(seeds, config, concurrency, _print_progress if progress else None)
+
+
+def aggregate(results: List[Dict]) -> Dict:
+    """
+    汇总多局结果
+
+    Returns:
+        {games, errors, wins, win_rates, avg_days, deaths, calls, input_tokens, output_tokens,
+         cost_usd, avg_duration}
+    """
+    finished = [r for r in results if r["error"] is None]
+    wins = Counter(r["winner"] for r in finished if r["winner"])
+    deaths: Counter = Counter()
+    for r in finished:
+        deaths.update(r["deaths"])
+
+    count = len(finished)
+    return {
+        "games": len(results),
+        "errors": len(results) - count,
+        "wins": dict(wins),
+        "win_rates": {camp: round(n / count, 3) for camp, n in wins.items()} if count else {},
+        "avg_days": round(sum(r["days"] for r in finished) / count, 2) if count else 0.0,
+        "deaths": dict(deaths),
+        "calls": sum(r["calls"] for r in results),
+        "input_tokens": sum(r["input_tokens"] for r in results),
+        "output_tokens": sum(r["output_tokens"] for r in results),
+        "cost_usd": round(sum(r["cost_usd"] for r in results), 4),
+        "avg_duration": round(sum(r["duration"] for r in results) / len(results), 2) if results else 0.0
+    }
+
+
+def format_summary(summary: Dict) -> str:
+    """生成可读的汇总报告"""
+    lines = [
+        f"共 {summary['games']} 局（出错 {summary['errors']} 局），平均 {summary['avg_days']} 天，"
+        f"每局平均耗时 {summary['avg_duration']}s",
+        "胜负：" + ("，".join(f"{camp} {n}局（{summary['win_rates'][camp]:.1%}）"
+                           for camp, n in sorted(summary["wins"].items())) or "无"),
+        "死因：" + ("，".join(f"{reason} {n}" for reason, n in sorted(summary["deaths"].items())) or "无"),
+        f"LLM调用 {summary['calls']} 次（后端 {summary.get('backend', 'bedrock')}），"
+        f"输入 {summary['input_tokens']} / 输出 {summary['output_tokens']} token，费用约 ${summary['cost_usd']}"
+    ]
+    if summary.get("response_cache"):
+        lines.append(ResponseCache.format_stats(summary["response_cache"]))
+    return "\n".join(lines)
+
+
+def run_batch(games: int, seed_start: int = 0, workers: int = 4, concurrency: int = 1,
+              backend: str = "bedrock", model_assignment: Optional[Dict[str, str]] = None,
+              model_concurrency: Optional[Dict[str, int]] = None, endpoint_url: Optional[str] = None,
+              max_workers: int = 16, output_path: Optional[str] = None, progress: bool = True,
+              cache_dir: Optional[str] = None, usage_jsonl: Optional[str] = None,
+              usage_summary: Optional[str] = None, summary_model: Optional[str] = None) -> Dict:
+    """
+    批量运行对局
+
+    对局按种子分给 workers 个进程，每个进程在一个事件循环上同时运行 concurrency 局，
+    共用一个LLM客户端。workers 为1时直接在当前进程中运行。
+    每个进程有独立的限流器，所有进程合计的并发约为 workers × 单进程的模型并发上限，
+    可按配额调整 workers 和 model_concurrency。
+
+    Args:
+        games: 对局数
+        seed_start: 第一局的随机种子（之后依次加1）
+        workers: 进程数
+        concurrency: 每个进程同时进行的对局数
+        backend: "bedrock"（默认）或 "fake"（不访问网络的模拟后端）
+        model_assignment: 按角色覆盖模型分配，格式为 {角色名称: 模型ID}
+        model_concurrency: 按模型覆盖单进程的初始并发上限
+        endpoint_url: bedrock-runtime 服务地址（如本地模拟服务）
+        max_workers: 单进程内LLM调用线程池大小
+        output_path: 每局结果写入的JSONL文件
+        progress: 是否打印进度
+        cache_dir: 响应缓存目录（所有进程共用；None表示不启用）。命中的调用不访问网络，
+            适合用固定种子重复运行同一批对局
+        usage_jsonl: 所有进程的调用记录写入的JSONL文件（见 UsageTracker.export_jsonl）
+        usage_summary: 用量汇总写入的JSON文件（见 UsageTracker.export_summary）
+        summary_model: 把前几天的记忆折叠为摘要的廉价模型（None表示规则摘要，不额外调用模型）
+
+    Returns:
+        汇总结果（见 aggregate），另含 backend、results 列表和 response_cache（合并后的缓存命中统计）。
+        fake 后端的调用是模拟调用，费用记为0
+    """
+    config = {"backend": backend, "model_assignment": model_assignment, "model_concurrency": model_concurrency,
+              "endpoint_url": endpoint_url, "max_workers": max_workers, "cache_dir": cache_dir,
+              "collect_usage": bool(usage_jsonl or usage_summary), "summary_model": summary_model}
+    seeds = list(range(seed_start, seed_start + games))
+    results: List[Dict] = []
+    client_stats: List[Dict] = []
+    start = time.time()
+
+    output = open(output_path, "w", encoding="utf-8") if output_path else None
+
+    def record(result: Dict):
+        results.append(result)
+        if output:
+            output.write(json.dumps(result, ensure_ascii=False) + "\n")
+            output.flush()
+
+    try:
+        if workers <= 1:
+            def on_result(result: Dict):
+                record(result)
+                if progress:
+                    _print_progress(result)
+
+            client_stats.append(_run_games(seeds, config, concurrency, on_result)[1])
+        else:
+            shards = [seeds[i::workers] for i in range(workers) if seeds[i::workers]]
+            with ProcessPoolExecutor(max_workers=len(shards)) as pool:
+                futures = [pool.submit(_run_shard, shard, config, concurrency, progress) for shard in shards]
+                for future in as_completed(futures):
+                    shard_results, stats = future.result()
+                    for result in shard_results:
+                        record(result)
+                    client_stats.append(stats)
+    finally:
+        if output:
+            output.close()
+
+    results.sort(key=lambda r: r["seed"])
+    summary = aggregate(results)
+    summary["backend"] = backend
+    cache_stats = [stats["response_cache"] for stats in client_stats if stats["response_cache"]]
+    summary["response_cache"] = ResponseCache.merge_stats(cache_stats) if cache_stats else None
+    if usage_jsonl or usage_summary:
+        usage = UsageTracker()
+        for stats in client_stats:
+            for usage_record in stats["usage_records"]:
+                usage.record(usage_record)
+        if usage_jsonl:
+            usage.export_jsonl(usage_jsonl)
+        if usage_summary:
+            usage.export_summary(usage_summary)
+    summary["results"] = results
+    summary["wall_time"] = round(time.time() - start, 2)
+    return summary
+
+
+def _parse_mapping(items: Optional[List[str]], value_type=str) -> Optional[Dict]:
+    """解析 key=value 形式的命令行参数"""
+    if not items:
+        return None
+    mapping = {}
+    for item in items:
+        key, _, value = item.partition("=")
+        if not value:
+            raise argparse.ArgumentTypeError(f"格式应为 key=value：{item}")
+        mapping[key] = value_type(value)
+    return mapping
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量运行纯AI狼人杀对局")
+    parser.add_argument("--games", type=int, default=10, help="对局数")
+    parser.add_argument("--seed-start", type=int, default=0, help="第一局的随机种子")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="进程数")
+    parser.add_argument("--concurrency", type=int, default=1, help="每个进程同时进行的对局数（共用一个LLM客户端）")
+    parser.add_argument("--backend", choices=["bedrock", "fake"], default="bedrock")
+    parser.add_argument("--endpoint-url", default=None, help="bedrock-runtime 服务地址（如本地模拟服务）")
+    parser.add_argument("--model", default=None, help="所有角色使用同一个模型")
+    parser.add_argument("--role-model", action="append", metavar="角色=模型ID",
+                        help="按角色指定模型（可重复，如 狼人1=us.anthropic...），优先于 --model")
+    parser.add_argument("--assignment-file", default=None, help="JSON格式的模型分配文件 {角色名称: 模型ID}")
+    parser.add_argument("--model-concurrency", action="append", metavar="模型ID=并发数",
+                        help="单进程内某个模型的初始并发上限（可重复）")
+    parser.add_argument("--cache-dir", default=None,
+                        help="响应缓存目录（相同请求直接返回缓存的响应，用于重复运行同一批种子）")
+    parser.add_argument("--summary-model", nargs="?", const=LLMSummarizer.DEFAULT_MODEL, default=None,
+                        help="用廉价模型把前几天的记忆折叠为摘要（不带参数时使用Haiku；默认使用规则摘要）")
+    parser.add_argument("--output", default=None, help="每局结果写入的JSONL文件")
+    parser.add_argument("--summary-json", default=None, help="汇总结果写入的JSON文件")
+    parser.add_argument("--usage-jsonl", default=None, help="所有LLM调用记录写入的JSONL文件（便于导入看板）")
+    parser.add_argument("--usage-summary", default=None, help="按模型、角色、阶段等汇总的用量写入的JSON文件")
+    args = parser.parse_args()
+
+    model_assignment: Dict[str, str] = {}
+    if args.model:
+        model_assignment = {role_name: args.model for role_name in LLMClient.DEFAULT_MODEL_ASSIGNMENT}
+    if args.assignment_file:
+        with open(args.assignment_file, encoding="utf-8") as f:
+            model_assignment.update(json.load(f))
+    model_assignment.update(_parse_mapping(args.role_model) or {})
+
+    summary = run_batch(
+        games=args.games,
+        seed_start=args.seed_start,
+        workers=args.workers,
+        concurrency=args.concurrency,
+        backend=args.backend,
+        model_assignment=model_assignment or None,
+        model_concurrency=_parse_mapping(args.model_concurrency, int),
+        endpoint_url=args.endpoint_url,
+        output_path=args.output,
+        cache_dir=args.cache_dir,
+        usage_jsonl=args.usage_jsonl,
+        usage_summary=args.usage_summary,
+        summary_model=args.summary_model
+    )
+
+    print(format_summary(summary))
+    print(f"总耗时 {summary['wall_time']}s")
+    if args.summary_json:
+        with open(args.summary_json, "w", encoding="utf-8") as f:
+            json.dump({k: v for k, v in summary.items() if k != "results"}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import gzip
+import json
+import os
+from typing import Dict
+
+
+# 存档格式版本（状态结构不兼容地变化时加1）
+CHECKPOINT_VERSION = 1
+
+# 默认存档目录（每局一个文件）
+DEFAULT_CHECKPOINT_DIR = "checkpoints"
+
+
+def checkpoint_path_for(game_id: str, directory: str = DEFAULT_CHECKPOINT_DIR) -> str:
+    """对局的默认存档路径"""
+    return os.path.join(directory, f"{game_id}.json.gz")
+
+
+def write_checkpoint(path: str, state: Dict):
+    """
+    写入存档（紧凑JSON + gzip）
+
+    先写临时文件再原子替换，写入过程中被中断也不会损坏上一个存档。
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    data = json.dumps({"version": CHECKPOINT_VERSION, "state": state}, ensure_ascii=False, separators=(",", ":"))
+    temp_path = path + ".tmp"
+    with gzip.open(temp_path, "wt", encoding="utf-8") as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+def read_checkpoint(path: str) -> Dict:
+    """
+    读取存档
+
+    Raises:
+        ValueError: 存档版本与当前代码不兼容
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("version") != CHECKPOINT_VERSION:
+        raise ValueError(f"存档版本不兼容：{data.get('version')}（当前版本 {CHECKPOINT_VERSION}）")
+    return data["state"]
+
+
+def remove_checkpoint(path: str):
+    """删除存档（对局正常结束后不再需要）"""
+    if os.path.exists(path):
+        os.remove(path)
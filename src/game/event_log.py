@@ -0,0 +1,133 @@
+import threading
+from enum import Enum
+from typing import Dict, List, Optional, Tuple
+
+
+class Visibility(Enum):
+    """事件可见范围"""
+    PUBLIC = "public"    # 所有玩家
+    WOLVES = "wolves"    # 狼人阵营
+    PLAYER = "player"    # 单个玩家
+
+
+class EventType(Enum):
+    """事件类型"""
+    DEATH = "death"                # 死亡公告、放逐、开枪
+    VOTE = "vote"                  # 投票结果
+    SPEECH = "speech"              # 白天发言、竞选发言
+    LAST_WORDS = "last_words"      # 遗言
+    SHERIFF = "sheriff"            # 警长竞选、当选、警徽流转
+    WOLF_KILL = "wolf_kill"        # 狼人刀口
+    WOLF_TACTICS = "wolf_tactics"  # 狼队战术讨论
+    SEER_CHECK = "seer_check"      # 预言家查验
+    WITCH_ACTION = "witch_action"  # 女巫用药
+    NOTE = "note"                  # 其他私有信息
+
+
+class GameEvent:
+    """游戏事件（只追加，所有玩家共享同一个对象）"""
+
+    __slots__ = ("seq", "day", "event_type", "text", "visibility", "player_id", "exclude", "actor")
+
+    def __init__(self, seq: int, day: int, event_type: EventType, text: str,
+                 visibility: Visibility, player_id: Optional[int] = None, exclude: Optional[int] = None,
+                 actor: Optional[int] = None):
+        self.seq = seq
+        self.day = day
+        self.event_type = event_type
+        self.text = text
+        self.visibility = visibility
+        self.player_id = player_id  # Visibility.PLAYER 时为可见的玩家
+        self.exclude = exclude      # 对该玩家不可见（如发言者本人）
+        self.actor = actor          # 事件的发起者（发言者、开枪的猎人等）
+
+    def is_visible_to(self, player_id: int, is_werewolf: bool) -> bool:
+        """判断事件对指定玩家是否可见"""
+        if player_id == self.exclude:
+            return False
+        if self.visibility == Visibility.PUBLIC:
+            return True
+        if self.visibility == Visibility.WOLVES:
+            return is_werewolf
+        return player_id == self.player_id
+
+    def to_dict(self) -> Dict:
+        """转换为可序列化的字典（省略为空的字段）"""
+        data = {"seq": self.seq, "day": self.day, "type": self.event_type.value, "text": self.text,
+                "visibility": self.visibility.value}
+        for field in ("player_id", "exclude", "actor"):
+            value = getattr(self, field)
+            if value is not None:
+                data[field] = value
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "GameEvent":
+        """从 to_dict 的结果还原事件"""
+        return cls(data["seq"], data["day"], EventType(data["type"]), data["text"],
+                   Visibility(data["visibility"]), data.get("player_id"), data.get("exclude"), data.get("actor"))
+
+    def __repr__(self):
+        return f"GameEvent({self.seq}, {self.event_type.value}, {self.visibility.value}, {self.text!r})"
+
+
+class GameEventLog:
+    """
+    对局事件日志
+
+    所有事件只记录一次，带可见范围标签；每个玩家用自己的游标增量读取可见的新事件，
+    不再向每个玩家的记忆逐个复制广播内容。
+    """
+
+    def __init__(self):
+        self.events: List[GameEvent] = []
+        self._lock = threading.Lock()
+
+    def append(self, text: str, day: int, event_type: EventType = EventType.NOTE,
+               visibility: Visibility = Visibility.PUBLIC, player_id: Optional[int] = None,
+               exclude: Optional[int] = None, actor: Optional[int] = None) -> GameEvent:
+        """追加一条事件"""
+        with self._lock:
+            event = GameEvent(len(self.events), day, event_type, text, visibility, player_id, exclude, actor)
+            self.events.append(event)
+            return event
+
+    def public(self, text: str, day: int, event_type: EventType = EventType.NOTE,
+               exclude: Optional[int] = None, actor: Optional[int] = None) -> GameEvent:
+        """追加一条公开事件"""
+        return self.append(text, day, event_type, Visibility.PUBLIC, exclude=exclude, actor=actor)
+
+    def wolves(self, text: str, day: int, event_type: EventType = EventType.NOTE,
+               actor: Optional[int] = None) -> GameEvent:
+        """追加一条只有狼人可见的事件"""
+        return self.append(text, day, event_type, Visibility.WOLVES, actor=actor)
+
+    def private(self, player_id: int, text: str, day: int,
+                event_type: EventType = EventType.NOTE) -> GameEvent:
+        """追加一条只有指定玩家可见的事件"""
+        return self.append(text, day, event_type, Visibility.PLAYER, player_id=player_id)
+
+    def read(self, cursor: int, player_id: int, is_werewolf: bool) -> Tuple[List[GameEvent], int]:
+        """
+        从游标位置读取对玩家可见的新事件
+
+        Returns:
+            (可见的新事件, 新的游标位置)
+        """
+        with self._lock:
+            new_events = self.events[cursor:]
+        visible = [event for event in new_events if event.is_visible_to(player_id, is_werewolf)]
+        return visible, cursor + len(new_events)
+
+    def dump_state(self) -> List[Dict]:
+        """导出全部事件（用于存档）"""
+        with self._lock:
+            return [event.to_dict() for event in self.events]
+
+    def load_state(self, state: List[Dict]):
+        """从存档恢复事件"""
+        with self._lock:
+            self.events = [GameEvent.from_dict(data) for data in state]
+
+    def __len__(self):
+        return len(self.events)
@@ -0,0 +1,203 @@
+import json
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, TextIO
+
+
+# 横幅的级别及控制台使用的分隔字符
+BANNER_STYLES = {
+    "game": "=",     # 游戏开始/结束、重要公告
+    "day": "#",      # 新的一天
+    "phase": "-"     # 阶段开始/结束
+}
+BANNER_WIDTH = 60
+
+
+class OutputEvent:
+    """
+    引擎输出的一条结构化事件
+
+    kind 为事件类型（如 "vote_cast"、"player_died"），data 为结构化字段（玩家编号、目标等），
+    text 为给人看的说明。indent 和 gap 只影响控制台的排版，不写入文件。
+    """
+
+    __slots__ = ("kind", "text", "data", "game_id", "day", "indent", "gap", "timestamp")
+
+    def __init__(self, kind: str, text: str = "", data: Optional[Dict] = None, game_id: Optional[str] = None,
+                 day: int = 0, indent: int = 0, gap: bool = False):
+        self.kind = kind
+        self.text = text
+        self.data = data or {}
+        self.game_id = game_id
+        self.day = day
+        self.indent = indent  # 缩进级别（每级两个空格）
+        self.gap = gap        # 前面是否空一行
+        self.timestamp = time.time()
+
+    def to_dict(self) -> Dict:
+        """转换为可序列化的字典"""
+        return {"kind": self.kind, "game_id": self.game_id, "day": self.day, "text": self.text,
+                "ts": round(self.timestamp, 3), **self.data}
+
+    def __repr__(self):
+        return f"OutputEvent({self.kind!r}, {self.text!r})"
+
+
+class OutputSink(ABC):
+    """
+    引擎输出的去处
+
+    引擎只发出结构化事件，由输出端决定如何展示或保存。
+    live 为 True 的输出端会收到发言的逐段内容（speech_delta），其余只收到完整发言。
+    """
+
+    live = False
+
+    @abstractmethod
+    def emit(self, event: OutputEvent):
+        """处理一条事件"""
+        pass
+
+    def close(self):
+        """结束输出（写出缓冲的内容）"""
+        pass
+
+
+class ConsoleSink(OutputSink):
+    """控制台输出：横幅、缩进和逐字显示的发言，与原来直接打印的效果一致"""
+
+    live = True
+
+    def __init__(self, stream: Optional[TextIO] = None):
+        """
+        Args:
+            stream: 输出流；None表示每次输出时使用当前的 sys.stdout（可被 redirect_stdout 重定向）
+        """
+        self.stream = stream
+        self._speaking = False  # 正在逐段输出的发言是否已经输出过内容
+        self._lock = threading.Lock()
+
+    def emit(self, event: OutputEvent):
+        stream = self.stream or sys.stdout
+        with self._lock:
+            if event.kind == "speech_delta":
+                self._write_delta(stream, event.text)
+                return
+            if event.kind == "speech_end":
+                stream.write("\n" if self._speaking else "  \n")
+                self._speaking = False
+                stream.flush()
+                return
+
+            lines = []
+            if event.gap:
+                lines.append("")
+            if event.kind == "banner":
+                rule = BANNER_STYLES.get(event.data.get("level"), "=") * BANNER_WIDTH
+                lines.extend([rule, event.text, rule])
+            else:
+                prefix = "  " * event.indent
+                lines.extend(prefix + line for line in event.text.split("\n"))
+            stream.write("\n".join(lines) + "\n")
+
+    def _write_delta(self, stream: TextIO, text: str):
+        """逐段输出发言（跳过开头的空白，和整段输出时的格式保持一致）"""
+        if not self._speaking:
+            text = text.lstrip()
+            if not text:
+                return
+            stream.write("  ")
+            self._speaking = True
+        stream.write(text)
+        stream.flush()
+
+
+class NullSink(OutputSink):
+    """丢弃所有输出（批量对局、回放等不需要展示的场合）"""
+
+    def emit(self, event: OutputEvent):
+        pass
+
+
+class JsonlSink(OutputSink):
+    """
+    缓冲写入JSON Lines文件，每行一条事件
+
+    攒够 buffer_size 条或调用 close() 时批量写出，不在每条事件上做同步I/O。
+    """
+
+    def __init__(self, path: str, buffer_size: int = 200, include_deltas: bool = False):
+        """
+        Args:
+            path: 文件路径（追加写入）
+            buffer_size: 缓冲的事件数
+            include_deltas: 是否写入发言的逐段内容（speech_delta）
+        """
+        self.path = path
+        self.buffer_size = buffer_size
+        self.include_deltas = include_deltas
+        self._buffer: List[str] = []
+        self._lock = threading.Lock()
+
+    def emit(self, event: OutputEvent):
+        if event.kind == "speech_delta" and not self.include_deltas:
+            return
+        line = json.dumps(event.to_dict(), ensure_ascii=False)
+        with self._lock:
+            self._buffer.append(line)
+            if len(self._buffer) >= self.buffer_size:
+                self._flush()
+
+    def close(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        """写出缓冲的事件（调用方需持有锁）"""
+        if not self._buffer:
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("\n".join(self._buffer) + "\n")
+        self._buffer = []
+
+
+class MemorySink(OutputSink):
+    """在内存中收集事件（测试和程序化分析）"""
+
+    def __init__(self, include_deltas: bool = False):
+        """
+        Args:
+            include_deltas: 是否保留发言的逐段内容（speech_delta）
+        """
+        self.include_deltas = include_deltas
+        self.events: List[OutputEvent] = []
+        self._lock = threading.Lock()
+
+    def emit(self, event: OutputEvent):
+        if event.kind == "speech_delta" and not self.include_deltas:
+            return
+        with self._lock:
+            self.events.append(event)
+
+    def of_kind(self, kind: str) -> List[OutputEvent]:
+        """指定类型的事件"""
+        with self._lock:
+            return [event for event in self.events if event.kind == kind]
+
+
+class MultiSink(OutputSink):
+    """同时输出到多个输出端（如控制台 + 文件）"""
+
+    def __init__(self, *sinks: OutputSink):
+        self.sinks = list(sinks)
+        self.live = any(sink.live for sink in self.sinks)
+
+    def emit(self, event: OutputEvent):
+        for sink in self.sinks:
+            sink.emit(event)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
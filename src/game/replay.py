@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+录制与回放：录制一局纯AI游戏的全部模型调用和随机种子，之后不访问网络地重跑同一局，
+作为引擎改动的可复现回归和性能基准
+
+用法示例：
+    python -m src.game.replay record --seed 7 --output transcripts/seed7.jsonl.gz
+    python -m src.game.replay record --seed 7 --backend fake --output transcripts/fake7.jsonl.gz
+    python -m src.game.replay replay transcripts/seed7.jsonl.gz
+    python -m src.game.replay replay transcripts/*.jsonl.gz --verbose
+    python -m src.game.replay replay transcripts/*.jsonl.gz --cache-dir .replay_cache
+"""
+
+import argparse
+import random
+import sys
+import time
+from typing import Dict, Optional
+from src.game.output import ConsoleSink, NullSink
+from src.game.werewolf_game import WerewolfGame
+from src.utils.backends import BedrockBackend, FakeBackend
+from src.utils.llm_client import LLMClient
+from src.utils.response_cache import ResponseCache
+from src.utils.transcript import RecordingBackend, ReplayBackend, ReplayDivergenceError, load_transcript
+
+
+def record_game(output_path: str, seed: Optional[int] = None, backend: str = "bedrock",
+                endpoint_url: Optional[str] = None, model_assignment: Optional[Dict[str, str]] = None,
+                quiet: bool = False) -> Dict:
+    """
+    运行一局纯AI游戏并录制全部模型调用
+
+    不启用响应缓存和对冲请求，保证每次调用都经过后端、请求与回放时一致。
+
+    Args:
+        output_path: 录制文件路径（gzip压缩的JSONL）
+        seed: 对局的随机种子（身份分配、平票等）；None表示随机生成一个并写入录制
+        backend: "bedrock"（默认）或 "fake"
+        endpoint_url: bedrock-runtime 服务地址
+        model_assignment: 按角色覆盖模型分配
+        quiet: 是否丢弃对局的控制台输出
+
+    Returns:
+        {seed, backend, winner, days, calls, duration}
+    """
+    if seed is None:
+        seed = random.randrange(2 ** 31)
+    inner = FakeBackend() if backend == "fake" else BedrockBackend(endpoint_url=endpoint_url)
+    recorder = RecordingBackend(inner)
+    llm_client = LLMClient(backend=recorder, model_assignment=model_assignment)
+    game = WerewolfGame(llm_client, seed=seed, output=NullSink() if quiet else ConsoleSink())
+
+    start = time.time()
+    try:
+        game.setup_game(human_player_count=0)
+        game.start_game()
+    finally:
+        llm_client.shutdown()
+        recorder.save(output_path, metadata={
+            "seed": seed,
+            "backend": backend,
+            "model_assignment": llm_client.model_assignment,
+            "winner": game.winner.value if game.winner else None,
+            "days": game.day_count
+        })
+
+    return {"seed": seed, "backend": backend, "winner": game.winner.value if game.winner else None,
+            "days": game.day_count, "calls": len(recorder.calls), "duration": round(time.time() - start, 3)}
+
+
+def replay_game(path: str, quiet: bool = True, response_cache: Optional[ResponseCache] = None) -> Dict:
+    """
+    不访问网络地重跑录制的对局
+
+    Args:
+        path: 录制文件路径
+        quiet: 是否丢弃对局的控制台输出
+        response_cache: 响应缓存（命中的调用不经过回放后端，只测量引擎本身的耗时）
+
+    Returns:
+        {seed, backend, winner, days, outcome_matches, calls, recorded_calls, unused_calls, duration, divergence}
+        backend 为录制时使用的后端；divergence 为第一次分歧的说明（没有分歧时为None）
+    """
+    header, calls = load_transcript(path)
+    backend = ReplayBackend(calls)
+    llm_client = LLMClient(backend=backend, model_assignment=header.get("model_assignment"),
+                           response_cache=response_cache)
+    game = WerewolfGame(llm_client, seed=header["seed"], output=NullSink() if quiet else ConsoleSink())
+
+    start = time.time()
+    try:
+        game.setup_game(human_player_count=0)
+        game.start_game()
+    except ReplayDivergenceError:
+        pass
+    finally:
+        llm_client.shutdown()
+    duration = time.time() - start
+
+    winner = game.winner.value if game.winner else None
+    return {
+        "seed": header["seed"],
+        "backend": header.get("backend"),
+        "winner": winner,
+        "days": game.day_count,
+        "outcome_matches": backend.divergence is None and (winner, game.day_count) == (header.get("winner"),
+                                                                                       header.get("days")),
+        "calls": backend.calls,
+        "recorded_calls": len(calls),
+        "unused_calls": backend.unused,
+        "duration": round(duration, 3),
+        "divergence": backend.divergence
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="录制与回放纯AI狼人杀对局")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = subparsers.add_parser("record", help="运行一局并录制全部模型调用")
+    record_parser.add_argument("--output", required=True, help="录制文件路径（.jsonl.gz）")
+    record_parser.add_argument("--seed", type=int, default=None, help="对局的随机种子（默认随机生成）")
+    record_parser.add_argument("--backend", choices=["bedrock", "fake"], default="bedrock")
+    record_parser.add_argument("--endpoint-url", default=None, help="bedrock-runtime 服务地址（如本地模拟服务）")
+    record_parser.add_argument("--model", default=None, help="所有角色使用同一个模型")
+    record_parser.add_argument("--quiet", action="store_true", help="不输出对局过程")
+
+    replay_parser = subparsers.add_parser("replay", help="不访问网络地重跑录制的对局")
+    replay_parser.add_argument("paths", nargs="+", help="录制文件路径")
+    replay_parser.add_argument("--verbose", action="store_true", help="输出对局过程")
+    replay_parser.add_argument("--cache-dir", default=None,
+                               help="响应缓存目录（所有录制共用；命中的调用不经过回放后端）")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        model_assignment = None
+        if args.model:
+            model_assignment = {role_name: args.model for role_name in LLMClient.DEFAULT_MODEL_ASSIGNMENT}
+        result = record_game(args.output, seed=args.seed, backend=args.backend, endpoint_url=args.endpoint_url,
+                             model_assignment=model_assignment, quiet=args.quiet)
+        print(f"已录制 {result['calls']} 次调用到 {args.output}（后端 {result['backend']}，"
+              f"种子 {result['seed']}，{result['winner']}，{result['days']}天，耗时 {result['duration']}s）")
+        return
+
+    diverged = 0
+    response_cache = ResponseCache(args.cache_dir) if args.cache_dir else None
+    for path in args.paths:
+        result = replay_game(path, quiet=not args.verbose, response_cache=response_cache)
+        if result["divergence"]:
+            diverged += 1
+            print(f"❌ {path}：回放出现分歧\n{result['divergence']}")
+            continue
+        status = "✅" if result["outcome_matches"] else "⚠️ 结局与录制不同"
+        print(f"{status} {path}：录制后端 {result['backend']}，种子 {result['seed']}，"
+              f"{result['winner']}，{result['days']}天，"
+              f"回放 {result['calls']}/{result['recorded_calls']} 次调用，引擎耗时 {result['duration']}s")
+    if response_cache:
+        print(ResponseCache.format_stats(response_cache.get_stats()))
+    sys.exit(1 if diverged else 0)
+
+
+if __name__ == "__main__":
+    main()
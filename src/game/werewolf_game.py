@@ -1,22 +1,72 @@
+import asyncio
+import functools
 import random
-from typing import List, Optional, Dict
+import uuid
+from typing import List, Optional, Dict, Tuple
 from src.models.roles import Role, RoleType, Camp, create_role, Witch, Hunter
-from src.players.player import Player, HumanPlayer, AIPlayer
+from src.game.checkpoint import read_checkpoint, remove_checkpoint, write_checkpoint
+from src.game.event_log import EventType, GameEventLog
+from src.game.output import ConsoleSink, NullSink, OutputEvent, OutputSink
+from src.players.memory_summary import MemorySummarizer
+from src.players.player import Player, HumanPlayer, AIPlayer, run_in_daemon_thread
+from src.players.system_prompt import STANDARD_BOARD
 from src.utils.llm_client import LLMClient
+from src.utils.prompt_budget import PromptBudgeter
+from src.utils.usage_tracker import call_context
+
+
+def _tracked_phase(method):
+    """为阶段内的LLM调用附加对局ID、天数和阶段名标签，用于用量统计和多对局调度"""
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        with call_context(game_id=self.game_id, day=self.day_count, phase=method.__name__.lstrip("_")):
+            return await method(self, *args, **kwargs)
+    return wrapper
 
 
 class WerewolfGame:
     """狼人杀游戏主类"""
 
-    def __init__(self, llm_client: LLMClient):
+    # 主循环的阶段（每个阶段结束后保存存档，恢复时从下一个阶段开始）
+    PHASE_NIGHT = "night"
+    PHASE_DAWN = "dawn"  # 宣布死亡和遗言
+    PHASE_SHERIFF_ELECTION = "sheriff_election"
+    PHASE_SPEECH = "speech"
+    PHASE_VOTE = "vote"
+
+    def __init__(self, llm_client: LLMClient, memory_summarizer: Optional[MemorySummarizer] = None,
+                 prompt_budgeter: Optional[PromptBudgeter] = None, seed: Optional[int] = None,
+                 checkpoint_path: Optional[str] = None, output: Optional[OutputSink] = None):
+        """
+        Args:
+            llm_client: LLM客户端（可以由多个同时进行的对局共用）
+            memory_summarizer: AI玩家的记忆摘要器（默认使用规则摘要，不额外调用模型）
+            prompt_budgeter: 按阶段的提示词预算（所有AI玩家共用，便于统计裁剪情况）
+            seed: 随机种子（身份分配、平票等随机选择）；每局使用独立的随机数生成器，
+                同一进程中并发的多个对局互不影响
+            checkpoint_path: 存档文件路径；设置后每个阶段结束时保存对局状态，
+                中断后可以用 WerewolfGame.resume 继续（None表示不存档）
+            output: 引擎输出的去处（默认输出到控制台；批量对局可用 NullSink 丢弃）
+        """
         self.llm_client = llm_client
+        self.output = output or ConsoleSink()
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.checkpoint_path = checkpoint_path
+        self.next_phase = self.PHASE_NIGHT  # 下一个要进行的阶段
+        self.resumed = False  # 是否从存档恢复
+        self.memory_summarizer = memory_summarizer
+        self.prompt_budgeter = prompt_budgeter or PromptBudgeter()
+        self.game_id = uuid.uuid4().hex[:8]  # 对局ID（用于用量统计）
         self.players: List[Player] = []
+        self.event_log = GameEventLog()  # 对局事件日志（AI玩家按可见范围增量读取）
         self.day_count = 0
         self.game_over = False
         self.winner = None
         self.last_words_queue: List[Player] = []  # 遗言队列
         self.last_night_first_death: Optional[Player] = None  # 昨晚第一个死亡的玩家（用于确定发言顺序）
         self.last_night_deaths: List[Player] = []  # 昨晚所有死亡的玩家（用于宣布死亡）
+        self.last_speaker: Optional[Player] = None  # 当天最后发言的玩家（有警长时为归票的警长）
 
         # 警长系统
         self.sheriff: Optional[Player] = None  # 当前警长
@@ -29,9 +79,7 @@ class WerewolfGame:
         Args:
             human_player_count: 人类玩家数量（0-9）
         """
-        print("\n" + "="*60)
-        print("狼人杀游戏 - 9人局")
-        print("="*60)
+        self._banner("狼人杀游戏 - 9人局", human_player_count=human_player_count)
 
         # 创建玩家
         self._create_players(human_player_count)
@@ -42,6 +90,9 @@ class WerewolfGame:
         # 显示游戏信息
         self._show_game_info()
 
+        # 初始存档：第一夜结束前中断也可以继续（身份分配不变）
+        self.save_checkpoint()
+
     def _create_players(self, human_player_count: int):
         """创建玩家"""
         ai_player_count = 9 - human_player_count
@@ -63,7 +114,11 @@ class WerewolfGame:
                 player_id=player_id,
                 name=f"AI-玩家{player_id}",  # 只显示编号，不显示身份
                 model_id=model_id,
-                llm_client=self.llm_client
+                llm_client=self.llm_client,
+                fallback_models=self.llm_client.get_fallback_chain_for_role(role_name),
+                event_log=self.event_log,
+                memory_summarizer=self.memory_summarizer,
+                prompt_budgeter=self.prompt_budgeter
             )
             self.players.append(player)
 
@@ -83,7 +138,7 @@ class WerewolfGame:
         ]
 
         # 随机打乱角色列表
-        random.shuffle(roles)
+        self.rng.shuffle(roles)
 
         # 分配角色给玩家
         for player, role in zip(self.players, roles):
@@ -91,79 +146,268 @@ class WerewolfGame:
 
     def _show_game_info(self):
         """显示游戏信息"""
-        print("\n玩家列表：")
+        self._emit("player_list", "玩家列表：", gap=True)
         for player in self.players:
-            player_type = "人类" if isinstance(player, HumanPlayer) else "AI"
-            print(f"  玩家{player.player_id} - {player.name} ({player_type})")
+            is_human = isinstance(player, HumanPlayer)
+            self._emit("player_info", f"玩家{player.player_id} - {player.name} ({'人类' if is_human else 'AI'})",
+                       indent=1, player_id=player.player_id, name=player.name, human=is_human)
+
+        self._show_private_roles()
 
-        # 显示人类玩家的角色
+    def _show_private_roles(self):
+        """向人类玩家显示自己的角色（开局和从存档继续时）"""
         for player in self.players:
             if isinstance(player, HumanPlayer):
-                print(f"\n{'='*60}")
-                print(f"你的角色信息：")
-                print(f"{'='*60}")
-                print(player.role.get_description())
-                print(f"\n你的座位号是：{player.player_id}")
+                self._banner("你的角色信息：", player_id=player.player_id)
+                self._emit("private_role", player.role.get_description(), player_id=player.player_id,
+                           role=player.role.get_role_type().value)
+                self._emit("private_seat", f"你的座位号是：{player.player_id}", gap=True, player_id=player.player_id)
 
                 # 如果是狼人，显示队友
                 if player.is_werewolf():
-                    werewolves = [p for p in self.players if p.is_werewolf()]
-                    print("\n你的狼人队友是：")
-                    for w in werewolves:
-                        if w.player_id != player.player_id:
-                            print(f"  玩家{w.player_id} - {w.name}")
+                    teammates = [p for p in self.players if p.is_werewolf() and p.player_id != player.player_id]
+                    self._emit("private_teammates", "你的狼人队友是：\n" + "\n".join(
+                        f"  玩家{w.player_id} - {w.name}" for w in teammates), gap=True,
+                        player_id=player.player_id, teammates=[w.player_id for w in teammates])
 
-    def start_game(self):
-        """开始游戏"""
-        print("\n" + "="*60)
-        print("游戏开始！")
-        print("="*60)
+    def _emit(self, kind: str, text: str = "", indent: int = 0, gap: bool = False, **data):
+        """
+        发出一条输出事件
 
-        # 游戏主循环
-        while not self.game_over:
-            self.day_count += 1
-            print(f"\n{'#'*60}")
-            print(f"第 {self.day_count} 天")
-            print(f"{'#'*60}")
+        Args:
+            kind: 事件类型
+            text: 给人看的说明
+            indent: 控制台缩进级别
+            gap: 控制台输出前是否空一行
+            **data: 结构化字段（玩家编号、目标等）
+        """
+        if not self._output_enabled:
+            return
+        self.output.emit(OutputEvent(kind, text, data, self.game_id, self.day_count, indent, gap))
 
-            # 夜晚阶段
-            self._night_phase()
+    @property
+    def _output_enabled(self) -> bool:
+        """是否需要生成输出事件（NullSink 时跳过，不做任何格式化）"""
+        return not isinstance(self.output, NullSink)
 
-            # 检查游戏是否结束
-            if self._check_game_over():
-                break
+    def _banner(self, text: str, level: str = "game", **data):
+        """发出一条横幅（游戏、天数或阶段的开始和结束）"""
+        self._emit("banner", text, gap=True, level=level, **data)
+
+    def start_game(self):
+        """开始游戏（在新的事件循环中运行整局）"""
+        asyncio.run(self.play())
 
-            # 白天阶段
-            self._day_phase()
+    async def play(self):
+        """
+        运行整局游戏（协程）
+
+        各阶段在等待模型响应时让出事件循环，同一进程可以在一个事件循环上同时运行多个对局，
+        共用同一个LLM客户端；有人类玩家的对局在调度器中优先获得名额。
+        """
+        scheduler = self.llm_client.scheduler
+        if scheduler is not None:
+            scheduler.register(self.game_id, interactive=any(isinstance(p, HumanPlayer) for p in self.players))
+
+        try:
+            await self._play()
+        finally:
+            if scheduler is not None:
+                scheduler.unregister(self.game_id)
+
+    async def _play(self):
+        """游戏主循环（按阶段推进，每个阶段结束后保存存档）"""
+        if self.resumed:
+            self._banner(f"从存档继续游戏：第 {self.day_count} 天，下一阶段 {self.next_phase}",
+                         event="game_resumed", next_phase=self.next_phase)
+            self._show_private_roles()
+        else:
+            self._banner("游戏开始！", event="game_started", seed=self.seed)
+
+        while not self.game_over:
+            phase = self.next_phase
+            await self._run_phase(phase)
 
             # 检查游戏是否结束
             if self._check_game_over():
                 break
 
+            self.next_phase = self._phase_after(phase)
+            self.save_checkpoint()
+
         # 游戏结束
         self._show_game_result()
+        if self.checkpoint_path:
+            remove_checkpoint(self.checkpoint_path)
+
+    async def _run_phase(self, phase: str):
+        """进行一个阶段"""
+        if phase == self.PHASE_NIGHT:
+            self.day_count += 1
+            self._banner(f"第 {self.day_count} 天", level="day")
+            await self._night_phase()
+        elif phase == self.PHASE_DAWN:
+            self._banner("天亮了...", level="phase")
+
+            # 宣布昨晚死亡信息
+            self._announce_deaths()
+
+            # 遗言（猎人可能开枪带走关键玩家，结束后由主循环检查胜负）
+            await self._last_words()
+        elif phase == self.PHASE_SHERIFF_ELECTION:
+            await self._sheriff_election()
+        elif phase == self.PHASE_SPEECH:
+            await self._speech_phase()
+        elif phase == self.PHASE_VOTE:
+            await self._vote_phase()
+        else:
+            raise ValueError(f"未知的阶段：{phase}")
+
+    def _phase_after(self, phase: str) -> str:
+        """当前阶段结束后的下一个阶段"""
+        if phase == self.PHASE_NIGHT:
+            return self.PHASE_DAWN
+        if phase == self.PHASE_DAWN:
+            # 活人不足时跳过白天的发言和投票
+            if len([p for p in self.players if p.is_alive]) < 2:
+                return self.PHASE_NIGHT
+            # 首日白天：警长竞选
+            if self.day_count == 1 and not self.sheriff_election_done:
+                return self.PHASE_SHERIFF_ELECTION
+            return self.PHASE_SPEECH
+        if phase == self.PHASE_SHERIFF_ELECTION:
+            return self.PHASE_SPEECH
+        if phase == self.PHASE_SPEECH:
+            return self.PHASE_VOTE
+        return self.PHASE_NIGHT
+
+    def dump_state(self) -> Dict:
+        """
+        导出完整的对局状态：玩家、角色和技能、警长、天数、下一阶段、事件日志、
+        AI玩家的记忆和随机数生成器状态
+        """
+        def player_id(player: Optional[Player]) -> Optional[int]:
+            return player.player_id if player else None
+
+        version, internal_state, gauss_next = self.rng.getstate()
+        return {
+            "game_id": self.game_id,
+            "seed": self.seed,
+            "rng": [version, list(internal_state), gauss_next],
+            "day_count": self.day_count,
+            "next_phase": self.next_phase,
+            "game_over": self.game_over,
+            "winner": self.winner.value if self.winner else None,
+            "last_words_queue": [p.player_id for p in self.last_words_queue],
+            "last_night_first_death": player_id(self.last_night_first_death),
+            "last_night_deaths": [p.player_id for p in self.last_night_deaths],
+            "last_speaker": player_id(self.last_speaker),
+            "sheriff": player_id(self.sheriff),
+            "sheriff_election_done": self.sheriff_election_done,
+            "event_log": self.event_log.dump_state(),
+            "players": [p.dump_state() for p in self.players]
+        }
+
+    def save_checkpoint(self):
+        """保存存档（未设置存档路径时不做任何事）"""
+        if self.checkpoint_path:
+            write_checkpoint(self.checkpoint_path, self.dump_state())
 
-    def _night_phase(self):
+    @classmethod
+    def resume(cls, checkpoint_path: str, llm_client: LLMClient,
+               memory_summarizer: Optional[MemorySummarizer] = None,
+               prompt_budgeter: Optional[PromptBudgeter] = None,
+               output: Optional[OutputSink] = None) -> "WerewolfGame":
+        """
+        从存档恢复对局
+
+        已完成阶段的LLM调用不会重新发出；中断时正在进行的阶段从头重新进行。
+        恢复后继续写入同一个存档文件。
+
+        Args:
+            checkpoint_path: 存档文件路径
+            llm_client: LLM客户端
+            memory_summarizer: AI玩家的记忆摘要器
+            prompt_budgeter: 按阶段的提示词预算
+            output: 引擎输出的去处（默认输出到控制台）
+
+        Returns:
+            恢复好的对局，调用 start_game() 或 play() 继续
+        """
+        state = read_checkpoint(checkpoint_path)
+        game = cls(llm_client, memory_summarizer=memory_summarizer, prompt_budgeter=prompt_budgeter,
+                   seed=state["seed"], checkpoint_path=checkpoint_path, output=output)
+        game.game_id = state["game_id"]
+        version, internal_state, gauss_next = state["rng"]
+        game.rng.setstate((version, tuple(internal_state), gauss_next))
+        game.event_log.load_state(state["event_log"])
+
+        for player_state in state["players"]:
+            if player_state["is_ai"]:
+                player = AIPlayer(
+                    player_id=player_state["player_id"],
+                    name=player_state["name"],
+                    model_id=player_state["model_id"],
+                    llm_client=llm_client,
+                    board_config=player_state.get("board_config", STANDARD_BOARD),
+                    fallback_models=player_state["fallback_models"],
+                    event_log=game.event_log,
+                    memory_summarizer=memory_summarizer,
+                    prompt_budgeter=game.prompt_budgeter
+                )
+            else:
+                player = HumanPlayer(player_state["player_id"], player_state["name"])
+            player.load_state(player_state)
+            game.players.append(player)
+
+        players = {p.player_id: p for p in game.players}
+        game.day_count = state["day_count"]
+        game.next_phase = state["next_phase"]
+        game.game_over = state["game_over"]
+        game.winner = Camp(state["winner"]) if state["winner"] else None
+        game.last_words_queue = [players[pid] for pid in state["last_words_queue"]]
+        game.last_night_first_death = players.get(state["last_night_first_death"])
+        game.last_night_deaths = [players[pid] for pid in state["last_night_deaths"]]
+        game.last_speaker = players.get(state.get("last_speaker"))
+        game.sheriff = players.get(state["sheriff"])
+        game.sheriff_election_done = state["sheriff_election_done"]
+        game.resumed = True
+        return game
+
+    async def _night_phase(self):
         """夜晚阶段"""
-        print("\n" + "-"*60)
-        print("夜晚降临，所有人请闭眼...")
-        print("-"*60)
+        self._banner("夜晚降临，所有人请闭眼...", level="phase")
+
+        # 夜晚行动的依赖关系：(狼人 ‖ 预言家) → 女巫 → 结算死亡
+        # 预言家查验与狼刀互不依赖，只有女巫需要知道刀口
+        seers = [p for p in self.players
+                 if p.is_alive and p.role.get_role_type() == RoleType.SEER]
+
+        if seers and isinstance(seers[0], AIPlayer):
+            # 预言家的查验请求与狼人讨论同时进行，查验结果在狼人闭眼后公布
+            seer_task = asyncio.ensure_future(self._seer_choose_target())
 
-        # 狼人行动
-        wolf_kill_target = self._werewolves_action()
+            # 狼人行动
+            wolf_kill_target = await self._werewolves_action()
 
-        # 预言家行动
-        self._seer_action()
+            # 预言家行动
+            self._emit("night_role_wakes", "预言家请睁眼...", gap=True, role=RoleType.SEER.value)
+            self._apply_seer_check(await seer_task)
+        else:
+            # 人类预言家需要终端输入，保持原有顺序
+            wolf_kill_target = await self._werewolves_action()
+            await self._seer_action()
 
         # 女巫行动（返回修改后的wolf_kill_target和poison_target）
-        wolf_kill_target, witch_poison_target = self._witch_action(wolf_kill_target)
+        wolf_kill_target, witch_poison_target = await self._witch_action(wolf_kill_target)
 
         # 处理夜晚死亡（分步处理，确保正确的胜负判定）
         self._process_night_deaths_with_victory_check(wolf_kill_target, witch_poison_target)
 
-    def _werewolves_action(self) -> Optional[Player]:
+    @_tracked_phase
+    async def _werewolves_action(self) -> Optional[Player]:
         """狼人行动"""
-        print("\n狼人请睁眼...")
+        self._emit("night_role_wakes", "狼人请睁眼...", gap=True, role=RoleType.WEREWOLF.value)
 
         werewolves = [p for p in self.players if p.is_alive and p.is_werewolf()]
         if not werewolves:
@@ -174,13 +418,13 @@ class WerewolfGame:
             return None
 
         # 狼人讨论战术
-        print(f"\n{'='*60}")
-        print(f"🐺 狼人夜间战术讨论（狼人队伍：{', '.join([f'玩家{w.player_id}' for w in werewolves])}）")
-        print(f"{'='*60}")
+        self._banner(f"🐺 狼人夜间战术讨论（狼人队伍：{', '.join([f'玩家{w.player_id}' for w in werewolves])}）",
+                     werewolves=[w.player_id for w in werewolves])
         
-        # 第一阶段：每个狼人发表战术建议和目标建议
+        # 第一阶段：每个狼人发表战术建议和目标建议（各狼看到相同的局面，建议同时收集）
         wolf_suggestions = {}  # 存储每个狼人的建议
-        
+
+        suggestion_requests = []
         for wolf in werewolves:
             context = {
                 "options": [f"玩家{p.player_id}" for p in alive_non_werewolves],
@@ -207,7 +451,11 @@ class WerewolfGame:
 ⚠️ 重要：狼人每晚必须击杀一名玩家，请从上述非狼人玩家中选择一名。
 请先简要说明你的战术考虑（50字以内），然后给出目标编号（如：战术：优先刀神职。目标：4）："""
 
-            decision = wolf.make_decision(prompt, context)
+            suggestion_requests.append((wolf, prompt, context))
+
+        decisions = await self._collect_decisions(suggestion_requests)
+
+        for wolf, decision in zip(werewolves, decisions):
             target = self._parse_player_id(decision, alive_non_werewolves)
             
             wolf_suggestions[wolf.player_id] = {
@@ -216,16 +464,13 @@ class WerewolfGame:
             }
             
             # 显示每个狼人的讨论
-            print(f"\n玩家{wolf.player_id}（狼人）的战术建议：")
-            print(f"  {decision}")
-            if target:
-                print(f"  → 建议击杀：玩家{target.player_id}")
-            else:
-                print(f"  ⚠️ 未明确目标")
+            conclusion = f"→ 建议击杀：玩家{target.player_id}" if target else "⚠️ 未明确目标"
+            self._emit("wolf_suggestion", f"玩家{wolf.player_id}（狼人）的战术建议：\n  {decision}\n  {conclusion}",
+                       gap=True, player_id=wolf.player_id, suggestion=decision,
+                       target=target.player_id if target else None)
 
         # 第二阶段：统计投票，决定最终目标
-        print(f"\n{'-'*60}")
-        print("狼人投票决策：")
+        self._emit("wolf_vote_start", "-"*60 + "\n狼人投票决策：", gap=True)
         
         vote_count = {}  # 统计每个目标的得票数
         for wolf_id, suggestion in wolf_suggestions.items():
@@ -234,9 +479,10 @@ class WerewolfGame:
                 if target.player_id not in vote_count:
                     vote_count[target.player_id] = []
                 vote_count[target.player_id].append(wolf_id)
-                print(f"  玩家{wolf_id} 投票给 玩家{target.player_id}")
+                self._emit("wolf_vote", f"玩家{wolf_id} 投票给 玩家{target.player_id}", indent=1,
+                           player_id=wolf_id, target=target.player_id)
             else:
-                print(f"  玩家{wolf_id} 的投票解析失败")
+                self._emit("wolf_vote", f"玩家{wolf_id} 的投票解析失败", indent=1, player_id=wolf_id, target=None)
         
         # 选择得票最多的目标
         final_target = None
@@ -245,38 +491,34 @@ class WerewolfGame:
             candidates = [pid for pid, voters in vote_count.items() if len(voters) == max_votes]
             
             if len(candidates) > 1:
-                print(f"\n  平票！候选目标：{candidates}")
-                import random
-                chosen_id = random.choice(candidates)
-                print(f"  随机选择：玩家{chosen_id}")
+                chosen_id = self.rng.choice(candidates)
+                self._emit("wolf_vote_tie", f"平票！候选目标：{candidates}\n随机选择：玩家{chosen_id}", indent=1,
+                           gap=True, candidates=candidates, target=chosen_id)
                 final_target = next(p for p in alive_non_werewolves if p.player_id == chosen_id)
             else:
                 final_target = next(p for p in alive_non_werewolves if p.player_id == candidates[0])
         
         # 如果仍然没有有效目标，随机选择（确保狼人必须杀人）
         if not final_target:
-            import random
-            final_target = random.choice(alive_non_werewolves)
-            print(f"\n  ⚠️ 所有狼人都未做出有效选择，随机选择玩家{final_target.player_id}")
+            final_target = self.rng.choice(alive_non_werewolves)
+            self._emit("wolf_vote_fallback", f"⚠️ 所有狼人都未做出有效选择，随机选择玩家{final_target.player_id}",
+                       indent=1, gap=True, target=final_target.player_id)
 
-        print(f"\n{'='*60}")
-        print(f"🎯 最终决策：狼人选择击杀 玩家{final_target.player_id}")
-        print(f"{'='*60}")
+        self._banner(f"🎯 最终决策：狼人选择击杀 玩家{final_target.player_id}", event="wolf_kill",
+                     target=final_target.player_id)
 
-        # 添加到狼人记忆
-        for wolf in werewolves:
-            if isinstance(wolf, AIPlayer):
-                wolf.add_memory(f"第{self.day_count}晚：狼人击杀了玩家{final_target.player_id}")
+        # 记录到狼队信息
+        self.event_log.wolves(f"第{self.day_count}晚：狼人击杀了玩家{final_target.player_id}",
+                              self.day_count, EventType.WOLF_KILL)
 
         # 如果有多个狼人，继续讨论明天白天的战术
         if len(werewolves) > 1:
-            print(f"\n{'-'*60}")
-            print(f"🗣️ 狼人继续讨论明天白天的战术...")
-            print(f"{'-'*60}")
+            self._banner("🗣️ 狼人继续讨论明天白天的战术...", level="phase")
             
             alive_players_tomorrow = [p for p in self.players if p.is_alive and p.player_id != final_target.player_id]
             
-            # 让每个狼人制定明天的战术计划
+            # 让每个狼人制定明天的战术计划（目标已确定，各狼的计划同时生成）
+            tactics_requests = []
             for wolf in werewolves:
                 context = {
                     "werewolves": [f"玩家{w.player_id}" for w in werewolves],
@@ -331,40 +573,50 @@ class WerewolfGame:
 
 请简要说明你的白天战术："""
 
-                decision = wolf.get_speech(prompt, context)
-                
-                print(f"\n玩家{wolf.player_id}（狼人）的明天战术计划：")
-                print(f"  {decision}")
+                tactics_requests.append((wolf, prompt, context))
+
+            tactics = await self._collect_speeches(tactics_requests)
+
+            for wolf, decision in zip(werewolves, tactics):
+                self._emit("wolf_tactics", f"玩家{wolf.player_id}（狼人）的明天战术计划：\n  {decision}", gap=True,
+                           player_id=wolf.player_id, plan=decision)
                 
-                # 将战术讨论添加到所有狼人的记忆（狼人之间共享信息）
-                for other_wolf in werewolves:
-                    if isinstance(other_wolf, AIPlayer):
-                        other_wolf.add_memory(f"第{self.day_count}晚狼队讨论明天战术-玩家{wolf.player_id}：{decision[:150]}")
+                # 战术讨论在狼人之间共享
+                self.event_log.wolves(f"第{self.day_count}晚狼队讨论明天战术-玩家{wolf.player_id}：{decision}",
+                                      self.day_count, EventType.WOLF_TACTICS, actor=wolf.player_id)
             
-            print(f"\n{'-'*60}")
-            print("🌙 狼人战术讨论完毕，闭眼...")
-            print(f"{'-'*60}")
+            self._banner("🌙 狼人战术讨论完毕，闭眼...", level="phase")
 
         return final_target
 
-    def _seer_action(self):
+    async def _seer_action(self):
         """预言家行动"""
-        print("\n预言家请睁眼...")
+        self._emit("night_role_wakes", "预言家请睁眼...", gap=True, role=RoleType.SEER.value)
+        self._apply_seer_check(await self._seer_choose_target())
 
+    @_tracked_phase
+    async def _seer_choose_target(self) -> Optional[Tuple[Player, Optional[Player]]]:
+        """
+        预言家选择查验目标（只询问预言家，不输出信息也不修改游戏状态，可与狼人行动并发）
+
+        Returns:
+            (预言家, 查验目标)；没有存活的预言家或无人可查时返回None
+        """
         seers = [p for p in self.players
                 if p.is_alive and p.role.get_role_type() == RoleType.SEER]
 
         if not seers:
-            return
+            return None
 
         seer = seers[0]
         other_players = [p for p in self.players if p.is_alive and p.player_id != seer.player_id]
 
         if not other_players:
-            return
+            return None
 
         context = {
-            "options": [f"玩家{p.player_id}" for p in other_players]
+            "options": [f"玩家{p.player_id}" for p in other_players],
+            "choices": [p.player_id for p in other_players]
         }
 
         prompt = f"""现在是预言家行动阶段。
@@ -374,22 +626,32 @@ class WerewolfGame:
 
 请选择要查验的玩家（只需回答玩家编号，如：1）："""
 
-        decision = seer.make_decision(prompt, context)
+        decision = await seer.amake_decision(prompt, context)
         target = self._parse_player_id(decision, other_players)
+        return seer, target
 
+    def _apply_seer_check(self, seer_choice: Optional[Tuple[Player, Optional[Player]]]):
+        """公布预言家的查验结果"""
+        if not seer_choice:
+            return
+
+        seer, target = seer_choice
         if target:
             is_werewolf = target.is_werewolf()
             result = "狼人" if is_werewolf else "好人"
-            print(f"预言家查验玩家{target.player_id}，结果是：{result}")
+            self._emit("seer_check", f"预言家查验玩家{target.player_id}，结果是：{result}",
+                       player_id=seer.player_id, target=target.player_id, result=result)
 
-            # 添加到预言家记忆
-            if isinstance(seer, AIPlayer):
-                seer.add_memory(f"第{self.day_count}晚：查验玩家{target.player_id}，是{result}")
+            # 查验结果只有预言家可见
+            self.event_log.private(seer.player_id, f"第{self.day_count}晚：查验玩家{target.player_id}，是{result}",
+                                   self.day_count, EventType.SEER_CHECK)
 
             if isinstance(seer, HumanPlayer):
-                print(f"\n>>> 查验结果：玩家{target.player_id} 是 {result} <<<\n")
+                self._emit("private_seer_result", f">>> 查验结果：玩家{target.player_id} 是 {result} <<<\n",
+                           gap=True, player_id=seer.player_id, target=target.player_id, result=result)
 
-    def _witch_action(self, wolf_kill_target: Optional[Player]) -> tuple[Optional[Player], Optional[Player]]:
+    @_tracked_phase
+    async def _witch_action(self, wolf_kill_target: Optional[Player]) -> tuple[Optional[Player], Optional[Player]]:
         """
         女巫行动
 
@@ -398,7 +660,7 @@ class WerewolfGame:
             - 如果女巫使用解药，wolf_kill_target变为None
             - poison_target是女巫毒死的玩家（如果有）
         """
-        print("\n女巫请睁眼...")
+        self._emit("night_role_wakes", "女巫请睁眼...", gap=True, role=RoleType.WITCH.value)
 
         witches = [p for p in self.players
                   if p.is_alive and p.role.get_role_type() == RoleType.WITCH]
@@ -420,7 +682,7 @@ class WerewolfGame:
 
             # 如果是自己且不能自救，则不询问
             if is_self and witch_role.cannot_save_self:
-                print(f"女巫被击杀，但不能自救")
+                self._emit("witch_cannot_save_self", "女巫被击杀，但不能自救", player_id=witch.player_id)
                 # 女巫被自己刀了但不能自救，不告知具体信息
             else:
                 # 只有在询问解药时才告知刀口信息
@@ -430,21 +692,25 @@ class WerewolfGame:
                 prompt = f"""{info}
 你还有解药，是否使用解药救人？（回答：是 或 否）"""
 
-                decision = witch.make_decision(prompt, {})
+                decision = await witch.amake_decision(prompt, {"choices": ["是", "否"],
+                                                              "target": wolf_kill_target.player_id})
 
                 if "是" in decision or "yes" in decision.lower():
                     if witch_role.use_antidote():
-                        print(f"女巫使用解药救了玩家{wolf_kill_target.player_id}")
+                        self._emit("witch_antidote", f"女巫使用解药救了玩家{wolf_kill_target.player_id}",
+                                   player_id=witch.player_id, target=wolf_kill_target.player_id)
                         saved_player = wolf_kill_target  # 保存被救玩家信息
                         wolf_kill_target = None  # 取消击杀
                         used_potion_tonight = True  # 标记已使用药水
 
-                        if isinstance(witch, AIPlayer):
-                            witch.add_memory(f"第{self.day_count}晚：使用解药救了玩家{saved_player.player_id}")
+                        self.event_log.private(witch.player_id,
+                                               f"第{self.day_count}晚：使用解药救了玩家{saved_player.player_id}",
+                                               self.day_count, EventType.WITCH_ACTION)
                 else:
                     # 女巫选择不救，记录她知道了刀口但选择不救
-                    if isinstance(witch, AIPlayer):
-                        witch.add_memory(f"第{self.day_count}晚：得知玩家{wolf_kill_target.player_id}被刀，选择不用解药")
+                    self.event_log.private(witch.player_id,
+                                           f"第{self.day_count}晚：得知玩家{wolf_kill_target.player_id}被刀，选择不用解药",
+                                           self.day_count, EventType.WITCH_ACTION)
 
         # 询问是否使用毒药（只有在今晚未使用解药的情况下才能使用）
         if witch_role.has_poison and not used_potion_tonight:
@@ -467,19 +733,25 @@ class WerewolfGame:
 存活的其他玩家：
 {chr(10).join([f'  玩家{p.player_id} - {p.name}' for p in other_players])}"""
 
-            decision = witch.make_decision(prompt, {"options": [f"玩家{p.player_id}" for p in other_players]})
+            decision = await witch.amake_decision(prompt, {
+                "options": [f"玩家{p.player_id}" for p in other_players],
+                "choices": [p.player_id for p in other_players],
+                "skip_answer": "否"
+            })
 
             if "否" not in decision and "no" not in decision.lower():
                 poison_target = self._parse_player_id(decision, other_players)
 
                 if poison_target:
                     if witch_role.use_poison():
-                        print(f"女巫使用毒药毒死了玩家{poison_target.player_id}")
+                        self._emit("witch_poison", f"女巫使用毒药毒死了玩家{poison_target.player_id}",
+                                   player_id=witch.player_id, target=poison_target.player_id)
 
-                        if isinstance(witch, AIPlayer):
-                            witch.add_memory(f"第{self.day_count}晚：使用毒药毒死了玩家{poison_target.player_id}")
+                        self.event_log.private(witch.player_id,
+                                               f"第{self.day_count}晚：使用毒药毒死了玩家{poison_target.player_id}",
+                                               self.day_count, EventType.WITCH_ACTION)
         elif used_potion_tonight:
-            print("女巫今晚已使用解药，不能再使用毒药")
+            self._emit("witch_poison_unavailable", "女巫今晚已使用解药，不能再使用毒药", player_id=witch.player_id)
 
         return wolf_kill_target, poison_target
 
@@ -559,37 +831,6 @@ class WerewolfGame:
             self.last_words_queue.extend(deaths)
         # else: 第二夜及之后的夜晚死亡，不加入遗言队列
 
-    def _day_phase(self):
-        """白天阶段"""
-        print("\n" + "-"*60)
-        print("天亮了...")
-        print("-"*60)
-
-        # 宣布昨晚死亡信息
-        self._announce_deaths()
-
-        # 遗言
-        self._last_words()
-
-        # 遗言环节后检查游戏是否结束（猎人可能开枪带走关键玩家）
-        if self._check_game_over():
-            return
-
-        # 检查是否有足够的活人
-        alive_players = [p for p in self.players if p.is_alive]
-        if len(alive_players) < 2:
-            return
-
-        # 首日白天：警长竞选
-        if self.day_count == 1 and not self.sheriff_election_done:
-            self._sheriff_election()
-
-        # 发言阶段
-        self._speech_phase()
-
-        # 投票放逐
-        self._vote_phase()
-
     def _announce_deaths(self):
         """宣布死亡信息"""
         # 使用保存的昨晚死亡列表
@@ -598,30 +839,29 @@ class WerewolfGame:
         deaths_with_last_words = [p for p in self.last_words_queue]
 
         if not night_deaths:
-            print("\n昨晚是平安夜，没有人死亡。")
+            self._emit("night_deaths", "昨晚是平安夜，没有人死亡。", gap=True, deaths=[])
         else:
-            print(f"\n昨晚死亡的玩家：")
+            lines = ["昨晚死亡的玩家："]
             for player in night_deaths:
                 # 判断是否有遗言
                 has_last_words = player in deaths_with_last_words
-                if has_last_words:
-                    print(f"  玩家{player.player_id} - {player.name}")
-                else:
-                    print(f"  玩家{player.player_id} - {player.name} (无遗言)")
-
-        # 广播给所有AI玩家
-        for player in self.players:
-            if isinstance(player, AIPlayer) and player.is_alive:
-                death_info = "昨晚是平安夜" if not night_deaths else \
-                    f"昨晚死亡：{', '.join([f'玩家{p.player_id}' for p in night_deaths])}"
-                player.add_memory(f"第{self.day_count}天白天：{death_info}")
-
-    def _last_words(self):
+                lines.append(f"  玩家{player.player_id} - {player.name}" + ("" if has_last_words else " (无遗言)"))
+            self._emit("night_deaths", "\n".join(lines), gap=True,
+                       deaths=[p.player_id for p in night_deaths],
+                       last_words=[p.player_id for p in night_deaths if p in deaths_with_last_words])
+
+        # 公开死讯
+        death_info = "昨晚是平安夜" if not night_deaths else \
+            f"昨晚死亡：{', '.join([f'玩家{p.player_id}' for p in night_deaths])}"
+        self.event_log.public(f"第{self.day_count}天白天：{death_info}", self.day_count, EventType.DEATH)
+
+    @_tracked_phase
+    async def _last_words(self):
         """遗言环节"""
         while self.last_words_queue:
             player = self.last_words_queue.pop(0)
 
-            print(f"\n玩家{player.player_id}的遗言：")
+            self._emit("last_words_start", f"玩家{player.player_id}的遗言：", gap=True, player_id=player.player_id)
 
             context = {"is_last_words": True}
 
@@ -658,37 +898,40 @@ class WerewolfGame:
 
 ⚠️ 注意：不要推荐投你自己（你已经死了！）"""
 
-            last_words = player.get_speech(prompt, context)
-            print(f"  {last_words}")
+            last_words = await self._stream_speech(player, prompt, context)
 
-            # 广播给所有AI玩家
-            for p in self.players:
-                if isinstance(p, AIPlayer) and p.is_alive:
-                    p.add_memory(f"玩家{player.player_id}遗言：{last_words[:100]}")  # 截取前100字
+            # 公开遗言
+            self.event_log.public(f"玩家{player.player_id}遗言：{last_words}",
+                                  self.day_count, EventType.LAST_WORDS, actor=player.player_id)
 
             # 警徽传递
             if self.sheriff and player.player_id == self.sheriff.player_id:
-                self._sheriff_pass_badge(player)
+                await self._sheriff_pass_badge(player)
 
             # 猎人技能
             if player.role.get_role_type() == RoleType.HUNTER:
                 hunter_role: Hunter = player.role
                 if hunter_role.can_shoot:
-                    self._hunter_shoot(player)
+                    await self._hunter_shoot(player)
 
                     # 猎人开枪后立即检查游戏是否结束
                     if self._check_game_over():
                         return
 
-    def _hunter_shoot(self, hunter: Player):
+    @_tracked_phase
+    async def _hunter_shoot(self, hunter: Player):
         """猎人开枪"""
-        print(f"\n猎人玩家{hunter.player_id}可以开枪带走一名玩家！")
+        self._emit("hunter_can_shoot", f"猎人玩家{hunter.player_id}可以开枪带走一名玩家！", gap=True,
+                   player_id=hunter.player_id)
 
         alive_players = [p for p in self.players if p.is_alive]
         if not alive_players:
             return
 
-        context = {"options": [f"玩家{p.player_id}" for p in alive_players]}
+        context = {
+            "options": [f"玩家{p.player_id}" for p in alive_players],
+            "choices": [p.player_id for p in alive_players]
+        }
         prompt = f"""你是猎人，现在可以开枪带走一名玩家。
 
 存活的玩家：
@@ -696,25 +939,24 @@ class WerewolfGame:
 
 请选择要射击的玩家（只需回答玩家编号，如：1）："""
 
-        decision = hunter.make_decision(prompt, context)
+        decision = await hunter.amake_decision(prompt, context)
         target = self._parse_player_id(decision, alive_players)
 
         if target:
-            print(f"猎人开枪射击玩家{target.player_id}")
+            self._emit("hunter_shot", f"猎人开枪射击玩家{target.player_id}", player_id=hunter.player_id,
+                       target=target.player_id)
             target.die("shoot")
             # 遗言规则：白天被猎人枪杀的玩家有遗言
             self.last_words_queue.append(target)
 
             # 广播
-            for p in self.players:
-                if isinstance(p, AIPlayer) and p.is_alive:
-                    p.add_memory(f"猎人玩家{hunter.player_id}开枪带走了玩家{target.player_id}")
+            self.event_log.public(f"猎人玩家{hunter.player_id}开枪带走了玩家{target.player_id}",
+                                  self.day_count, EventType.DEATH, actor=hunter.player_id)
 
-    def _speech_phase(self):
+    @_tracked_phase
+    async def _speech_phase(self):
         """发言阶段"""
-        print("\n" + "-"*60)
-        print("发言阶段")
-        print("-"*60)
+        self._banner("发言阶段", level="phase")
 
         alive_players = [p for p in self.players if p.is_alive]
 
@@ -741,16 +983,18 @@ class WerewolfGame:
                         reordered_players.append(player)
 
                 alive_players = reordered_players
-                print(f"（从玩家{self.last_night_first_death.player_id}的右边开始发言）")
+                self._emit("speech_order", f"（从玩家{self.last_night_first_death.player_id}的右边开始发言）",
+                           after_player=self.last_night_first_death.player_id)
 
         # 警长归票权：警长最后发言
         if self.sheriff and self.sheriff.is_alive and self.sheriff in alive_players:
             alive_players.remove(self.sheriff)
             alive_players.append(self.sheriff)
-            print(f"（警长玩家{self.sheriff.player_id}拥有归票权，将最后发言）")
+            self._emit("speech_order", f"（警长玩家{self.sheriff.player_id}拥有归票权，将最后发言）",
+                       sheriff=self.sheriff.player_id)
 
         for idx, player in enumerate(alive_players):
-            print(f"\n玩家{player.player_id}发言：")
+            self._emit("speech_start", f"玩家{player.player_id}发言：", gap=True, player_id=player.player_id)
 
             # 计算发言顺序信息
             current_position = idx + 1
@@ -793,31 +1037,36 @@ class WerewolfGame:
 - 为自己辩护（如果需要）
 - 可以回应之前发言的玩家"""
 
-            speech = player.get_speech(prompt, context)
-            print(f"  {speech}")
+            speech = await self._stream_speech(player, prompt, context)
+            self.last_speaker = player
 
-            # 广播给其他AI玩家
-            for p in self.players:
-                if isinstance(p, AIPlayer) and p.is_alive and p.player_id != player.player_id:
-                    p.add_memory(f"第{self.day_count}天玩家{player.player_id}发言：{speech[:100]}")
+            # 广播给其他玩家
+            self.event_log.public(f"第{self.day_count}天玩家{player.player_id}发言：{speech}",
+                                  self.day_count, EventType.SPEECH, exclude=player.player_id, actor=player.player_id)
 
-    def _vote_phase(self):
+    @_tracked_phase
+    async def _vote_phase(self):
         """投票放逐阶段"""
-        print("\n" + "-"*60)
-        print("投票放逐阶段")
-        print("-"*60)
+        self._banner("投票放逐阶段", level="phase")
 
         alive_players = [p for p in self.players if p.is_alive]
         votes: Dict[int, List[int]] = {p.player_id: [] for p in alive_players}
 
-        # 每个玩家独立秘密投票（不知道别人投了谁）
-        print("\n所有玩家正在秘密投票...")
-        
+        # 每个玩家独立秘密投票（不知道别人投了谁），所有投票请求同时发出
+        self._emit("vote_start", "所有玩家正在秘密投票...", gap=True)
+
+        vote_requests = []
+        votable_by_player: Dict[int, List[Player]] = {}
         for player in alive_players:
             votable_players = [p for p in alive_players if p.player_id != player.player_id]
+            votable_by_player[player.player_id] = votable_players
 
             # 不使用序号，直接列出玩家编号
-            context = {"votable_player_ids": [p.player_id for p in votable_players]}
+            context = {
+                "votable_player_ids": [p.player_id for p in votable_players],
+                "choices": [p.player_id for p in votable_players],
+                "last_speaker": self.last_speaker.player_id if self.last_speaker else None
+            }
             prompt = f"""现在是投票阶段。
 
 ⚠️ 注意：这是秘密投票，你不知道其他玩家投了谁。
@@ -843,8 +1092,13 @@ class WerewolfGame:
 
 请投票放逐一名玩家（直接回答玩家编号）："""
 
-            decision = player.make_decision(prompt, context)
-            target = self._parse_player_id(decision, votable_players)
+            vote_requests.append((player, prompt, context))
+
+        decisions = await self._collect_decisions(vote_requests)
+
+        # 按座位顺序统计，保证结果与输出顺序确定
+        for player, decision in zip(alive_players, decisions):
+            target = self._parse_player_id(decision, votable_by_player[player.player_id])
 
             if target:
                 votes[target.player_id].append(player.player_id)
@@ -854,7 +1108,7 @@ class WerewolfGame:
                 pass
         
         # 所有人投票完毕后，统一公布结果
-        print("\n投票结束，公布结果：")
+        self._emit("vote_reveal", "投票结束，公布结果：", gap=True)
         for player in alive_players:
             # 显示每个人投给了谁
             voted_for = None
@@ -864,12 +1118,14 @@ class WerewolfGame:
                     break
             
             if voted_for:
-                print(f"  玩家{player.player_id} 投票给 玩家{voted_for}")
+                self._emit("vote_cast", f"玩家{player.player_id} 投票给 玩家{voted_for}", indent=1,
+                           player_id=player.player_id, target=voted_for)
             else:
-                print(f"  ⚠️ 玩家{player.player_id} 的投票无效")
+                self._emit("vote_cast", f"⚠️ 玩家{player.player_id} 的投票无效", indent=1,
+                           player_id=player.player_id, target=None)
 
         # 统计票数（考虑警长1.5倍投票权）
-        print("\n投票结果：")
+        self._emit("vote_tally_start", "投票结果：", gap=True)
         vote_counts: Dict[int, float] = {}  # 使用浮点数统计票数
 
         for player_id, voters in votes.items():
@@ -886,37 +1142,113 @@ class WerewolfGame:
                 sheriff_marker = ""
                 if self.sheriff and self.sheriff.player_id in voters:
                     sheriff_marker = " (包含警长1.5票)"
-                print(f"  玩家{player_id}: {total_votes}票{sheriff_marker} (来自 {voters})")
+                self._emit("vote_tally", f"玩家{player_id}: {total_votes}票{sheriff_marker} (来自 {voters})", indent=1,
+                           player_id=player_id, votes=total_votes, voters=voters)
 
         # 找出得票最多的玩家
         max_votes = max(vote_counts.values()) if vote_counts else 0
         if max_votes == 0:
-            print("\n没有人被放逐")
+            self._emit("exile", "没有人被放逐", gap=True, player_id=None)
             return
 
         max_voted_players = [pid for pid, count in vote_counts.items() if count == max_votes]
 
         if len(max_voted_players) > 1:
-            print(f"\n平票！玩家 {max_voted_players} 将进行PK")
+            self._emit("vote_tie", f"平票！玩家 {max_voted_players} 将进行PK", gap=True, players=max_voted_players)
             # 简化处理：随机选一个
-            exiled_id = random.choice(max_voted_players)
+            exiled_id = self.rng.choice(max_voted_players)
         else:
             exiled_id = max_voted_players[0]
 
         exiled_player = next(p for p in self.players if p.player_id == exiled_id)
-        print(f"\n玩家{exiled_id}被放逐")
+        self._emit("exile", f"玩家{exiled_id}被放逐", gap=True, player_id=exiled_id)
 
         exiled_player.die("vote")
         # 遗言规则：白天被投票出局的玩家有遗言
         self.last_words_queue.append(exiled_player)
 
         # 广播
-        for p in self.players:
-            if isinstance(p, AIPlayer) and p.is_alive:
-                p.add_memory(f"第{self.day_count}天：玩家{exiled_id}被投票放逐")
+        self.event_log.public(f"第{self.day_count}天：玩家{exiled_id}被投票放逐", self.day_count, EventType.VOTE)
 
         # 处理遗言和猎人技能
-        self._last_words()
+        await self._last_words()
+
+    async def _stream_speech(self, player: Player, prompt: str, context: Dict) -> str:
+        """
+        获取玩家发言并边生成边输出
+
+        流式响应在线程中读取，等待期间不阻塞同一事件循环上的其他对局。
+
+        Returns:
+            完整的发言文本（去除首尾空白）
+        """
+        if isinstance(player, AIPlayer):
+            # 记忆摘要在事件循环上先完成，线程中读取流式响应时不再调用模型
+            await player.aprepare_memory()
+            return await self.llm_client.arun_scheduled(player.model_id, self._emit_speech_stream,
+                                                        player, prompt, context)
+        # 人类玩家的终端输入在守护线程中等待，Ctrl+C 可以立即中断对局
+        return await run_in_daemon_thread(self._emit_speech_stream, player, prompt, context)
+
+    def _emit_speech_stream(self, player: Player, prompt: str, context: Dict) -> str:
+        """
+        读取玩家的流式发言（阻塞），返回完整文本
+
+        实时显示的输出端逐段收到 speech_delta，所有输出端最后收到带完整发言的 speech_end。
+        """
+        live = self.output.live
+        chunks = []
+        for chunk in player.stream_speech(prompt, context):
+            chunks.append(chunk)
+            if live:
+                self._emit("speech_delta", chunk, player_id=player.player_id)
+
+        speech = "".join(chunks).strip()
+        self._emit("speech_end", speech, player_id=player.player_id)
+        return speech
+
+    async def _collect_decisions(self, requests: List[Tuple[Player, str, Dict]]) -> List[str]:
+        """
+        并发收集多名玩家的决策
+
+        Args:
+            requests: [(玩家, 提示词, 上下文)] 列表，各请求之间互不依赖
+
+        Returns:
+            与requests顺序一致的决策文本列表
+        """
+        return await self._agather_responses(requests, speech=False)
+
+    async def _collect_speeches(self, requests: List[Tuple[Player, str, Dict]]) -> List[str]:
+        """并发收集多名玩家的发言，返回顺序与requests一致"""
+        return await self._agather_responses(requests, speech=True)
+
+    async def _agather_responses(self, requests: List[Tuple[Player, str, Dict]],
+                                 speech: bool) -> List[str]:
+        """
+        同时发出所有AI玩家的请求；人类玩家需要终端输入，按顺序逐个询问
+        """
+        async def ask(player: Player, prompt: str, context: Dict) -> str:
+            if speech:
+                return await player.aget_speech(prompt, context)
+            return await player.amake_decision(prompt, context)
+
+        # AI玩家的请求立即全部发出
+        ai_tasks = {
+            i: asyncio.ensure_future(ask(player, prompt, context))
+            for i, (player, prompt, context) in enumerate(requests)
+            if isinstance(player, AIPlayer)
+        }
+
+        results: List[str] = [""] * len(requests)
+        for i, (player, prompt, context) in enumerate(requests):
+            if i not in ai_tasks:
+                results[i] = await ask(player, prompt, context)
+
+        for i, task in ai_tasks.items():
+            results[i] = await task
+
+        return results
 
     def _check_game_over(self) -> bool:
         """检查游戏是否结束"""
@@ -944,25 +1276,23 @@ class WerewolfGame:
 
         return False
 
-    def _sheriff_election(self):
+    @_tracked_phase
+    async def _sheriff_election(self):
         """警长竞选"""
-        print("\n" + "="*60)
-        print("警长竞选（上警）")
-        print("="*60)
+        self._banner("警长竞选（上警）")
 
         alive_players = [p for p in self.players if p.is_alive]
 
         # 第一阶段：询问所有玩家是否要上警
-        print("\n请决定是否参与警长竞选...")
+        self._emit("sheriff_signup_start", "请决定是否参与警长竞选...", gap=True)
         candidates = []
         
         # 随机打乱玩家顺序，增加随机性
-        import random
         shuffled_players = alive_players.copy()
-        random.shuffle(shuffled_players)
+        self.rng.shuffle(shuffled_players)
 
         for player in shuffled_players:
-            context = {"is_sheriff_election": True}
+            context = {"is_sheriff_election": True, "choices": ["是", "否"]}
             
             # 根据角色给出不同的上警建议
             current_candidates_count = len(candidates)
@@ -1018,7 +1348,7 @@ class WerewolfGame:
 请问你是否要参与警长竞选（上警）？
 请回答：是 或 否"""
 
-            decision = player.make_decision(prompt, context)
+            decision = await player.amake_decision(prompt, context)
 
             # 解析决策
             decision_lower = decision.strip().lower()
@@ -1026,29 +1356,33 @@ class WerewolfGame:
 
             if wants_to_run:
                 candidates.append(player)
-                print(f"  玩家{player.player_id} 选择上警")
+                self._emit("sheriff_signup", f"玩家{player.player_id} 选择上警", indent=1,
+                           player_id=player.player_id, running=True)
             else:
-                print(f"  玩家{player.player_id} 选择不上警")
+                self._emit("sheriff_signup", f"玩家{player.player_id} 选择不上警", indent=1,
+                           player_id=player.player_id, running=False)
 
         if not candidates:
-            print("\n没有玩家选择上警，本局无警长。")
+            self._emit("sheriff_none", "没有玩家选择上警，本局无警长。", gap=True)
             self.sheriff_election_done = True
             return
 
         if len(candidates) == 1:
             self.sheriff = candidates[0]
-            print(f"\n只有玩家{self.sheriff.player_id}上警，自动当选警长！")
+            self._emit("sheriff_unopposed", f"只有玩家{self.sheriff.player_id}上警，自动当选警长！", gap=True,
+                       player_id=self.sheriff.player_id)
             self._announce_sheriff_elected(self.sheriff)
             self.sheriff_election_done = True
             return
 
         # 第二阶段：竞选发言
-        print(f"\n上警玩家：{', '.join([f'玩家{p.player_id}' for p in candidates])}")
-        print("\n竞选发言阶段")
-        print("-"*60)
+        self._emit("sheriff_candidates", f"上警玩家：{', '.join([f'玩家{p.player_id}' for p in candidates])}",
+                   gap=True, candidates=[p.player_id for p in candidates])
+        self._emit("sheriff_campaign_start", "竞选发言阶段\n" + "-"*60, gap=True)
 
         for candidate in candidates:
-            print(f"\n玩家{candidate.player_id}竞选发言：")
+            self._emit("speech_start", f"玩家{candidate.player_id}竞选发言：", gap=True,
+                       player_id=candidate.player_id, campaign=True)
 
             context = {"is_sheriff_campaign": True}
             prompt = f"""你已选择上警竞选警长。现在请发表你的竞选发言。
@@ -1063,23 +1397,20 @@ class WerewolfGame:
 
 请发表竞选发言（100-150字）："""
 
-            speech = candidate.get_speech(prompt, context)
-            print(f"  {speech}")
+            speech = await self._stream_speech(candidate, prompt, context)
 
             # 广播给其他玩家
-            for p in self.players:
-                if isinstance(p, AIPlayer) and p.is_alive and p.player_id != candidate.player_id:
-                    p.add_memory(f"警长竞选：玩家{candidate.player_id}发言：{speech[:80]}")
+            self.event_log.public(f"警长竞选：玩家{candidate.player_id}发言：{speech}",
+                                  self.day_count, EventType.SPEECH, exclude=candidate.player_id,
+                                  actor=candidate.player_id)
 
         # 第2.5阶段：退水环节（发言后、投票前）
-        print("\n" + "-"*60)
-        print("退水环节（候选人可以选择退出竞选）")
-        print("-"*60)
+        self._banner("退水环节（候选人可以选择退出竞选）", level="phase")
 
         withdrawn_candidates = []
 
         for candidate in candidates:
-            context = {"is_withdraw_decision": True}
+            context = {"is_withdraw_decision": True, "choices": ["退水", "不退"]}
             
             # 统计当前退水人数
             withdrawn_count = len(withdrawn_candidates)
@@ -1101,50 +1432,52 @@ class WerewolfGame:
 请问你是否要退水（退出竞选）？
 请回答：退水 或 不退"""
 
-            decision = candidate.make_decision(prompt, context)
+            decision = await candidate.amake_decision(prompt, context)
 
             # 解析决策
             decision_lower = decision.strip().lower()
-            wants_to_withdraw = any(keyword in decision_lower for keyword in ["退水", "退出", "退", "withdraw", "quit"])
+            wants_to_withdraw = "不退" not in decision_lower and any(
+                keyword in decision_lower for keyword in ["退水", "退出", "退", "withdraw", "quit"])
 
             if wants_to_withdraw:
                 withdrawn_candidates.append(candidate)
-                print(f"  玩家{candidate.player_id} 选择退水")
+                self._emit("sheriff_withdraw", f"玩家{candidate.player_id} 选择退水", indent=1,
+                           player_id=candidate.player_id, withdrawn=True)
 
                 # 广播给其他玩家
-                for p in self.players:
-                    if isinstance(p, AIPlayer) and p.is_alive:
-                        p.add_memory(f"警长竞选：玩家{candidate.player_id}退水")
+                self.event_log.public(f"警长竞选：玩家{candidate.player_id}退水", self.day_count, EventType.SHERIFF,
+                                      actor=candidate.player_id)
             else:
-                print(f"  玩家{candidate.player_id} 不退水")
+                self._emit("sheriff_withdraw", f"玩家{candidate.player_id} 不退水", indent=1,
+                           player_id=candidate.player_id, withdrawn=False)
 
         # 更新候选人列表（移除退水的玩家）
         candidates = [c for c in candidates if c not in withdrawn_candidates]
 
         if not candidates:
-            print("\n所有候选人都退水了，本局无警长。")
+            self._emit("sheriff_none", "所有候选人都退水了，本局无警长。", gap=True)
             self.sheriff_election_done = True
             return
 
         if len(candidates) == 1:
             self.sheriff = candidates[0]
-            print(f"\n退水后只剩一名候选人，玩家{self.sheriff.player_id}自动当选警长！")
+            self._emit("sheriff_unopposed", f"退水后只剩一名候选人，玩家{self.sheriff.player_id}自动当选警长！",
+                       gap=True, player_id=self.sheriff.player_id)
             self._announce_sheriff_elected(self.sheriff)
             self.sheriff_election_done = True
             return
 
-        print(f"\n退水后剩余候选人：{', '.join([f'玩家{p.player_id}' for p in candidates])}")
+        self._emit("sheriff_candidates", f"退水后剩余候选人：{', '.join([f'玩家{p.player_id}' for p in candidates])}",
+                   gap=True, candidates=[p.player_id for p in candidates])
 
         # 第三阶段：投票选举
-        print("\n" + "-"*60)
-        print("警长投票阶段")
-        print("-"*60)
+        self._banner("警长投票阶段", level="phase")
 
         non_candidates = [p for p in alive_players if p not in candidates]
 
         if not non_candidates:
             # 所有人都上警，没有警下玩家可以投票 → 警徽流失
-            print(f"\n所有玩家都上警，无警下玩家投票，警徽流失！本局无警长。")
+            self._emit("sheriff_none", "所有玩家都上警，无警下玩家投票，警徽流失！本局无警长。", gap=True)
             self.sheriff = None
             self.sheriff_election_done = True
             return
@@ -1152,10 +1485,13 @@ class WerewolfGame:
         # 未上警的玩家投票
         votes: Dict[int, List[int]] = {p.player_id: [] for p in candidates}
 
-        print("\n未上警的玩家（警下）正在投票...")
+        self._emit("sheriff_vote_start", "未上警的玩家（警下）正在投票...", gap=True)
 
         for voter in non_candidates:
-            context = {"sheriff_candidates": [p.player_id for p in candidates]}
+            context = {
+                "sheriff_candidates": [p.player_id for p in candidates],
+                "choices": [p.player_id for p in candidates]
+            }
             prompt = f"""现在进行警长投票。你是警下玩家（未上警），需要投票选出警长。
 
 候选人：{', '.join([f'玩家{p.player_id}' for p in candidates])}
@@ -1164,17 +1500,18 @@ class WerewolfGame:
 
 请投票给一名候选人（直接回答玩家编号）："""
 
-            decision = voter.make_decision(prompt, context)
+            decision = await voter.amake_decision(prompt, context)
             target = self._parse_player_id(decision, candidates)
 
             if target:
                 votes[target.player_id].append(voter.player_id)
 
         # 统计票数
-        print("\n投票结果：")
+        self._emit("vote_tally_start", "投票结果：", gap=True)
         for candidate in candidates:
             voter_ids = votes[candidate.player_id]
-            print(f"  玩家{candidate.player_id}: {len(voter_ids)}票")
+            self._emit("sheriff_vote_tally", f"玩家{candidate.player_id}: {len(voter_ids)}票", indent=1,
+                       player_id=candidate.player_id, votes=len(voter_ids), voters=voter_ids)
 
         # 找出得票最多的候选人
         max_votes = max(len(votes[c.player_id]) for c in candidates)
@@ -1184,35 +1521,38 @@ class WerewolfGame:
             self.sheriff = winners[0]
         else:
             # 平票，随机选一个
-            self.sheriff = random.choice(winners)
-            print(f"\n警长选举平票，随机选出警长：玩家{self.sheriff.player_id}")
+            self.sheriff = self.rng.choice(winners)
+            self._emit("sheriff_vote_tie", f"警长选举平票，随机选出警长：玩家{self.sheriff.player_id}", gap=True,
+                       players=[c.player_id for c in winners], player_id=self.sheriff.player_id)
 
         self._announce_sheriff_elected(self.sheriff)
         self.sheriff_election_done = True
 
     def _announce_sheriff_elected(self, sheriff: Player):
         """宣布警长当选"""
-        print(f"\n{'='*60}")
-        print(f"🎖️ 玩家{sheriff.player_id} 当选警长！")
-        print(f"{'='*60}")
+        self._banner(f"🎖️ 玩家{sheriff.player_id} 当选警长！", event="sheriff_elected", player_id=sheriff.player_id)
 
-        # 广播给所有AI玩家
-        for p in self.players:
-            if isinstance(p, AIPlayer) and p.is_alive:
-                p.add_memory(f"玩家{sheriff.player_id}当选警长")
+        # 广播
+        self.event_log.public(f"玩家{sheriff.player_id}当选警长", self.day_count, EventType.SHERIFF)
 
-    def _sheriff_pass_badge(self, dead_sheriff: Player):
+    @_tracked_phase
+    async def _sheriff_pass_badge(self, dead_sheriff: Player):
         """警长死亡后传递警徽"""
-        print(f"\n警长玩家{dead_sheriff.player_id}死亡，可以选择将警徽传递给其他玩家...")
+        self._emit("sheriff_badge_pass_start", f"警长玩家{dead_sheriff.player_id}死亡，可以选择将警徽传递给其他玩家...",
+                   gap=True, player_id=dead_sheriff.player_id)
 
         alive_players = [p for p in self.players if p.is_alive]
 
         if not alive_players:
-            print("没有存活玩家可以继承警徽")
+            self._emit("sheriff_badge_lost", "没有存活玩家可以继承警徽", player_id=dead_sheriff.player_id)
             self.sheriff = None
             return
 
-        context = {"is_sheriff_passing": True}
+        context = {
+            "is_sheriff_passing": True,
+            "choices": [p.player_id for p in alive_players],
+            "skip_answer": "不传"
+        }
         prompt = f"""⚠️ 你是警长，你已经死亡。现在你可以选择将警徽传递给一名存活的玩家。
 
 存活的玩家：{', '.join([f'玩家{p.player_id}' for p in alive_players])}
@@ -1224,50 +1564,60 @@ class WerewolfGame:
 
 请选择继承警徽的玩家（直接回答玩家编号，或"不传"）："""
 
-        decision = dead_sheriff.make_decision(prompt, context)
+        decision = await dead_sheriff.amake_decision(prompt, context)
 
         # 解析决策
         decision_lower = decision.strip().lower()
         if any(keyword in decision_lower for keyword in ["不传", "撕掉", "撕毁", "no", "none", "撕"]):
-            print(f"\n警长选择撕毁警徽，本局不再有警长")
+            self._emit("sheriff_badge_lost", "警长选择撕毁警徽，本局不再有警长", gap=True,
+                       player_id=dead_sheriff.player_id)
             self.sheriff = None
 
             # 广播
-            for p in self.players:
-                if isinstance(p, AIPlayer) and p.is_alive:
-                    p.add_memory(f"警长玩家{dead_sheriff.player_id}撕毁警徽")
+            self.event_log.public(f"警长玩家{dead_sheriff.player_id}撕毁警徽", self.day_count, EventType.SHERIFF)
         else:
             target = self._parse_player_id(decision, alive_players)
 
             if target:
                 self.sheriff = target
-                print(f"\n{'='*60}")
-                print(f"🎖️ 警徽传递给玩家{target.player_id}！")
-                print(f"{'='*60}")
+                self._banner(f"🎖️ 警徽传递给玩家{target.player_id}！", event="sheriff_badge_passed",
+                             player_id=dead_sheriff.player_id, target=target.player_id)
 
                 # 广播
-                for p in self.players:
-                    if isinstance(p, AIPlayer) and p.is_alive:
-                        p.add_memory(f"警徽从玩家{dead_sheriff.player_id}传递给玩家{target.player_id}")
+                self.event_log.public(f"警徽从玩家{dead_sheriff.player_id}传递给玩家{target.player_id}",
+                                      self.day_count, EventType.SHERIFF)
             else:
-                print(f"\n警长未做出有效选择，警徽撕毁")
+                self._emit("sheriff_badge_lost", "警长未做出有效选择，警徽撕毁", gap=True,
+                           player_id=dead_sheriff.player_id)
                 self.sheriff = None
 
     def _show_game_result(self):
         """显示游戏结果"""
-        print("\n" + "="*60)
-        print("游戏结束！")
-        print("="*60)
+        if not self._output_enabled:
+            return
+
+        self._banner("游戏结束！")
 
-        if self.winner == Camp.VILLAGER:
-            print("\n好人阵营获胜！")
-        elif self.winner == Camp.WEREWOLF:
-            print("\n狼人阵营获胜！")
+        if self.winner:
+            self._emit("game_over", f"{self.winner.value}获胜！", gap=True, winner=self.winner.value,
+                       days=self.day_count)
 
-        print("\n角色揭示：")
+        self._emit("role_reveal", "角色揭示：", gap=True)
         for player in self.players:
             status = "存活" if player.is_alive else f"死亡({player.death_reason})"
-            print(f"  玩家{player.player_id} - {player.name}: {player.role.get_role_type().value} [{status}]")
+            self._emit("player_result", f"玩家{player.player_id} - {player.name}: "
+                       f"{player.role.get_role_type().value} [{status}]", indent=1,
+                       player_id=player.player_id, role=player.role.get_role_type().value,
+                       alive=player.is_alive, death_reason=player.death_reason)
+
+        self._emit("usage_report", self.llm_client.usage.report(game_id=self.game_id), gap=True,
+                   usage=self.llm_client.usage.summarize(game_id=self.game_id).get("total", {}))
+
+        budget_stats = self.prompt_budgeter.get_stats()
+        if budget_stats["trimmed_calls"]:
+            dropped = "，".join(f"{name} {count}条" for name, count in budget_stats["dropped_items"].items())
+            self._emit("prompt_budget", f"提示词预算：{budget_stats['calls']} 次调用中有 "
+                       f"{budget_stats['trimmed_calls']} 次超出预算，共裁剪 {dropped}", **budget_stats)
 
     def _parse_player_id(self, text: str, valid_players: List[Player]) -> Optional[Player]:
         """从文本中解析玩家ID"""
@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
 from enum import Enum
-from typing import Optional
+from typing import Dict, Optional
 
 
 class Camp(Enum):
@@ -38,6 +38,15 @@ class Role(ABC):
         """获取角色类型"""
         return self.role_type
 
+    def dump_state(self) -> Dict:
+        """导出技能状态（如女巫的药、猎人能否开枪），用于存档"""
+        return {key: value for key, value in vars(self).items() if key not in ("role_type", "camp")}
+
+    def load_state(self, state: Dict):
+        """从存档恢复技能状态"""
+        for key, value in state.items():
+            setattr(self, key, value)
+
     def __str__(self):
         return self.role_type.value
 
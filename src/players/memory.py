@@ -0,0 +1,292 @@
+import heapq
+import re
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
+from src.game.event_log import EventType, GameEvent, Visibility
+from src.players.memory_summary import CLAIM_KEYWORDS, MemorySummarizer, RuleBasedSummarizer
+
+
+# 各类记忆的保留条数：死亡、投票、查验、身份声明等关键信息保留更久，普通发言和讨论保留较少
+DEFAULT_RETENTION: Dict[str, int] = {
+    EventType.DEATH.value: 12,
+    EventType.VOTE.value: 12,
+    EventType.SEER_CHECK.value: 12,
+    EventType.WITCH_ACTION.value: 4,
+    EventType.WOLF_KILL.value: 6,
+    EventType.SHERIFF.value: 6,
+    "claim": 8,
+    EventType.LAST_WORDS.value: 4,
+    EventType.SPEECH.value: 10,
+    EventType.WOLF_TACTICS.value: 6,
+    EventType.NOTE.value: 10
+}
+
+# 检索打分：各类记录的基础权重（身份声明、查验、投票等关键信息优先，普通发言最低）
+RELEVANCE_WEIGHTS: Dict[str, float] = {
+    EventType.SEER_CHECK.value: 3.0,
+    "claim": 2.5,
+    EventType.VOTE.value: 2.0,
+    EventType.DEATH.value: 2.0,
+    EventType.WITCH_ACTION.value: 2.0,
+    EventType.WOLF_KILL.value: 2.0,
+    EventType.NOTE.value: 1.5,
+    EventType.SHERIFF.value: 1.0,
+    EventType.LAST_WORDS.value: 1.0,
+    EventType.WOLF_TACTICS.value: 1.0,
+    EventType.SPEECH.value: 0.5
+}
+FOCUS_PLAYER_WEIGHT = 2.0   # 每提到一个当前决策涉及的玩家
+CLAIM_KEYWORD_WEIGHT = 1.0  # 每个身份声明关键词
+RECENCY_WEIGHT = 1.0        # 最新的记录加满分，最旧的为0
+
+
+class MemoryIndex:
+    """
+    记忆的倒排索引：玩家编号 / 身份声明关键词 → 记录序号
+
+    随记录的加入和淘汰增量更新，检索时不需要逐条扫描文本。
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Set[int]] = {}
+        self._terms: Dict[int, Tuple[str, ...]] = {}
+
+    @staticmethod
+    def terms_of(event: GameEvent) -> Tuple[str, ...]:
+        """提取记录的索引词：涉及的玩家（p:编号）和身份声明关键词（kw:关键词）"""
+        player_ids = set(re.findall(r"玩家(\d+)", event.text))
+        if event.actor is not None:
+            player_ids.add(str(event.actor))
+        terms = [f"p:{player_id}" for player_id in player_ids]
+        terms.extend(f"kw:{keyword}" for keyword in CLAIM_KEYWORDS if keyword in event.text)
+        return tuple(terms)
+
+    def add(self, order: int, event: GameEvent):
+        terms = self.terms_of(event)
+        self._terms[order] = terms
+        for term in terms:
+            self._postings.setdefault(term, set()).add(order)
+
+    def remove(self, order: int):
+        for term in self._terms.pop(order, ()):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.discard(order)
+                if not postings:
+                    del self._postings[term]
+
+    def lookup(self, term: str) -> Set[int]:
+        return self._postings.get(term, set())
+
+
+class PlayerMemory:
+    """
+    AI玩家的记忆：按事件类型分别存放在定长环形缓冲区中
+
+    每种类型只保留最近的若干条（见 DEFAULT_RETENTION），超出后自动丢弃最旧的记录，
+    长对局和多对局进程中每个玩家的记忆大小有上限。记录直接引用事件日志中的事件对象，不复制文本。
+
+    进入新的一天时，更早的记录移出缓冲区、等待折叠进滚动摘要（只处理新增部分），提示词长度不随天数增长。
+    add() 只做内存操作；摘要由调用方在构建提示词之前通过 afold()（事件循环上）或 fold() 生成，
+    调用模型的摘要器不会在组装提示词时阻塞。
+    """
+
+    def __init__(self, retention: Optional[Dict[str, int]] = None, default_retention: int = 10,
+                 summarizer: Optional[MemorySummarizer] = None, keep_days: int = 1):
+        """
+        Args:
+            retention: 按类型覆盖保留条数，格式为 {类型: 条数}
+            default_retention: 未配置类型的保留条数
+            summarizer: 摘要器（默认使用规则摘要）
+            keep_days: 保留原文的天数（更早的记录折叠进摘要）
+        """
+        self.retention = dict(DEFAULT_RETENTION)
+        if retention:
+            self.retention.update(retention)
+        self.default_retention = default_retention
+        self._buffers: Dict[str, Deque[Tuple[int, GameEvent]]] = {}
+        self._next_order = 0  # 记录加入顺序，用于合并各类型的记录
+        self._live: Dict[int, Tuple[str, GameEvent]] = {}  # {序号: (类型, 记录)}，当前保留的记录
+        self.index = MemoryIndex()
+
+        self.summarizer = summarizer or RuleBasedSummarizer()
+        self.keep_days = keep_days
+        self.summary = ""  # 已折叠记录的摘要
+        self._pending_fold: List[GameEvent] = []  # 已移出缓冲区、尚未写入摘要的记录
+        # 缓冲区已满时被挤出的记录，到天数边界时与当天的其他记录一起折叠（摘要在一天内保持不变）
+        self._overflow: List[Tuple[int, GameEvent]] = []
+        self.current_day = 0
+
+    @staticmethod
+    def kind_of(event: GameEvent) -> str:
+        """记录的保留类型（包含身份声明的发言单独归类）"""
+        if event.event_type in (EventType.SPEECH, EventType.LAST_WORDS) and \
+                any(keyword in event.text for keyword in CLAIM_KEYWORDS):
+            return "claim"
+        return event.event_type.value
+
+    def add(self, event: GameEvent):
+        """添加一条记录（进入新的一天时先把更早的记录移出缓冲区，等待折叠）"""
+        if event.day > self.current_day:
+            self.current_day = event.day
+            self._evict_days(self.current_day - self.keep_days + 1)
+
+        kind = self.kind_of(event)
+        buffer = self._buffers.get(kind)
+        if buffer is None:
+            buffer = deque(maxlen=self.retention.get(kind, self.default_retention))
+            self._buffers[kind] = buffer
+        if buffer.maxlen is not None and len(buffer) == buffer.maxlen and buffer:
+            # 环形缓冲区即将淘汰最旧的一条：不再参与检索，但保留到折叠时写入摘要
+            self._overflow.append(buffer[0])
+            self._forget(buffer[0][0])
+
+        order = self._next_order
+        self._next_order += 1
+        buffer.append((order, event))
+        self._live[order] = (kind, event)
+        self.index.add(order, event)
+
+    def _forget(self, order: int):
+        """从检索结构中移除一条记录"""
+        self._live.pop(order, None)
+        self.index.remove(order)
+
+    def note(self, text: str, player_id: Optional[int] = None):
+        """添加一条不经过事件日志的私有记录（记在当前这一天）"""
+        self.add(GameEvent(-1, self.current_day, EventType.NOTE, text, Visibility.PLAYER, player_id=player_id))
+
+    def _evict_days(self, before_day: int):
+        """把 before_day 之前的记录（包括缓冲区已满时被挤出的）按加入顺序移到待折叠列表"""
+        folded = [(order, event) for order, event in self._overflow if event.day < before_day]
+        self._overflow = [(order, event) for order, event in self._overflow if event.day >= before_day]
+
+        for kind, buffer in self._buffers.items():
+            if all(event.day >= before_day for _, event in buffer):
+                continue
+            kept = []
+            for order, event in buffer:
+                if event.day >= before_day:
+                    kept.append((order, event))
+                else:
+                    self._forget(order)
+                    folded.append((order, event))
+            self._buffers[kind] = deque(kept, maxlen=buffer.maxlen)
+
+        folded.sort(key=lambda item: item[0])
+        self._pending_fold.extend(event for _, event in folded)
+
+    @property
+    def fold_pending(self) -> bool:
+        """是否有等待折叠进摘要的记录"""
+        return bool(self._pending_fold)
+
+    def fold(self):
+        """把待折叠的记录写入摘要（同步，不在事件循环上使用）"""
+        if not self._pending_fold:
+            return
+        folded, self._pending_fold = self._pending_fold, []
+        self.summary = self.summarizer.summarize(self.summary, folded)
+
+    async def afold(self):
+        """把待折叠的记录写入摘要（异步，等待摘要期间不阻塞事件循环）"""
+        if not self._pending_fold:
+            return
+        # 先取出待折叠的记录，等待期间新加入的记录留到下一次折叠
+        folded, self._pending_fold = self._pending_fold, []
+        self.summary = await self.summarizer.asummarize(self.summary, folded)
+
+    def records(self, kind: Optional[str] = None) -> List[GameEvent]:
+        """按加入顺序返回保留的记录（可只取某一类型）"""
+        if kind is not None:
+            return [event for _, event in self._buffers.get(kind, ())]
+        return [event for _, event in heapq.merge(*self._buffers.values(), key=lambda item: item[0])]
+
+    def retrieve(self, focus_players: Iterable[int] = (), limit: int = 12) -> List[GameEvent]:
+        """
+        按与当前决策的相关度检索记录
+
+        打分 = 类型基础权重 + 提到的决策相关玩家数 × FOCUS_PLAYER_WEIGHT
+              + 身份声明关键词数 × CLAIM_KEYWORD_WEIGHT + 新近程度 × RECENCY_WEIGHT
+
+        Args:
+            focus_players: 当前决策涉及的玩家编号（候选目标、刀口等）
+            limit: 最多返回的记录数
+
+        Returns:
+            得分最高的记录（按加入顺序排列）
+        """
+        if not self._live:
+            return []
+
+        orders = sorted(self._live)
+        oldest, span = orders[0], max(1, orders[-1] - orders[0])
+        scores = {
+            order: RELEVANCE_WEIGHTS.get(kind, 1.0) + RECENCY_WEIGHT * (order - oldest) / span
+            for order, (kind, _) in self._live.items()
+        }
+        for player_id in set(focus_players):
+            for order in self.index.lookup(f"p:{player_id}"):
+                scores[order] += FOCUS_PLAYER_WEIGHT
+        for keyword in CLAIM_KEYWORDS:
+            for order in self.index.lookup(f"kw:{keyword}"):
+                scores[order] += CLAIM_KEYWORD_WEIGHT
+
+        top = heapq.nlargest(limit, scores, key=lambda order: (scores[order], order))
+        return [self._live[order][1] for order in sorted(top)]
+
+    def dump_state(self) -> Dict:
+        """
+        导出记忆状态（用于存档）
+
+        来自事件日志的记录只保存事件序号，私有记录（note）保存完整内容。
+        """
+        def ref(event: GameEvent):
+            return event.seq if event.seq >= 0 else event.to_dict()
+
+        return {
+            "summary": self.summary,
+            "pending_fold": [ref(event) for event in self._pending_fold],
+            "overflow": [[order, ref(event)] for order, event in self._overflow],
+            "current_day": self.current_day,
+            "next_order": self._next_order,
+            "buffers": {
+                kind: [[order, ref(event)] for order, event in buffer]
+                for kind, buffer in self._buffers.items()
+            }
+        }
+
+    def load_state(self, state: Dict, events: List[GameEvent]):
+        """
+        从存档恢复记忆状态（检索索引随记录重建）
+
+        Args:
+            state: dump_state 的结果
+            events: 已恢复的事件日志中的事件（按序号排列）
+        """
+        self._buffers = {}
+        self._live = {}
+        self.index = MemoryIndex()
+        self.summary = state["summary"]
+        def resolve(ref) -> GameEvent:
+            return events[ref] if isinstance(ref, int) else GameEvent.from_dict(ref)
+
+        self._pending_fold = [resolve(ref) for ref in state.get("pending_fold", [])]
+        self._overflow = [(order, resolve(ref)) for order, ref in state.get("overflow", [])]
+        self.current_day = state["current_day"]
+        self._next_order = state["next_order"]
+
+        for kind, entries in state["buffers"].items():
+            buffer = deque(maxlen=self.retention.get(kind, self.default_retention))
+            for order, ref in entries:
+                event = resolve(ref)
+                buffer.append((order, event))
+                self._live[order] = (kind, event)
+                self.index.add(order, event)
+            self._buffers[kind] = buffer
+
+    def __len__(self):
+        return sum(len(buffer) for buffer in self._buffers.values())
+
+    def __bool__(self):
+        return bool(self.summary) or bool(self._pending_fold) or bool(self._overflow) or any(self._buffers.values())
@@ -0,0 +1,180 @@
+import re
+import threading
+from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Tuple
+from src.game.event_log import EventType, GameEvent
+from src.utils.llm_client import LLMClient
+
+
+# 身份声明和查验相关的关键词（包含这些词的句子会保留到摘要中）
+CLAIM_KEYWORDS = ("我是预言家", "我是女巫", "我是猎人", "金水", "查杀", "银水", "跳预言家", "悍跳")
+
+# 原样保留到摘要中的事件类型（本身就很短的关键事实）
+_FACT_TYPES = (EventType.DEATH, EventType.VOTE, EventType.SHERIFF, EventType.SEER_CHECK,
+               EventType.WITCH_ACTION, EventType.WOLF_KILL, EventType.NOTE)
+
+
+class MemorySummarizer(ABC):
+    """
+    记忆摘要器：把较早的事件折叠进摘要，每次只处理新增的事件
+
+    对局在事件循环上运行时使用 asummarize，需要调用模型的摘要器在等待期间不阻塞其他请求和对局。
+    """
+
+    @abstractmethod
+    def summarize(self, summary: str, events: List[GameEvent]) -> str:
+        """
+        用新事件更新摘要
+
+        Args:
+            summary: 当前摘要（可能为空）
+            events: 需要折叠的新事件（按时间顺序）
+
+        Returns:
+            更新后的摘要
+        """
+        pass
+
+    async def asummarize(self, summary: str, events: List[GameEvent]) -> str:
+        """异步更新摘要（默认直接调用 summarize，适用于不做I/O的摘要器）"""
+        return self.summarize(summary, events)
+
+
+class RuleBasedSummarizer(MemorySummarizer):
+    """
+    基于规则的摘要（不调用模型）
+
+    死亡、投票、警长、查验、用药等关键事实原样保留；发言只保留身份声明句，
+    其余发言压缩为"被点名次数"；狼队战术讨论不进入摘要。
+    """
+
+    def summarize(self, summary: str, events: List[GameEvent]) -> str:
+        lines = [summary] if summary else []
+        days: Dict[int, List[GameEvent]] = {}
+        for event in events:
+            days.setdefault(event.day, []).append(event)
+
+        for day in sorted(days):
+            facts = self._digest_day(day, days[day])
+            if facts:
+                lines.append(f"第{day}天：" + "；".join(facts))
+
+        return "\n".join(lines)
+
+    @staticmethod
+    def _digest_day(day: int, events: List[GameEvent]) -> List[str]:
+        """把一天的事件压缩为若干条事实"""
+        facts = []
+        mentions: Counter = Counter()
+        for event in events:
+            if event.event_type in _FACT_TYPES:
+                # 摘要按天分行，去掉事实开头重复的"第N天："
+                facts.append(re.sub(rf"^第{day}天(白天)?：", "", event.text))
+            elif event.event_type in (EventType.SPEECH, EventType.LAST_WORDS):
+                claims = [sentence for sentence in re.split(r"[。！？!?\n]", event.text)
+                          if any(keyword in sentence for keyword in CLAIM_KEYWORDS)]
+                speaker = f"玩家{event.actor}" if event.actor is not None else "有人"
+                for claim in claims:
+                    facts.append(f"{speaker}声明：{claim.strip()}")
+                for player_id in set(re.findall(r"玩家(\d+)", event.text.split("：", 1)[-1])):
+                    if event.actor is None or int(player_id) != event.actor:
+                        mentions[int(player_id)] += 1
+
+        if mentions:
+            ranked = "、".join(f"玩家{player_id}×{count}" for player_id, count in mentions.most_common(4))
+            facts.append(f"发言中被点名：{ranked}")
+        return facts
+
+
+class LLMSummarizer(MemorySummarizer):
+    """
+    使用廉价模型生成摘要
+
+    每次只发送旧摘要和新增事件；多个玩家看到的事件相同时（如村民之间）共用同一份结果
+    （只保留最近 cache_size 份，按最近使用淘汰）。调用失败时退回规则摘要。异步接口通过 ainvoke_model 调用，与其他请求一样经过调度名额和限流器。
+    """
+
+    DEFAULT_MODEL = "us.anthropic.claude-haiku-4-5-20251001-v1:0"
+    DEFAULT_CACHE_SIZE = 256
+
+    def __init__(self, llm_client: LLMClient, model_id: Optional[str] = None, max_tokens: int = 400,
+                 cache_size: int = DEFAULT_CACHE_SIZE):
+        self.llm_client = llm_client
+        self.model_id = model_id or self.DEFAULT_MODEL
+        self.max_tokens = max_tokens
+        self.cache_size = cache_size
+        self._fallback = RuleBasedSummarizer()
+        self._cache: "OrderedDict[Tuple[str, Tuple[str, ...]], str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def summarize(self, summary: str, events: List[GameEvent]) -> str:
+        if not events:
+            return summary
+
+        key = self._cache_key(summary, events)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+
+        result = self.llm_client.invoke_model(**self._request(summary, events))
+        return self._store(key, result, summary, events)
+
+    async def asummarize(self, summary: str, events: List[GameEvent]) -> str:
+        if not events:
+            return summary
+
+        key = self._cache_key(summary, events)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+
+        result = await self.llm_client.ainvoke_model(**self._request(summary, events))
+        return self._store(key, result, summary, events)
+
+    @staticmethod
+    def _cache_key(summary: str, events: List[GameEvent]) -> Tuple[str, Tuple[str, ...]]:
+        return summary, tuple(event.text for event in events)
+
+    def _cached(self, key: Tuple[str, Tuple[str, ...]]) -> Optional[str]:
+        """读取已有的摘要结果，未命中返回None"""
+        with self._lock:
+            if key not in self._cache:
+                return None
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+    def _request(self, summary: str, events: List[GameEvent]) -> Dict:
+        """构建摘要请求的调用参数"""
+        prompt = f"""以下是一局狼人杀的已有摘要和新发生的事件。请把新事件合并进摘要。
+要求：保留所有死亡、投票、警长、查验和身份声明（谁声称什么身份、给谁发了金水/查杀）；
+普通发言只保留立场（谁怀疑谁）；按天分行，总长度不超过300字，只输出摘要本身。
+
+已有摘要：
+{summary or "（无）"}
+
+新事件：
+{chr(10).join(f"- {event.text}" for event in events)}"""
+
+        return {
+            "model_id": self.model_id,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": self.max_tokens,
+            "temperature": 0.0,
+            "fallback_models": [],
+            "call_tags": {"purpose": "memory_summary"}
+        }
+
+    def _store(self, key: Tuple[str, Tuple[str, ...]], result: str, summary: str,
+               events: List[GameEvent]) -> str:
+        """保存摘要结果（调用失败时退回规则摘要）"""
+        result = result.strip()
+        if not result:
+            result = self._fallback.summarize(summary, events)
+
+        with self._lock:
+            self._cache[key] = result
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
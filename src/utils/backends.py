@@ -0,0 +1,304 @@
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, List, Optional
+
+
+class ThrottlingError(Exception):
+    """非AWS后端使用的限流异常"""
+    pass
+
+
+class LLMBackend(ABC):
+    """
+    LLM后端接口
+
+    LLMClient负责重试、限流、降级、缓存和用量统计，后端只负责发出单次请求。
+    请求体和响应体都使用Anthropic Messages API的格式。
+    """
+
+    # 是否需要客户端限流（有配额的远程服务需要，本地假后端不需要）
+    rate_limited = True
+    # 是否按模型价格计费（不访问网络的假后端和回放后端为False，其调用记录为模拟调用，费用记为0）
+    billable = True
+
+    @abstractmethod
+    def invoke(self, model_id: str, request_body: Dict) -> Dict:
+        """
+        发出一次非流式请求
+
+        Returns:
+            响应体（包含 content 和 usage）
+        """
+        pass
+
+    @abstractmethod
+    def invoke_stream(self, model_id: str, request_body: Dict) -> Iterator[Dict]:
+        """
+        发出一次流式请求
+
+        Returns:
+            事件迭代器（message_start、content_block_delta、message_delta等）
+        """
+        pass
+
+    def is_throttling_error(self, error: Exception) -> bool:
+        """判断是否是限流/过载错误"""
+        return isinstance(error, ThrottlingError)
+
+    def is_fatal_error(self, error: Exception) -> bool:
+        """判断是否是不应重试或降级、需要直接抛给调用方的错误（如回放分歧）"""
+        return False
+
+
+class BedrockBackend(LLMBackend):
+    """AWS Bedrock后端（bedrock-runtime）"""
+
+    # 表示被限流或服务过载的错误码
+    THROTTLING_ERROR_CODES = {
+        "ThrottlingException",
+        "TooManyRequestsException",
+        "ServiceUnavailableException",
+        "ModelNotReadyException"
+    }
+
+    def __init__(self, max_pool_connections: int = 16, region_name: str = "us-west-2",
+                 endpoint_url: Optional[str] = None):
+        """
+        Args:
+            max_pool_connections: 连接池大小（与LLMClient的线程池一致）
+            region_name: AWS区域
+            endpoint_url: 自定义服务地址（如本地模拟服务），None表示使用AWS默认地址
+        """
+        # 延迟导入，使用其他后端时不需要安装boto3
+        import boto3
+        from botocore.config import Config
+        from botocore.exceptions import ClientError
+
+        self._client_error = ClientError
+
+        # 配置超时和重试
+        # 限流和重试由客户端的自适应限流器统一处理，关闭boto3自带的重试，避免重试叠加
+        config = Config(
+            read_timeout=120,  # 读取超时120秒
+            connect_timeout=10,  # 连接超时10秒
+            max_pool_connections=max_pool_connections,
+            retries={
+                'total_max_attempts': 1,  # 只发一次，失败交给LLMClient处理
+                'mode': 'standard'
+            }
+        )
+
+        self.client = boto3.client(
+            service_name="bedrock-runtime",
+            region_name=region_name,
+            endpoint_url=endpoint_url,
+            config=config
+        )
+
+    def invoke(self, model_id: str, request_body: Dict) -> Dict:
+        response = self.client.invoke_model(
+            modelId=model_id,
+            body=json.dumps(request_body)
+        )
+        return json.loads(response['body'].read())
+
+    def invoke_stream(self, model_id: str, request_body: Dict) -> Iterator[Dict]:
+        response = self.client.invoke_model_with_response_stream(
+            modelId=model_id,
+            body=json.dumps(request_body)
+        )
+        for event in response['body']:
+            chunk = event.get("chunk")
+            if chunk:
+                yield json.loads(chunk["bytes"])
+
+    def is_throttling_error(self, error: Exception) -> bool:
+        if isinstance(error, self._client_error):
+            return error.response.get("Error", {}).get("Code") in self.THROTTLING_ERROR_CODES
+        return False
+
+
+class FakeBackend(LLMBackend):
+    """
+    确定性的本地假后端（不访问网络，默认零延迟）
+
+    根据提示词里的问题生成格式正确的回答：从列出的玩家中选目标、回答是/否、
+    生成带玩家编号的发言。随机数由种子和请求内容共同决定，
+    同一请求总是得到同一回答，与并发顺序无关，适合性能分析、CI和大规模规则模拟。
+    """
+
+    SPEECH_TEMPLATES = [
+        "我是好人，昨晚没有信息。我觉得玩家{target}刚才的发言有点划水，今天可以重点听一下他的解释。",
+        "我这边先表个态：玩家{target}的逻辑前后矛盾，我倾向于把票投给他，其他人有不同意见可以说。",
+        "信息太少，我不想乱踩。从站边来看玩家{target}比较可疑，先挂着，听完后置位再决定。",
+        "我认为玩家{target}是好人，他的发言很真诚。真正的狼可能藏在一直不表态的人里。",
+        "过。我暂时跟预言家走，今天出玩家{target}。"
+    ]
+
+    rate_limited = False
+    billable = False
+
+    def __init__(self, seed: int = 0, latency: float = 0.0, chars_per_token: float = 2.0):
+        """
+        Args:
+            seed: 随机种子
+            latency: 每次请求的固定延迟（秒），用于模拟网络耗时
+            chars_per_token: 估算token数时每个token对应的字符数
+        """
+        self.seed = seed
+        self.latency = latency
+        self.chars_per_token = chars_per_token
+        self.calls = 0  # 调用次数（请求在LLMClient的线程池中并发执行，计数需要加锁）
+        self._lock = threading.Lock()
+
+    def invoke(self, model_id: str, request_body: Dict) -> Dict:
+        text = self._respond(model_id, request_body)
+        if self.latency:
+            time.sleep(self.latency)
+
+        if request_body.get("tools"):
+            # 结构化输出：按问题中列出的合法选项返回工具调用
+            tool = request_body["tools"][0]
+            tool_input = self._tool_input(self._last_user_text(request_body), text,
+                                          self._rng_for(model_id, request_body))
+            return {
+                "type": "message",
+                "role": "assistant",
+                "model": model_id,
+                "content": [{"type": "tool_use", "id": "toolu_fake", "name": tool["name"], "input": tool_input}],
+                "stop_reason": "tool_use",
+                "usage": self._usage(request_body, json.dumps(tool_input, ensure_ascii=False))
+            }
+
+        return {
+            "type": "message",
+            "role": "assistant",
+            "model": model_id,
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "usage": self._usage(request_body, text)
+        }
+
+    def invoke_stream(self, model_id: str, request_body: Dict) -> Iterator[Dict]:
+        text = self._respond(model_id, request_body)
+        usage = self._usage(request_body, text)
+        if self.latency:
+            time.sleep(self.latency)
+
+        yield {"type": "message_start", "message": {"model": model_id, "usage": {
+            "input_tokens": usage["input_tokens"], "output_tokens": 0}}}
+        yield {"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}}
+        for i in range(0, len(text), 8):
+            yield {"type": "content_block_delta", "index": 0,
+                   "delta": {"type": "text_delta", "text": text[i:i + 8]}}
+        yield {"type": "content_block_stop", "index": 0}
+        yield {"type": "message_delta", "delta": {"stop_reason": "end_turn"},
+               "usage": {"output_tokens": usage["output_tokens"]}}
+        yield {"type": "message_stop"}
+
+    def _respond(self, model_id: str, request_body: Dict) -> str:
+        """根据提示词生成回答"""
+        with self._lock:
+            self.calls += 1
+        prompt = self._last_user_text(request_body)
+        rng = self._rng_for(model_id, request_body)
+
+        own_id = self._own_player_id(prompt)
+        task = prompt.split("当前情况：")[-1]
+        candidates = [pid for pid in self._candidate_ids(task) if pid != own_id]
+        target = rng.choice(candidates) if candidates else (own_id or 1)
+
+        if "请发言" in task or "遗言" in task:
+            return rng.choice(self.SPEECH_TEMPLATES).format(target=target)
+        if "是 或 否" in task:
+            return rng.choice(["是", "否"])
+        if "退水 或 不退" in task:
+            return "退水" if rng.random() < 0.2 else "不退"
+        if "回答：否" in task and rng.random() < 0.7:
+            return "否"
+        if "不传" in task and rng.random() < 0.2:
+            return "不传"
+        if "战术" in task and "目标" in task:
+            return f"战术：先刀发言好的玩家。目标：{target}"
+        return f"{target}"
+
+    @staticmethod
+    def _tool_input(prompt: str, text: str, rng: random.Random) -> Dict:
+        """
+        把文本回答转换为决策工具的参数
+
+        合法选项取自问题末尾的"合法的玩家编号（填入 target）：3、5"或"合法的回答（填入 answer）：是、否"，
+        回答不在其中时随机选一个合法值
+        """
+        match = re.search(r"合法的\S+（填入 (target|answer)）：(.+)", prompt)
+        field, options = ("answer", []) if match is None else (match.group(1), match.group(2).split("、"))
+        if field == "target":
+            options = [int(option) for option in options if option.isdigit()]
+            if "target 填 null" in prompt:
+                options.append(None)
+
+        value = text
+        if text.isdigit():
+            value = int(text)
+        elif None in options and text in ("否", "不传"):
+            value = None
+        if value not in options:
+            value = rng.choice([option for option in options if option is not None] or [None])
+
+        tool_input = {"target": None, "answer": None, "reason": "根据目前的发言和票型做出的判断。"}
+        tool_input[field] = value
+        return tool_input
+
+    def _usage(self, request_body: Dict, text: str) -> Dict[str, int]:
+        """按字符数估算token用量"""
+        input_chars = len(json.dumps(request_body.get("system", ""), ensure_ascii=False))
+        input_chars += len(json.dumps(request_body.get("messages", []), ensure_ascii=False))
+        return {
+            "input_tokens": int(input_chars / self.chars_per_token),
+            "output_tokens": max(1, int(len(text) / self.chars_per_token))
+        }
+
+    def _rng_for(self, model_id: str, request_body: Dict) -> random.Random:
+        """由种子和请求内容决定的随机数生成器"""
+        payload = json.dumps([self.seed, model_id, request_body], ensure_ascii=False, sort_keys=True)
+        digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+        return random.Random(int(digest[:16], 16))
+
+    @staticmethod
+    def _last_user_text(request_body: Dict) -> str:
+        """取最后一条用户消息的文本"""
+        messages = request_body.get("messages") or [{}]
+        content = messages[-1].get("content", "")
+        if isinstance(content, list):
+            return "".join(block.get("text", "") for block in content if isinstance(block, dict))
+        return content
+
+    @staticmethod
+    def _own_player_id(prompt: str) -> Optional[int]:
+        """从身份信息中取自己的玩家编号"""
+        match = re.search(r"玩家编号：(\d+)", prompt)
+        return int(match.group(1)) if match else None
+
+    @staticmethod
+    def _candidate_ids(task: str) -> List[int]:
+        """
+        从问题中提取可选的玩家编号
+
+        优先使用逐行列出的玩家（"  玩家3 - 名称"、"1. 玩家3"），
+        其次是"可以投票的玩家编号"和"候选人"，最后是问题中提到的所有玩家
+        """
+        listed = re.findall(r"^\s*(?:\d+\.\s*)?玩家(\d+)(?:\s+-|\s*$)", task, re.MULTILINE)
+        if listed:
+            return sorted({int(pid) for pid in listed})
+
+        for marker in ("可以投票的玩家编号：", "候选人："):
+            for line in task.splitlines():
+                if marker in line:
+                    return sorted({int(pid) for pid in re.findall(r"\d+", line.split(marker, 1)[1])})
+
+        return sorted({int(pid) for pid in re.findall(r"玩家(\d+)", task)})
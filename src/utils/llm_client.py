@@ -1,12 +1,30 @@
-import boto3
+import asyncio
+import contextvars
 import json
+import random
+import threading
 import time
-from typing import Dict, List, Optional
-from botocore.config import Config
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional
+from src.utils.backends import BedrockBackend, LLMBackend
+from src.utils.rate_limiter import ModelRateLimiter
+from src.utils.response_cache import ResponseCache
+from src.utils.scheduler import FairScheduler
+from src.utils.usage_tracker import CallRecord, UsageTracker, call_context, current_call_context
+
+
+@asynccontextmanager
+async def _no_slot() -> AsyncIterator[None]:
+    """未配置调度器时的空名额"""
+    yield
 
 
 class LLMClient:
-    """LLM客户端，用于调用AWS Bedrock模型"""
+    """LLM客户端，用于调用AWS Bedrock模型（后端可替换）"""
 
     # 可用的模型列表（已移除DeepSeek和Claude 3.5 Sonnet不可用的模型）
     AVAILABLE_MODELS = [
@@ -31,48 +49,471 @@ class LLMClient:
         "村民3": "us.anthropic.claude-opus-4-20250514-v1:0"
     }
 
-    def __init__(self):
-        """初始化Bedrock客户端"""
-        # 配置超时和重试
-        config = Config(
-            read_timeout=120,  # 读取超时120秒
-            connect_timeout=10,  # 连接超时10秒
-            retries={
-                'max_attempts': 3,  # 最大重试次数
-                'mode': 'adaptive'  # 自适应重试模式
-            }
-        )
+    # 各模型的默认降级链：主模型多次失败后依次尝试的模型
+    DEFAULT_FALLBACK_CHAINS = {
+        "us.anthropic.claude-opus-4-1-20250805-v1:0": [
+            "us.anthropic.claude-sonnet-4-5-20250929-v1:0",
+            "us.anthropic.claude-haiku-4-5-20251001-v1:0"
+        ],
+        "us.anthropic.claude-opus-4-20250514-v1:0": [
+            "us.anthropic.claude-sonnet-4-5-20250929-v1:0",
+            "us.anthropic.claude-haiku-4-5-20251001-v1:0"
+        ],
+        "us.anthropic.claude-sonnet-4-5-20250929-v1:0": [
+            "us.anthropic.claude-sonnet-4-20250514-v1:0",
+            "us.anthropic.claude-haiku-4-5-20251001-v1:0"
+        ],
+        "us.anthropic.claude-sonnet-4-20250514-v1:0": [
+            "us.anthropic.claude-sonnet-4-5-20250929-v1:0",
+            "us.anthropic.claude-haiku-4-5-20251001-v1:0"
+        ],
+        "us.anthropic.claude-3-7-sonnet-20250219-v1:0": [
+            "us.anthropic.claude-sonnet-4-5-20250929-v1:0",
+            "us.anthropic.claude-haiku-4-5-20251001-v1:0"
+        ],
+        "us.anthropic.claude-haiku-4-5-20251001-v1:0": [
+            "us.anthropic.claude-sonnet-4-5-20250929-v1:0"
+        ]
+    }
 
-        self.client = boto3.client(
-            service_name="bedrock-runtime",
-            region_name="us-west-2",
-            config=config
-        )
+    # 对冲请求：样本不足时的等待时间（秒），以及开始使用p95所需的最少样本数
+    DEFAULT_HEDGE_DELAY = 30.0
+    HEDGE_MIN_SAMPLES = 10
+
+    # 每个模型的初始并发上限（Bedrock的配额按模型分别计算，运行中按AIMD自动调整）
+    DEFAULT_MODEL_CONCURRENCY = 4
+
+    # 个别模型的初始并发上限（Opus配额较低）
+    MODEL_CONCURRENCY_LIMITS = {
+        "us.anthropic.claude-opus-4-1-20250805-v1:0": 2,
+        "us.anthropic.claude-opus-4-20250514-v1:0": 2
+    }
+
+    # 每个模型的初始请求速率（个/秒），运行中按AIMD自动调整
+    DEFAULT_REQUESTS_PER_SECOND = 2.0
+
+    # 提示词缓存断点（Bedrock的Anthropic模型支持ephemeral缓存，5分钟内命中）
+    CACHE_CONTROL = {"type": "ephemeral"}
+
+    def __init__(self, max_workers: int = 16, model_concurrency: Optional[Dict[str, int]] = None,
+                 enable_prompt_cache: bool = True, response_cache: Optional[ResponseCache] = None,
+                 role_fallback_chains: Optional[Dict[str, List[str]]] = None,
+                 enable_hedging: bool = False, usage_tracker: Optional[UsageTracker] = None,
+                 backend: Optional[LLMBackend] = None, endpoint_url: Optional[str] = None,
+                 model_assignment: Optional[Dict[str, str]] = None,
+                 scheduler: Optional[FairScheduler] = None):
+        """
+        初始化LLM客户端
+
+        Args:
+            max_workers: 异步调用使用的线程池大小（同时在途的请求总数上限）
+            model_concurrency: 按模型覆盖初始并发上限，格式为 {model_id: 并发数}
+            enable_prompt_cache: 是否为系统提示词和消息前缀设置缓存断点
+            response_cache: 磁盘响应缓存（默认不启用；回放和基准测试时传入）
+            role_fallback_chains: 按角色覆盖降级链，格式为 {角色名称: [备用模型ID, ...]}
+            enable_hedging: 是否默认启用对冲请求（主模型超过p95延迟时向备用模型发出备份请求）
+            usage_tracker: 用量统计（多个客户端可以共享同一个）
+            backend: 模型后端（默认使用AWS Bedrock；测试和模拟时可传入 FakeBackend）
+            endpoint_url: bedrock-runtime 服务地址（如本地模拟服务），只对默认的Bedrock后端生效
+            model_assignment: 按角色覆盖模型分配，格式为 {角色名称: 模型ID}
+            scheduler: 多个对局共用本客户端时的公平调度器（异步调用先在调度器中排队获得名额）
+        """
+        # 连接池大小与线程池一致
+        self.backend = backend or BedrockBackend(max_pool_connections=max_workers, endpoint_url=endpoint_url)
+
+        # 异步调用通过有界线程池执行阻塞的后端请求
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm")
+
+        # 每个模型一个自适应限流器（令牌桶 + AIMD并发上限）
+        self._max_workers = max_workers
+        self._model_concurrency = dict(self.MODEL_CONCURRENCY_LIMITS)
+        if model_concurrency:
+            self._model_concurrency.update(model_concurrency)
+        self._rate_limiters: Dict[str, ModelRateLimiter] = {}
+        self._rate_limiter_lock = threading.Lock()
+
+        # 提示词缓存
+        self.enable_prompt_cache = enable_prompt_cache
+
+        # 用量统计：每次调用的token、延迟、重试次数，按对局/阶段/玩家等标签汇总
+        self.usage = usage_tracker or UsageTracker()
+
+        # 响应缓存：命中时直接返回，不访问网络
+        self.response_cache = response_cache
+
+        # 降级链与对冲请求
+        self.fallback_chains = {k: list(v) for k, v in self.DEFAULT_FALLBACK_CHAINS.items()}
+        self.role_fallback_chains = dict(role_fallback_chains or {})
+        self.model_assignment = dict(self.DEFAULT_MODEL_ASSIGNMENT)
+        if model_assignment:
+            self.model_assignment.update(model_assignment)
+        self.enable_hedging = enable_hedging
+        self._hedge_executor = ThreadPoolExecutor(max_workers=max_workers * 2, thread_name_prefix="llm-hedge")
+        self._latency_samples: Dict[str, deque] = {}
+        self._latency_lock = threading.Lock()
+
+        # 多对局调度：名额默认跟随各模型限流器的并发上限
+        self.scheduler = scheduler
+        if scheduler is not None and scheduler.capacity is None:
+            scheduler.capacity = self._model_capacity
+
+    def _get_rate_limiter(self, model_id: str) -> ModelRateLimiter:
+        """获取（必要时创建）指定模型的限流器"""
+        with self._rate_limiter_lock:
+            limiter = self._rate_limiters.get(model_id)
+            if limiter is None:
+                limit = self._model_concurrency.get(model_id, self.DEFAULT_MODEL_CONCURRENCY)
+                # 本地后端没有配额，不限制请求速率
+                rate = self.DEFAULT_REQUESTS_PER_SECOND if self.backend.rate_limited else 1e6
+                limiter = ModelRateLimiter(
+                    model_id,
+                    initial_concurrency=max(1, limit),
+                    max_concurrency=self._max_workers,
+                    initial_rate=rate,
+                    max_rate=max(rate, 50.0)
+                )
+                self._rate_limiters[model_id] = limiter
+            return limiter
+
+    def _model_capacity(self, model_id: str) -> int:
+        """模型当前的并发上限（AIMD调整后的值）"""
+        return max(1, int(self._get_rate_limiter(model_id).concurrency.limit))
+
+    def scheduled(self, model_id: str):
+        """
+        异步调用的调度名额（async with 使用；未配置调度器时直接通过）
+
+        对局ID取自当前 call_context 的 game_id 标签。
+        """
+        if self.scheduler is None:
+            return _no_slot()
+        return self.scheduler.slot(model_id, current_call_context().get("game_id"))
+
+    async def arun_scheduled(self, model_id: str, func: Callable, *args):
+        """
+        在调度名额内把阻塞调用（如读取流式响应）放到线程池中执行，并带上当前的 call_context 标签
+
+        Returns:
+            func 的返回值
+        """
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        async with self.scheduled(model_id):
+            return await loop.run_in_executor(self._executor, partial(context.run, func, *args))
+
+    def get_rate_limits(self) -> Dict[str, Dict[str, float]]:
+        """
+        获取各模型当前的限流状态（用于调参）
+
+        Returns:
+            {model_id: {concurrency_limit, in_flight, rate_per_second, latency_ewma,
+                        requests, throttles, total_wait_seconds}}
+        """
+        with self._rate_limiter_lock:
+            limiters = dict(self._rate_limiters)
+        return {model_id: limiter.snapshot() for model_id, limiter in limiters.items()}
 
     def invoke_model(
         self,
         model_id: str,
-        messages: List[Dict[str, str]],
+        messages: List[Dict],
         max_tokens: int = 2000,
         temperature: float = 1.0,
         system_prompt: Optional[str] = None,
-        max_retries: int = 2
+        max_retries: int = 2,
+        fallback_models: Optional[List[str]] = None,
+        hedge: Optional[bool] = None,
+        call_tags: Optional[Dict] = None,
+        tools: Optional[List[Dict]] = None,
+        tool_choice: Optional[Dict] = None
     ) -> str:
         """
-        调用指定的LLM模型（带重试机制）
+        调用指定的LLM模型（带重试、降级和对冲请求）
 
         Args:
             model_id: 模型ID
-            messages: 消息列表，格式为 [{"role": "user", "content": "..."}]
+            messages: 消息列表，格式为 [{"role": "user", "content": "..."}]；
+                content也可以是文本块列表（见 cached_prefix_content），用于缓存消息的固定前缀
             max_tokens: 最大token数
             temperature: 温度参数
-            system_prompt: 系统提示词
-            max_retries: 最大手动重试次数（除了boto3自带的重试）
+            system_prompt: 系统提示词（开启提示词缓存时整体作为缓存前缀）
+            max_retries: 每个模型的最大手动重试次数
+            fallback_models: 主模型失败后依次尝试的备用模型；None表示使用该模型的默认降级链
+            hedge: 是否启用对冲请求；None表示使用客户端的默认设置
+            call_tags: 用量统计标签（如玩家编号、角色），与 call_context 设置的标签合并
+            tools: 工具定义（结构化输出），格式同Anthropic Messages API
+            tool_choice: 工具选择，如 {"type": "tool", "name": "..."} 强制调用指定工具
 
         Returns:
-            模型的响应文本
+            模型的响应文本；模型调用了工具时返回工具参数的JSON字符串
+            （降级链上所有模型都失败时返回空字符串）
+        """
+        tags = {**current_call_context(), **(call_tags or {})}
+
+        cache_key = self._response_cache_key(model_id, messages, max_tokens, temperature, system_prompt,
+                                             tools, tool_choice)
+        if cache_key:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                self._record_response_cache_hit(model_id, tags)
+                return cached
+
+        request_body = self._build_request_body(messages, max_tokens, temperature, system_prompt,
+                                                tools, tool_choice)
+        chain = self._model_chain(model_id, fallback_models)
+
+        # 后端也能看到完整的调用标签（录制时用于定位分歧）
+        use_hedge = self.enable_hedging if hedge is None else hedge
+        with call_context(**(call_tags or {})):
+            if use_hedge and len(chain) > 1:
+                text = self._invoke_hedged(chain, request_body, max_retries, tags)
+            else:
+                text = self._invoke_chain(chain, request_body, max_retries, tags)
+
+        if cache_key and text:
+            self.response_cache.put(cache_key, text)
+        return text or ""
+
+    def _invoke_once(self, model_id: str, request_body: Dict, max_retries: int, tags: Dict) -> Optional[str]:
+        """
+        调用单个模型（带重试）
+
+        Returns:
+            响应文本；调用失败或返回空内容时返回None
+        """
+        call_start = time.monotonic()
+        for attempt in range(max_retries + 1):
+            try:
+                # 调用模型（经过该模型的限流器，重试等待期间不占用名额）
+                start = time.monotonic()
+                with self._get_rate_limiter(model_id).slot():
+                    response_body = self.backend.invoke(model_id, request_body)
+
+                self._record_latency(model_id, time.monotonic() - start)
+                self._record_call(model_id, call_start, True, attempt, response_body.get("usage", {}), tags)
+
+                return self._extract_output(response_body)
+
+            except Exception as e:
+                if self.backend.is_fatal_error(e):
+                    raise
+                if not self._handle_failure(model_id, e, attempt, max_retries):
+                    self._record_call(model_id, call_start, False, attempt, {}, tags)
+                    return None
+
+        return None
+
+    def _invoke_chain(self, chain: List[str], request_body: Dict, max_retries: int,
+                      tags: Dict) -> Optional[str]:
+        """按降级链依次调用，返回第一个有效响应"""
+        for index, model_id in enumerate(chain):
+            text = self._invoke_once(model_id, request_body, max_retries, tags)
+            if text:
+                return text
+            if index + 1 < len(chain):
+                print(f"⚠️ 模型 {model_id} 未返回有效结果，降级使用 {chain[index + 1]}")
+        return None
+
+    def _invoke_hedged(self, chain: List[str], request_body: Dict, max_retries: int,
+                       tags: Dict) -> Optional[str]:
+        """
+        对冲调用：主模型超过其p95延迟仍未返回时，向降级链中的下一个模型发出备份请求，
+        取先返回的有效结果
+
+        落后的请求无法中途取消，会在后台自然结束，结果被丢弃。
+        """
+        primary = chain[0]
+        primary_future = self._hedge_executor.submit(contextvars.copy_context().run, self._invoke_once,
+                                                     primary, request_body, max_retries, tags)
+
+        try:
+            text = primary_future.result(timeout=self.get_hedge_delay(primary))
+        except FutureTimeoutError:
+            pass
+        else:
+            # 主模型在对冲延迟之内返回；失败时直接按降级链继续
+            return text or self._invoke_chain(chain[1:], request_body, max_retries, tags)
+
+        print(f"⚠️ 模型 {primary} 响应超过p95延迟，向 {chain[1]} 发出备份请求")
+        backup_future = self._hedge_executor.submit(contextvars.copy_context().run, self._invoke_chain,
+                                                    chain[1:], request_body, max_retries, tags)
+
+        pending = {primary_future, backup_future}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                text = future.result()
+                if text:
+                    return text
+        return None
+
+    def invoke_model_stream(
+        self,
+        model_id: str,
+        messages: List[Dict],
+        max_tokens: int = 2000,
+        temperature: float = 1.0,
+        system_prompt: Optional[str] = None,
+        max_retries: int = 2,
+        fallback_models: Optional[List[str]] = None,
+        call_tags: Optional[Dict] = None
+    ) -> Iterator[str]:
+        """
+        以流式方式调用指定的LLM模型，逐段返回生成的文本
+
+        参数与 invoke_model 相同。只有在收到第一段文本之前出错才会重试或降级到备用模型；
+        输出过程中断开时，已经返回的文本保留，迭代直接结束。流式输出不做对冲请求。
+
+        Yields:
+            模型陆续生成的文本片段
+        """
+        tags = {**current_call_context(), **(call_tags or {})}
+
+        cache_key = self._response_cache_key(model_id, messages, max_tokens, temperature, system_prompt)
+        if cache_key:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                self._record_response_cache_hit(model_id, tags, streamed=True)
+                yield cached
+                return
+
+        request_body = self._build_request_body(messages, max_tokens, temperature, system_prompt)
+        chain = self._model_chain(model_id, fallback_models)
+
+        streamed: List[str] = []
+        with call_context(**(call_tags or {})):
+            for index, current_model in enumerate(chain):
+                completed = yield from self._stream_once(current_model, request_body, max_retries, streamed, tags)
+                if streamed:
+                    # 只缓存完整结束的输出
+                    if cache_key and completed:
+                        self.response_cache.put(cache_key, "".join(streamed))
+                    return
+                if index + 1 < len(chain):
+                    print(f"⚠️ 模型 {current_model} 未返回有效结果，降级使用 {chain[index + 1]}")
+
+    def _stream_once(self, model_id: str, request_body: Dict, max_retries: int,
+                     streamed: List[str], tags: Dict) -> Iterator[str]:
+        """
+        以流式方式调用单个模型（带重试），生成的文本同时追加到streamed
+
+        Returns:
+            （生成器返回值）输出是否完整结束
+        """
+        call_start = time.monotonic()
+        usage: Dict = {}
+        for attempt in range(max_retries + 1):
+            try:
+                # 整个流式输出期间占用该模型的一个并发名额
+                with self._get_rate_limiter(model_id).slot(measure_latency=False):
+                    for payload in self.backend.invoke_stream(model_id, request_body):
+                        if payload.get("type") == "message_start":
+                            # 输入token与缓存命中信息在流的第一个事件里
+                            usage.update(payload.get("message", {}).get("usage", {}))
+                            continue
+                        if payload.get("type") == "message_delta":
+                            # 输出token数在结束前的message_delta事件里
+                            usage.update(payload.get("usage", {}))
+                            continue
+                        if payload.get("type") != "content_block_delta":
+                            continue
+
+                        text = payload.get("delta", {}).get("text", "")
+                        if text:
+                            streamed.append(text)
+                            yield text
+
+                self._record_call(model_id, call_start, True, attempt, usage, tags, streamed=True)
+                return True
+
+            except Exception as e:
+                if self.backend.is_fatal_error(e):
+                    raise
+                if streamed:
+                    print(f"\n⚠️ 模型 {model_id} 流式输出中断: {str(e)}")
+                    self._record_call(model_id, call_start, False, attempt, usage, tags, streamed=True)
+                    return False
+                if not self._handle_failure(model_id, e, attempt, max_retries):
+                    self._record_call(model_id, call_start, False, attempt, usage, tags, streamed=True)
+                    return False
+
+        return False
+
+    def _model_chain(self, model_id: str, fallback_models: Optional[List[str]]) -> List[str]:
+        """主模型加降级链（去掉重复的模型）"""
+        if fallback_models is None:
+            fallback_models = self.fallback_chains.get(model_id, [])
+        chain = [model_id]
+        for fallback in fallback_models:
+            if fallback not in chain:
+                chain.append(fallback)
+        return chain
+
+    def get_fallback_chain_for_role(self, role_name: str) -> List[str]:
+        """
+        获取指定角色的降级链（不含主模型）
+
+        Args:
+            role_name: 角色名称（与 DEFAULT_MODEL_ASSIGNMENT 的键一致）
+
+        Returns:
+            主模型失败后依次尝试的模型ID列表
         """
-        # 构建请求体
+        if role_name in self.role_fallback_chains:
+            return list(self.role_fallback_chains[role_name])
+        return list(self.fallback_chains.get(self.get_model_for_role(role_name), []))
+
+    def _record_latency(self, model_id: str, latency: float):
+        """记录一次成功调用的延迟，用于计算对冲阈值"""
+        with self._latency_lock:
+            samples = self._latency_samples.get(model_id)
+            if samples is None:
+                samples = deque(maxlen=200)
+                self._latency_samples[model_id] = samples
+            samples.append(latency)
+
+    def get_hedge_delay(self, model_id: str) -> float:
+        """
+        对冲请求的等待时间：该模型最近成功调用延迟的p95
+
+        样本不足时使用 DEFAULT_HEDGE_DELAY。
+        """
+        with self._latency_lock:
+            samples = sorted(self._latency_samples.get(model_id, []))
+        if len(samples) < self.HEDGE_MIN_SAMPLES:
+            return self.DEFAULT_HEDGE_DELAY
+        return samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+    def _response_cache_key(
+        self,
+        model_id: str,
+        messages: List[Dict],
+        max_tokens: int,
+        temperature: float,
+        system_prompt: Optional[str],
+        tools: Optional[List[Dict]] = None,
+        tool_choice: Optional[Dict] = None
+    ) -> Optional[str]:
+        """计算响应缓存键；未启用响应缓存时返回None"""
+        if not self.response_cache:
+            return None
+        # 缓存断点不影响生成结果，不参与计算键
+        messages = [self._strip_cache_control(message) for message in messages]
+        return ResponseCache.make_key(model_id, system_prompt, messages, temperature, max_tokens, tools, tool_choice)
+
+    def _build_request_body(
+        self,
+        messages: List[Dict],
+        max_tokens: int,
+        temperature: float,
+        system_prompt: Optional[str],
+        tools: Optional[List[Dict]] = None,
+        tool_choice: Optional[Dict] = None
+    ) -> Dict:
+        """构建Bedrock请求体"""
+        if not self.enable_prompt_cache:
+            messages = [self._strip_cache_control(message) for message in messages]
+
         request_body = {
             "anthropic_version": "bedrock-2023-05-31",
             "max_tokens": max_tokens,
@@ -80,53 +521,206 @@ class LLMClient:
             "messages": messages
         }
 
-        # 添加系统提示词
+        # 添加系统提示词（开启缓存时以文本块形式发送并设置缓存断点）
         if system_prompt:
-            request_body["system"] = system_prompt
+            if self.enable_prompt_cache:
+                request_body["system"] = [{
+                    "type": "text",
+                    "text": system_prompt,
+                    "cache_control": self.CACHE_CONTROL
+                }]
+            else:
+                request_body["system"] = system_prompt
 
-        # 手动重试机制
-        for attempt in range(max_retries + 1):
-            try:
-                # 调用模型
-                response = self.client.invoke_model(
-                    modelId=model_id,
-                    body=json.dumps(request_body)
-                )
+        if tools:
+            request_body["tools"] = tools
+            if tool_choice:
+                request_body["tool_choice"] = tool_choice
 
-                # 解析响应
-                response_body = json.loads(response['body'].read())
+        return request_body
 
-                # 提取文本内容
-                if "content" in response_body and len(response_body["content"]) > 0:
-                    return response_body["content"][0]["text"]
-                else:
-                    return ""
+    @staticmethod
+    def _extract_output(response_body: Dict) -> Optional[str]:
+        """
+        提取响应内容：优先返回工具调用参数（JSON字符串），否则返回第一个文本块
 
-            except Exception as e:
-                error_msg = str(e)
-
-                # 判断是否是超时错误
-                is_timeout = "timeout" in error_msg.lower() or "timed out" in error_msg.lower()
-
-                if attempt < max_retries:
-                    if is_timeout:
-                        print(f"⚠️ 模型 {model_id} 调用超时，正在重试 ({attempt + 1}/{max_retries})...")
-                    else:
-                        print(f"⚠️ 模型 {model_id} 调用失败: {error_msg}，正在重试 ({attempt + 1}/{max_retries})...")
-
-                    # 等待一段时间后重试（指数退避）
-                    wait_time = 2 ** attempt  # 1秒, 2秒, 4秒...
-                    time.sleep(wait_time)
-                else:
-                    # 最后一次尝试失败，返回错误
-                    if is_timeout:
-                        print(f"❌ 模型 {model_id} 多次调用超时，已达最大重试次数")
-                        print(f"   提示：该模型响应较慢，建议稍后重试或使用其他模型")
-                    else:
-                        print(f"❌ 调用模型 {model_id} 失败: {error_msg}")
-                    return ""
-
-        return ""
+        Returns:
+            响应内容；返回空内容时为None
+        """
+        content = response_body.get("content") or []
+        for block in content:
+            if block.get("type") == "tool_use":
+                return json.dumps(block.get("input", {}), ensure_ascii=False)
+        for block in content:
+            if block.get("type", "text") == "text" and block.get("text"):
+                return block["text"]
+        return None
+
+    @classmethod
+    def cached_prefix_content(cls, prefix: str, suffix: str) -> List[Dict]:
+        """
+        构建带缓存断点的消息内容：prefix在多次调用间保持不变时可以命中缓存
+
+        Returns:
+            可直接作为消息content的文本块列表
+        """
+        blocks = [{"type": "text", "text": prefix, "cache_control": cls.CACHE_CONTROL}]
+        if suffix:
+            blocks.append({"type": "text", "text": suffix})
+        return blocks
+
+    @staticmethod
+    def _strip_cache_control(message: Dict) -> Dict:
+        """去掉消息内容块中的缓存断点"""
+        content = message.get("content")
+        if not isinstance(content, list):
+            return message
+        blocks = [{k: v for k, v in block.items() if k != "cache_control"} for block in content]
+        return {**message, "content": blocks}
+
+    def get_cache_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        获取各模型的提示词缓存统计
+
+        Returns:
+            {model_id: {calls, input_tokens, cache_read_input_tokens,
+                        cache_creation_input_tokens, cache_hit_rate}}
+            cache_hit_rate 为缓存命中token占全部输入token的比例
+        """
+        result = {}
+        for model_id, stats in self.usage.summarize(group_by="model_id").items():
+            total_input = (stats["input_tokens"] + stats["cache_read_input_tokens"]
+                           + stats["cache_creation_input_tokens"])
+            hit_rate = stats["cache_read_input_tokens"] / total_input if total_input else 0.0
+            result[model_id] = {
+                "calls": stats["calls"],
+                "input_tokens": stats["input_tokens"],
+                "cache_read_input_tokens": stats["cache_read_input_tokens"],
+                "cache_creation_input_tokens": stats["cache_creation_input_tokens"],
+                "cache_hit_rate": hit_rate
+            }
+        return result
+
+    def _record_call(self, model_id: str, start: float, success: bool, retries: int,
+                     usage: Dict, tags: Dict, streamed: bool = False):
+        """记录一次模型调用的用量"""
+        self.usage.record(CallRecord(
+            model_id=model_id,
+            latency=time.monotonic() - start,
+            success=success,
+            retries=retries,
+            input_tokens=usage.get("input_tokens", 0) or 0,
+            output_tokens=usage.get("output_tokens", 0) or 0,
+            cache_read_input_tokens=usage.get("cache_read_input_tokens", 0) or 0,
+            cache_creation_input_tokens=usage.get("cache_creation_input_tokens", 0) or 0,
+            streamed=streamed,
+            synthetic=not self.backend.billable,
+            tags=tags
+        ))
+
+    def _record_response_cache_hit(self, model_id: str, tags: Dict, streamed: bool = False):
+        """记录一次命中磁盘响应缓存的调用"""
+        self.usage.record(CallRecord(
+            model_id=model_id,
+            latency=0.0,
+            success=True,
+            streamed=streamed,
+            response_cached=True,
+            tags=tags
+        ))
+
+    def _handle_failure(self, model_id: str, error: Exception, attempt: int, max_retries: int) -> bool:
+        """
+        处理一次失败的调用：输出提示，需要重试时等待退避时间
+
+        Returns:
+            是否应该继续重试
+        """
+        error_msg = str(error)
+
+        # 判断是否是超时错误
+        is_timeout = "timeout" in error_msg.lower() or "timed out" in error_msg.lower()
+        is_throttled = self._is_throttling_error(error)
+
+        if is_throttled:
+            # 通知限流器降低该模型的并发上限和请求速率
+            self._get_rate_limiter(model_id).on_throttle()
+
+        if attempt < max_retries:
+            if is_throttled:
+                print(f"⚠️ 模型 {model_id} 被限流，降低请求速率后重试 ({attempt + 1}/{max_retries})...")
+            elif is_timeout:
+                print(f"⚠️ 模型 {model_id} 调用超时，正在重试 ({attempt + 1}/{max_retries})...")
+            else:
+                print(f"⚠️ 模型 {model_id} 调用失败: {error_msg}，正在重试 ({attempt + 1}/{max_retries})...")
+
+            # 指数退避加全抖动，避免同时失败的请求又同时重试
+            wait_time = random.uniform(0, 2 ** (attempt + 1))  # 0-2秒, 0-4秒...
+            time.sleep(wait_time)
+            return True
+
+        # 最后一次尝试失败，返回错误
+        if is_throttled:
+            print(f"❌ 模型 {model_id} 持续被限流，已达最大重试次数")
+        elif is_timeout:
+            print(f"❌ 模型 {model_id} 多次调用超时，已达最大重试次数")
+            print(f"   提示：该模型响应较慢，建议稍后重试或使用其他模型")
+        else:
+            print(f"❌ 调用模型 {model_id} 失败: {error_msg}")
+        return False
+
+    async def ainvoke_model(
+        self,
+        model_id: str,
+        messages: List[Dict],
+        max_tokens: int = 2000,
+        temperature: float = 1.0,
+        system_prompt: Optional[str] = None,
+        max_retries: int = 2,
+        fallback_models: Optional[List[str]] = None,
+        hedge: Optional[bool] = None,
+        call_tags: Optional[Dict] = None,
+        tools: Optional[List[Dict]] = None,
+        tool_choice: Optional[Dict] = None
+    ) -> str:
+        """
+        异步调用指定的LLM模型
+
+        阻塞的后端请求在有界线程池中执行，同一模型的并发数和速率受限流器控制，
+        因此可以用 asyncio.gather 同时发出多个请求；配置了调度器时先按对局公平排队获得名额。
+        参数与 invoke_model 相同。
+
+        Returns:
+            模型的响应文本
+        """
+        loop = asyncio.get_running_loop()
+        call = partial(
+            self.invoke_model,
+            model_id=model_id,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            system_prompt=system_prompt,
+            max_retries=max_retries,
+            fallback_models=fallback_models,
+            hedge=hedge,
+            call_tags=call_tags,
+            tools=tools,
+            tool_choice=tool_choice
+        )
+        # 复制当前上下文，让线程中的调用带上 call_context 设置的标签
+        context = contextvars.copy_context()
+        async with self.scheduled(model_id):
+            return await loop.run_in_executor(self._executor, context.run, call)
+
+    def shutdown(self):
+        """关闭异步调用和对冲请求使用的线程池"""
+        self._executor.shutdown(wait=False)
+        self._hedge_executor.shutdown(wait=False)
+
+    def _is_throttling_error(self, error: Exception) -> bool:
+        """判断是否是限流/过载错误（由后端识别）"""
+        return self.backend.is_throttling_error(error)
 
     def get_model_for_role(self, role_name: str) -> str:
         """
@@ -138,4 +732,4 @@ class LLMClient:
         Returns:
             模型ID
         """
-        return self.DEFAULT_MODEL_ASSIGNMENT.get(role_name, self.AVAILABLE_MODELS[0])
+        return self.model_assignment.get(role_name, self.AVAILABLE_MODELS[0])
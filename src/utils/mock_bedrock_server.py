@@ -0,0 +1,331 @@
+"""
+本地模拟的 bedrock-runtime 服务
+
+实现 InvokeModel 和 InvokeModelWithResponseStream 的HTTP接口（流式响应使用
+AWS eventstream 编码），可以直接用 boto3 访问，用于在没有网络的机器上
+对连接池、重试、超时和限流进行压测。回答内容由 FakeBackend 生成。
+
+每个模型可以配置：
+- 首token延迟分布（对数正态，按中位数和离散度配置）
+- 输出速率（token/秒）
+- 随机错误率、随机限流率，以及并发上限（超出时返回 ThrottlingException）
+
+用法：
+    python -m src.utils.mock_bedrock_server --port 8765 --time-scale 0.1
+
+    # boto3 需要凭证才能签名，本地服务不校验，任意值即可
+    export AWS_ACCESS_KEY_ID=test AWS_SECRET_ACCESS_KEY=test
+    client = LLMClient(endpoint_url="http://127.0.0.1:8765")
+"""
+
+import argparse
+import binascii
+import json
+import random
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, Optional, Tuple
+from urllib.parse import unquote
+
+from src.utils.backends import FakeBackend
+
+
+class ModelProfile:
+    """单个模型的模拟参数"""
+
+    def __init__(self, ttft_median: float = 1.0, ttft_sigma: float = 0.5,
+                 tokens_per_second: float = 60.0, error_rate: float = 0.0,
+                 throttle_rate: float = 0.0, max_concurrency: Optional[int] = None):
+        """
+        Args:
+            ttft_median: 首token延迟的中位数（秒）
+            ttft_sigma: 首token延迟的对数标准差（越大长尾越明显，0.5时p99约为中位数的3倍）
+            tokens_per_second: 输出速率
+            error_rate: 随机返回 InternalServerException 的概率
+            throttle_rate: 随机返回 ThrottlingException 的概率
+            max_concurrency: 并发上限（模拟配额），超出时返回 ThrottlingException；None表示不限制
+        """
+        self.ttft_median = ttft_median
+        self.ttft_sigma = ttft_sigma
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.max_concurrency = max_concurrency
+
+    def sample_ttft(self, rng: random.Random) -> float:
+        """采样一次首token延迟"""
+        return rng.lognormvariate(0, self.ttft_sigma) * self.ttft_median
+
+
+# 按模型系列的默认参数（大致参照各模型的实际响应速度）
+DEFAULT_PROFILES = {
+    "opus": ModelProfile(ttft_median=2.5, ttft_sigma=0.6, tokens_per_second=30.0, max_concurrency=4),
+    "sonnet": ModelProfile(ttft_median=1.2, ttft_sigma=0.5, tokens_per_second=60.0, max_concurrency=8),
+    "haiku": ModelProfile(ttft_median=0.5, ttft_sigma=0.4, tokens_per_second=120.0, max_concurrency=16)
+}
+
+
+def encode_event_message(headers: Dict[str, str], payload: bytes) -> bytes:
+    """
+    按 AWS eventstream 格式编码一条消息
+
+    格式：总长度(4) 头部长度(4) 前导CRC(4) 头部 载荷 消息CRC(4)，整数均为大端；
+    每个头部为 名称长度(1) 名称 类型(1，7表示字符串) 值长度(2) 值
+    """
+    encoded_headers = b""
+    for name, value in headers.items():
+        name_bytes = name.encode("utf-8")
+        value_bytes = value.encode("utf-8")
+        encoded_headers += struct.pack(">B", len(name_bytes)) + name_bytes
+        encoded_headers += struct.pack(">BH", 7, len(value_bytes)) + value_bytes
+
+    total_length = 12 + len(encoded_headers) + len(payload) + 4
+    prelude = struct.pack(">II", total_length, len(encoded_headers))
+    prelude += struct.pack(">I", binascii.crc32(prelude) & 0xFFFFFFFF)
+    message = prelude + encoded_headers + payload
+    return message + struct.pack(">I", binascii.crc32(message) & 0xFFFFFFFF)
+
+
+def encode_chunk_event(event: Dict) -> bytes:
+    """把一个流式事件编码为 chunk 消息（载荷为base64编码的事件JSON）"""
+    data = json.dumps(event, ensure_ascii=False).encode("utf-8")
+    payload = json.dumps({"bytes": binascii.b2a_base64(data, newline=False).decode("ascii")}).encode("utf-8")
+    return encode_event_message({
+        ":event-type": "chunk",
+        ":content-type": "application/json",
+        ":message-type": "event"
+    }, payload)
+
+
+class MockBedrockServer:
+    """模拟服务（在后台线程中运行）"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, seed: int = 0,
+                 profiles: Optional[Dict[str, ModelProfile]] = None,
+                 default_profile: Optional[ModelProfile] = None, time_scale: float = 1.0):
+        """
+        Args:
+            host: 监听地址
+            port: 监听端口（0表示自动分配）
+            seed: 随机种子（回答内容和延迟采样）
+            profiles: 模型参数，键为模型ID或模型ID中包含的关键字（如 "opus"）
+            default_profile: 没有匹配参数时使用的默认值
+            time_scale: 延迟缩放系数（如0.1表示所有延迟缩短为十分之一）
+        """
+        self.profiles = dict(DEFAULT_PROFILES if profiles is None else profiles)
+        self.default_profile = default_profile or ModelProfile()
+        self.time_scale = time_scale
+        self.backend = FakeBackend(seed=seed)
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, int] = {}
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def endpoint_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockBedrockServer":
+        """在后台线程启动服务"""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="mock-bedrock", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """在当前线程运行服务（阻塞）"""
+        self._httpd.serve_forever()
+
+    def stop(self):
+        """停止服务"""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def profile_for(self, model_id: str) -> ModelProfile:
+        """查找模型参数：先精确匹配模型ID，再按关键字匹配"""
+        if model_id in self.profiles:
+            return self.profiles[model_id]
+        for keyword, profile in self.profiles.items():
+            if keyword in model_id:
+                return profile
+        return self.default_profile
+
+    def _admit(self, model_id: str, profile: ModelProfile) -> Optional[Tuple[int, str, str]]:
+        """
+        决定是否接受请求
+
+        Returns:
+            None表示接受；否则为 (HTTP状态码, 错误类型, 错误信息)
+        """
+        with self._lock:
+            stats = self.stats.setdefault(model_id, {"requests": 0, "throttled": 0, "errors": 0, "peak_in_flight": 0})
+            stats["requests"] += 1
+            in_flight = self._in_flight.get(model_id, 0)
+            roll = self._rng.random()
+
+            if profile.max_concurrency is not None and in_flight >= profile.max_concurrency:
+                stats["throttled"] += 1
+                return 429, "ThrottlingException", "Too many requests, please wait before trying again."
+            if roll < profile.throttle_rate:
+                stats["throttled"] += 1
+                return 429, "ThrottlingException", "Too many requests, please wait before trying again."
+            if roll < profile.throttle_rate + profile.error_rate:
+                stats["errors"] += 1
+                return 500, "InternalServerException", "The server encountered an internal error."
+
+            self._in_flight[model_id] = in_flight + 1
+            stats["peak_in_flight"] = max(stats["peak_in_flight"], in_flight + 1)
+            return None
+
+    def _finish(self, model_id: str):
+        with self._lock:
+            self._in_flight[model_id] -= 1
+
+    def _sample_ttft(self, profile: ModelProfile) -> float:
+        with self._lock:
+            return profile.sample_ttft(self._rng) * self.time_scale
+
+    def _output_delay(self, profile: ModelProfile, output_tokens: int) -> float:
+        return output_tokens / profile.tokens_per_second * self.time_scale
+
+    def _paced_events(self, model_id: str, request_body: Dict, profile: ModelProfile) -> Iterator[Dict]:
+        """按首token延迟和输出速率依次产生流式事件"""
+        time.sleep(self._sample_ttft(profile))
+        for event in self.backend.invoke_stream(model_id, request_body):
+            if event.get("type") == "content_block_delta":
+                text = event["delta"].get("text", "")
+                time.sleep(self._output_delay(profile, max(1, len(text) // 2)))
+            yield event
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                parts = self.path.split("?")[0].strip("/").split("/")
+                length = int(self.headers.get("Content-Length", 0))
+                raw_body = self.rfile.read(length)
+
+                if len(parts) != 3 or parts[0] != "model" or parts[2] not in ("invoke", "invoke-with-response-stream"):
+                    self._send_error(404, "ResourceNotFoundException", f"Unknown path: {self.path}")
+                    return
+
+                model_id = unquote(parts[1])
+                try:
+                    request_body = json.loads(raw_body)
+                    if "messages" not in request_body or "anthropic_version" not in request_body:
+                        raise ValueError("missing messages or anthropic_version")
+                except ValueError as e:
+                    self._send_error(400, "ValidationException", f"Malformed input request: {e}")
+                    return
+
+                profile = server.profile_for(model_id)
+                rejection = server._admit(model_id, profile)
+                if rejection:
+                    self._send_error(*rejection)
+                    return
+
+                try:
+                    if parts[2] == "invoke":
+                        self._invoke(model_id, request_body, profile)
+                    else:
+                        self._invoke_stream(model_id, request_body, profile)
+                finally:
+                    server._finish(model_id)
+
+            def do_GET(self):
+                # 调试用：查看各模型的请求统计
+                if self.path.rstrip("/") != "/stats":
+                    self._send_error(404, "ResourceNotFoundException", f"Unknown path: {self.path}")
+                    return
+                with server._lock:
+                    data = json.dumps(server.stats).encode("utf-8")
+                self._send(200, data, {"Content-Type": "application/json"})
+
+            def _invoke(self, model_id: str, request_body: Dict, profile: ModelProfile):
+                response_body = server.backend.invoke(model_id, request_body)
+                output_tokens = response_body["usage"]["output_tokens"]
+                time.sleep(server._sample_ttft(profile) + server._output_delay(profile, output_tokens))
+                self._send(200, json.dumps(response_body, ensure_ascii=False).encode("utf-8"), {
+                    "Content-Type": "application/json",
+                    "X-Amzn-Bedrock-Input-Token-Count": str(response_body["usage"]["input_tokens"]),
+                    "X-Amzn-Bedrock-Output-Token-Count": str(output_tokens)
+                })
+
+            def _invoke_stream(self, model_id: str, request_body: Dict, profile: ModelProfile):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/vnd.amazon.eventstream")
+                self.send_header("X-Amzn-Bedrock-Content-Type", "application/json")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for event in server._paced_events(model_id, request_body, profile):
+                    self._write_chunk(encode_chunk_event(event))
+                self._write_chunk(b"")
+
+            def _write_chunk(self, data: bytes):
+                """按HTTP分块传输编码写出（空数据表示结束）"""
+                self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+            def _send_error(self, status: int, error_type: str, message: str):
+                self._send(status, json.dumps({"message": message}).encode("utf-8"), {
+                    "Content-Type": "application/json",
+                    "X-Amzn-ErrorType": f"{error_type}:http://internal.amazon.com/coral/com.amazon.bedrock/"
+                })
+
+            def _send(self, status: int, data: bytes, headers: Dict[str, str]):
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                # 压测时请求量很大，不输出访问日志
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟的 bedrock-runtime 服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--time-scale", type=float, default=1.0, help="延迟缩放系数")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="所有模型的随机错误率")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="所有模型的随机限流率")
+    args = parser.parse_args()
+
+    profiles = {}
+    for keyword, profile in DEFAULT_PROFILES.items():
+        profiles[keyword] = ModelProfile(
+            ttft_median=profile.ttft_median,
+            ttft_sigma=profile.ttft_sigma,
+            tokens_per_second=profile.tokens_per_second,
+            error_rate=args.error_rate,
+            throttle_rate=args.throttle_rate,
+            max_concurrency=profile.max_concurrency
+        )
+
+    server = MockBedrockServer(host=args.host, port=args.port, seed=args.seed,
+                               profiles=profiles, time_scale=args.time_scale)
+    print(f"模拟 bedrock-runtime 服务已启动：{server.endpoint_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n服务已停止")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+from src.utils.usage_tracker import current_call_context
+
+
+# 本地估算：中文等非ASCII字符约1个token/字，ASCII约4个字符/token（宁可略高估）
+NON_ASCII_TOKENS_PER_CHAR = 1.0
+ASCII_CHARS_PER_TOKEN = 4.0
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    快速估算文本的token数（不调用分词器）
+
+    利用UTF-8编码长度推算非ASCII字符数（常见中文字符编码为3字节），只需一次编码。
+    """
+    if not text:
+        return 0
+    char_count = len(text)
+    non_ascii = (len(text.encode("utf-8")) - char_count) // 2
+    ascii_count = max(0, char_count - non_ascii)
+    return int(non_ascii * NON_ASCII_TOKENS_PER_CHAR + ascii_count / ASCII_CHARS_PER_TOKEN) + 1
+
+
+class PromptSection:
+    """
+    提示词中的一个部分
+
+    items 按从旧到新（或从次要到重要）排列，超出预算时从前往后逐条裁剪；
+    required 的部分不会被裁剪。
+    """
+
+    def __init__(self, name: str, items: List[str], priority: int = 0, header: str = "",
+                 separator: str = "\n", required: bool = False):
+        """
+        Args:
+            name: 名称（用于记录裁剪情况）
+            items: 内容条目
+            priority: 优先级，数值越小越先被裁剪
+            header: 标题（没有条目时不输出）
+            separator: 条目之间的分隔符
+            required: 是否必须保留
+        """
+        self.name = name
+        self.items = list(items)
+        self.priority = priority
+        self.header = header
+        self.separator = separator
+        self.required = required
+
+    def render(self) -> str:
+        if not self.items:
+            return ""
+        return self.header + self.separator.join(self.items)
+
+
+class PromptBudgeter:
+    """
+    按阶段的提示词token预算
+
+    组装提示词前估算每个部分的token数，超出当前阶段的预算时先裁剪优先级最低的部分
+    （逐条去掉最旧的内容），并记录裁剪了什么。阶段取自 call_context 设置的 phase 标签。
+    """
+
+    # 各阶段用户消息的token预算（系统提示词是固定的缓存前缀，不计入）
+    DEFAULT_PHASE_BUDGETS = {
+        "seer_choose_target": 1200,
+        "witch_action": 1200,
+        "hunter_shoot": 1200,
+        "sheriff_pass_badge": 1200,
+        "vote_phase": 1800,
+        "werewolves_action": 2000,
+        "speech_phase": 3000,
+        "sheriff_election": 3000,
+        "last_words": 2500
+    }
+    DEFAULT_BUDGET = 2500
+
+    def __init__(self, phase_budgets: Optional[Dict[str, int]] = None,
+                 default_budget: Optional[int] = None, verbose: bool = False):
+        """
+        Args:
+            phase_budgets: 按阶段覆盖预算，格式为 {阶段名: token数}
+            default_budget: 未配置阶段的预算
+            verbose: 裁剪时是否打印提示
+        """
+        self.phase_budgets = dict(self.DEFAULT_PHASE_BUDGETS)
+        if phase_budgets:
+            self.phase_budgets.update(phase_budgets)
+        self.default_budget = default_budget or self.DEFAULT_BUDGET
+        self.verbose = verbose
+
+        self.trim_log: Deque[Dict] = deque(maxlen=500)  # 最近的裁剪记录
+        self.calls = 0
+        self.trimmed_calls = 0
+        self.dropped_items: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def budget_for(self, phase: Optional[str]) -> int:
+        """指定阶段的预算"""
+        return self.phase_budgets.get(phase, self.default_budget)
+
+    def assemble(self, sections: List[PromptSection], phase: Optional[str] = None) -> str:
+        """
+        在预算内组装提示词
+
+        Args:
+            sections: 按输出顺序排列的各部分
+            phase: 阶段名；None表示使用当前 call_context 的 phase 标签
+
+        Returns:
+            组装好的提示词（必需部分超出预算时仍然完整保留）
+        """
+        self._fit(sections, phase)
+        return "".join(section.render() for section in sections)
+
+    def assemble_split(self, sections: List[PromptSection], prefix_count: int,
+                       phase: Optional[str] = None) -> Tuple[str, str]:
+        """
+        在预算内组装提示词，分成固定前缀和本次调用的内容两部分（用于设置消息前缀的缓存断点）
+
+        被裁剪过的部分每次调用都可能不同，它和之后的部分都不放入前缀。
+
+        Args:
+            sections: 按输出顺序排列的各部分
+            prefix_count: 前几个部分属于前缀
+            phase: 阶段名；None表示使用当前 call_context 的 phase 标签
+
+        Returns:
+            (前缀, 其余部分)，两者拼接后与 assemble 的结果相同
+        """
+        item_counts = [len(section.items) for section in sections[:prefix_count]]
+        self._fit(sections, phase)
+        for index, count in enumerate(item_counts):
+            if len(sections[index].items) != count:
+                prefix_count = index
+                break
+        return ("".join(section.render() for section in sections[:prefix_count]),
+                "".join(section.render() for section in sections[prefix_count:]))
+
+    def _fit(self, sections: List[PromptSection], phase: Optional[str]):
+        """按预算裁剪各部分（原地修改 items）并记录裁剪情况"""
+        if phase is None:
+            phase = current_call_context().get("phase")
+        budget = self.budget_for(phase)
+
+        costs = {id(section): [estimate_tokens(item) for item in section.items] for section in sections}
+        total = sum(sum(item_costs) for item_costs in costs.values())
+        total += sum(estimate_tokens(section.header) for section in sections if section.items)
+
+        dropped: Dict[str, int] = {}
+        for section in sorted((s for s in sections if not s.required), key=lambda s: s.priority):
+            item_costs = costs[id(section)]
+            while total > budget and section.items:
+                section.items.pop(0)
+                total -= item_costs.pop(0)
+                dropped[section.name] = dropped.get(section.name, 0) + 1
+                if not section.items:
+                    total -= estimate_tokens(section.header)
+            if total <= budget:
+                break
+
+        self._record(phase, budget, total, dropped)
+
+    def _record(self, phase: Optional[str], budget: int, total: int, dropped: Dict[str, int]):
+        """记录裁剪情况"""
+        with self._lock:
+            self.calls += 1
+            if not dropped:
+                return
+            self.trimmed_calls += 1
+            for name, count in dropped.items():
+                self.dropped_items[name] = self.dropped_items.get(name, 0) + count
+            self.trim_log.append({"phase": phase, "budget": budget, "tokens": total, "dropped": dropped})
+
+        if self.verbose:
+            detail = "，".join(f"{name} {count}条" for name, count in dropped.items())
+            print(f"  [提示词预算] {phase or '-'}：预算{budget} token，裁剪 {detail}")
+
+    def get_stats(self) -> Dict:
+        """裁剪统计"""
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "trimmed_calls": self.trimmed_calls,
+                "dropped_items": dict(self.dropped_items)
+            }
@@ -0,0 +1,227 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+
+class TokenBucket:
+    """令牌桶：把请求速率限制在 rate 个/秒以内，允许 capacity 个请求的突发"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        取走一个令牌，令牌不足时阻塞等待
+
+        Returns:
+            等待的秒数
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait_time = (1 - self.tokens) / self.rate
+            time.sleep(wait_time)
+            waited += wait_time
+
+    def set_rate(self, rate: float):
+        """调整补充速率（先按旧速率结算已补充的令牌）"""
+        with self._lock:
+            self._refill()
+            self.rate = rate
+
+    def _refill(self):
+        """按经过的时间补充令牌（调用方需持有锁）"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD自适应并发上限
+
+    - 加性增：占满上限时发出的请求成功后，上限增加 increase / 当前上限，约等于每轮往返加1
+    - 乘性减：遇到限流或延迟尖峰时上限乘以 decrease_factor
+    在途请求远低于上限时成功不说明能承受更高的并发，上限保持不变，
+    避免空闲的模型上限漂移到最大值、空闲后的第一波突发请求被限流。
+    一次限流通常会让同一批在途请求先后失败，冷却期内只减一次。
+    """
+
+    def __init__(self, initial_limit: float, min_limit: float = 1, max_limit: float = 32,
+                 increase: float = 1.0, decrease_factor: float = 0.5,
+                 latency_spike_ratio: float = 3.0, cooldown: float = 2.0):
+        self.limit = float(initial_limit)
+        self.min_limit = float(min_limit)
+        self.max_limit = float(max_limit)
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.latency_spike_ratio = latency_spike_ratio
+        self.cooldown = cooldown
+
+        self.in_flight = 0
+        self.latency_ewma: Optional[float] = None  # 延迟基线（指数加权平均）
+        self.latency_samples = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self) -> bool:
+        """
+        占用一个并发名额，达到上限时阻塞等待
+
+        Returns:
+            占用后在途请求是否达到了上限（传给 release，决定成功时是否加性增）
+        """
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+            return self.in_flight >= int(self.limit)
+
+    def release(self, latency: Optional[float] = None, success: bool = True, at_limit: bool = False):
+        """
+        归还名额并根据结果调整上限
+
+        Args:
+            latency: 本次请求的延迟（秒），None表示不参与延迟统计（例如流式输出）
+            success: 请求是否成功
+            at_limit: 占用名额时在途请求是否达到了上限（acquire 的返回值）；只有这样的成功才加性增
+        """
+        with self._condition:
+            self.in_flight -= 1
+            if success:
+                if latency is not None and self._is_latency_spike(latency):
+                    self._decrease()
+                elif at_limit:
+                    self.limit = min(self.max_limit, self.limit + self.increase / self.limit)
+                if latency is not None:
+                    self._update_latency(latency)
+            self._condition.notify_all()
+
+    def on_throttle(self) -> bool:
+        """
+        遇到限流时乘性减小上限
+
+        Returns:
+            本次是否真正减小了上限（冷却期内的重复限流不再减小）
+        """
+        with self._condition:
+            return self._decrease()
+
+    def _decrease(self) -> bool:
+        """乘性减（调用方需持有锁）"""
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return False
+        self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+        self._last_decrease = now
+        return True
+
+    def _is_latency_spike(self, latency: float) -> bool:
+        """延迟明显高于基线时视为过载信号（至少积累5个样本后才判断）"""
+        return (self.latency_samples >= 5 and self.latency_ewma is not None
+                and latency > self.latency_ewma * self.latency_spike_ratio)
+
+    def _update_latency(self, latency: float):
+        """更新延迟基线"""
+        if self.latency_ewma is None:
+            self.latency_ewma = latency
+        else:
+            self.latency_ewma = 0.8 * self.latency_ewma + 0.2 * latency
+        self.latency_samples += 1
+
+
+class ModelRateLimiter:
+    """
+    单个模型的客户端限流器：令牌桶控制请求速率，AIMD控制并发数
+
+    成功时速率与并发加性增（只在各自确实限制了请求时：并发占满上限、或等待过令牌），
+    限流时一起乘性减，吞吐量逐步收敛到配额上限，而不是所有请求同时重试造成重试风暴。
+    """
+
+    def __init__(self, model_id: str, initial_concurrency: int, max_concurrency: int = 32,
+                 initial_rate: float = 2.0, max_rate: float = 50.0, min_rate: float = 0.1,
+                 rate_increase: float = 0.1):
+        """
+        Args:
+            model_id: 模型ID
+            initial_concurrency: 初始并发上限
+            max_concurrency: 并发上限的最大值
+            initial_rate: 初始请求速率（个/秒）
+            max_rate: 请求速率的最大值
+            min_rate: 请求速率的最小值
+            rate_increase: 每个等待过令牌的成功请求增加的速率
+        """
+        self.model_id = model_id
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.rate_increase = rate_increase
+        self.bucket = TokenBucket(rate=initial_rate, capacity=max(1, initial_concurrency))
+        self.concurrency = AdaptiveConcurrencyLimiter(
+            initial_limit=initial_concurrency,
+            max_limit=max_concurrency
+        )
+
+        self.requests = 0
+        self.throttles = 0
+        self.total_wait = 0.0
+        self._stats_lock = threading.Lock()
+
+    @contextmanager
+    def slot(self, measure_latency: bool = True) -> Iterator[None]:
+        """
+        在限流器允许的情况下执行一次请求
+
+        先占并发名额再取令牌：排队等名额的请求不提前消耗令牌（否则名额空出时会集中发出、超过速率），
+        等待令牌也只在速率确实限制了请求时发生。
+
+        Args:
+            measure_latency: 是否把本次耗时计入延迟基线（流式输出的耗时包含生成时间，不计入）
+        """
+        at_limit = self.concurrency.acquire()
+        waited = 0.0
+        start = time.monotonic()
+        success = False
+        try:
+            waited = self.bucket.acquire()
+            with self._stats_lock:
+                self.requests += 1
+                self.total_wait += waited
+
+            start = time.monotonic()
+            yield
+            success = True
+        finally:
+            latency = time.monotonic() - start if measure_latency else None
+            self.concurrency.release(latency=latency, success=success, at_limit=at_limit)
+            # 速率只在请求确实等待过令牌时增加，请求稀疏时不向最大值漂移
+            if success and waited > 0:
+                self.bucket.set_rate(min(self.max_rate, self.bucket.rate + self.rate_increase))
+
+    def on_throttle(self):
+        """记录一次限流：并发上限和请求速率同时减半"""
+        with self._stats_lock:
+            self.throttles += 1
+        if self.concurrency.on_throttle():
+            self.bucket.set_rate(max(self.min_rate, self.bucket.rate * self.concurrency.decrease_factor))
+
+    def snapshot(self) -> Dict[str, float]:
+        """当前限流状态（用于调参）"""
+        with self._stats_lock:
+            return {
+                "concurrency_limit": round(self.concurrency.limit, 2),
+                "in_flight": self.concurrency.in_flight,
+                "rate_per_second": round(self.bucket.rate, 3),
+                "latency_ewma": self.concurrency.latency_ewma,
+                "requests": self.requests,
+                "throttles": self.throttles,
+                "total_wait_seconds": round(self.total_wait, 3)
+            }
@@ -0,0 +1,190 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+
+class ResponseCache:
+    """
+    LLM响应的磁盘缓存
+
+    以请求内容（模型、系统提示词、消息、温度、最大token数）的哈希为键，
+    每条响应保存为一个文件，总大小超过上限时按最近最少使用（LRU）淘汰。
+    命中缓存的调用完全不访问网络，适合固定种子的回归对局和基准测试；
+    正常对局需要随机性，默认不启用。
+    """
+
+    def __init__(self, cache_dir: str, max_size_mb: float = 256):
+        """
+        Args:
+            cache_dir: 缓存目录（不存在时自动创建）
+            max_size_mb: 缓存总大小上限（MB）
+        """
+        self.cache_dir = cache_dir
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # {键: 文件大小}，按最近使用排序
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._load_index()
+
+    @staticmethod
+    def make_key(model_id: str, system_prompt: Optional[str], messages: List[Dict],
+                 temperature: float, max_tokens: int, tools: Optional[List[Dict]] = None,
+                 tool_choice: Optional[Dict] = None) -> str:
+        """计算请求的缓存键（内容哈希）"""
+        request = {
+            "model_id": model_id,
+            "system": system_prompt or "",
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+        if tools:
+            # 不带工具的请求保持原有的键，已有缓存仍然有效
+            request["tools"] = tools
+        if tool_choice:
+            # 强制调用工具与自由回答的结果格式不同（JSON / 文本），不能共用缓存
+            request["tool_choice"] = tool_choice
+        payload = json.dumps(request, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        读取缓存的响应文本，未命中返回None
+
+        索引中没有的键也会检查文件：共用缓存目录的其他进程在本进程启动后写入的条目同样可以命中，
+        命中后加入本进程的索引。
+        """
+        path = self._path_for(key)
+        with self._lock:
+            if key not in self._entries and not os.path.exists(path):
+                self.misses += 1
+                return None
+
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+                text = json.loads(data.decode("utf-8"))["text"]
+            except (OSError, ValueError, KeyError):
+                # 文件损坏或被外部删除，视为未命中
+                self._forget(key)
+                self.misses += 1
+                return None
+
+            if key not in self._entries:
+                self._entries[key] = len(data)
+                self._total_bytes += len(data)
+                self._evict()
+            self._entries.move_to_end(key)
+            try:
+                os.utime(path)  # 更新修改时间，重启后仍能恢复LRU顺序
+            except OSError:
+                pass
+            self.hits += 1
+            return text
+
+    def put(self, key: str, text: str):
+        """写入一条响应，必要时淘汰最久未使用的条目"""
+        path = self._path_for(key)
+        data = json.dumps({"text": text}, ensure_ascii=False).encode("utf-8")
+
+        with self._lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # 批量对局的多个进程可能共用同一个缓存目录，临时文件名带上进程号
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)  # 原子替换，避免读到写了一半的文件
+
+            self._forget(key)
+            self._entries[key] = len(data)
+            self._total_bytes += len(data)
+            self._evict()
+
+    def get_stats(self) -> Dict[str, float]:
+        """获取命中统计"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "size_bytes": self._total_bytes,
+                "evictions": self.evictions
+            }
+
+    @staticmethod
+    def merge_stats(stats_list: List[Dict[str, float]]) -> Dict[str, float]:
+        """
+        合并多个缓存实例的统计（如批量对局中每个进程一个实例、共用同一个目录）
+
+        命中、未命中和淘汰次数相加；条目数和大小取最大值（各进程看到的是同一个目录）
+        """
+        hits = sum(stats["hits"] for stats in stats_list)
+        misses = sum(stats["misses"] for stats in stats_list)
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "entries": max((stats["entries"] for stats in stats_list), default=0),
+            "size_bytes": max((stats["size_bytes"] for stats in stats_list), default=0),
+            "evictions": sum(stats["evictions"] for stats in stats_list)
+        }
+
+    @staticmethod
+    def format_stats(stats: Dict[str, float]) -> str:
+        """生成可读的命中统计"""
+        return (f"响应缓存：命中 {stats['hits']} / 未命中 {stats['misses']}（命中率 {stats['hit_rate']:.1%}），"
+                f"{stats['entries']} 条，{stats['size_bytes'] / 1024 / 1024:.1f} MB，淘汰 {stats['evictions']} 条")
+
+    def _path_for(self, key: str) -> str:
+        """缓存文件路径（按前两位分子目录，避免单个目录文件过多）"""
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _load_index(self):
+        """扫描缓存目录，按修改时间恢复LRU顺序"""
+        found = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                found.append((stat.st_mtime, name[:-len(".json")], stat.st_size))
+
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._total_bytes += size
+
+        with self._lock:
+            self._evict()
+
+    def _forget(self, key: str):
+        """从索引中移除一个键（不删除文件）"""
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self._total_bytes -= size
+
+    def _evict(self):
+        """淘汰最久未使用的条目，直到总大小不超过上限（调用方需持有锁）"""
+        while self._total_bytes > self.max_size_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(self._path_for(key))
+            except OSError:
+                pass
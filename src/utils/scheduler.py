@@ -0,0 +1,125 @@
+import asyncio
+import itertools
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Deque, Dict, Optional, Set, Tuple
+
+
+class FairScheduler:
+    """
+    多个对局共享同一个LLM客户端时的公平调度器（在单个事件循环中使用）
+
+    每个模型的并发名额在对局之间分配：有人类玩家等待的对局优先；其余对局中，
+    该模型在途请求最少的对局优先，相同时按最久未被服务的顺序轮转。
+    一个对局同时发出的一批请求（如全员投票）不会占满名额让其他对局饿死。
+    """
+
+    def __init__(self, capacity: Optional[Callable[[str], int]] = None, default_capacity: int = 4):
+        """
+        Args:
+            capacity: 返回某个模型当前并发名额的函数（LLMClient 默认绑定为该模型限流器的并发上限）
+            default_capacity: 未设置 capacity 时每个模型的并发名额
+        """
+        self.capacity = capacity
+        self.default_capacity = default_capacity
+        self._waiting: Dict[str, Dict[str, Deque[Tuple[asyncio.Future, float]]]] = {}  # {模型: {对局: 等待队列}}
+        self._in_flight: Dict[str, Dict[str, int]] = {}  # {模型: {对局: 在途请求数}}
+        self._last_served: Dict[str, int] = {}  # {对局: 最近一次获得名额的序号}
+        self._ticks = itertools.count()
+        self._interactive: Set[str] = set()  # 有人类玩家等待的对局
+
+        self.granted: Dict[str, int] = {}  # {对局: 获得名额的次数}
+        self.total_wait: Dict[str, float] = {}  # {对局: 累计排队时间（秒）}
+
+    def register(self, game_id: str, interactive: bool = False):
+        """登记对局（interactive 表示有人类玩家在等待，优先分配名额）"""
+        if interactive:
+            self._interactive.add(game_id)
+        else:
+            self._interactive.discard(game_id)
+
+    def unregister(self, game_id: str):
+        """对局结束后移除优先级和统计"""
+        self._interactive.discard(game_id)
+        self._last_served.pop(game_id, None)
+
+    @asynccontextmanager
+    async def slot(self, model_id: str, game_id: Optional[str] = None) -> AsyncIterator[None]:
+        """
+        获得一个模型并发名额后执行请求
+
+        Args:
+            model_id: 模型ID
+            game_id: 对局ID（None表示不属于任何对局的调用，单独作为一组参与轮转）
+        """
+        game = game_id or "-"
+        await self._acquire(model_id, game)
+        try:
+            yield
+        finally:
+            self._release(model_id, game)
+
+    async def _acquire(self, model_id: str, game: str):
+        """排队等待名额"""
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(model_id, {}).setdefault(game, deque()).append((future, time.monotonic()))
+        self._dispatch(model_id)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                # 名额已经分配但调用方被取消：归还名额
+                self._release(model_id, game)
+            raise
+
+    def _release(self, model_id: str, game: str):
+        """归还名额并分配给下一个等待的请求"""
+        in_flight = self._in_flight[model_id]
+        in_flight[game] -= 1
+        if not in_flight[game]:
+            del in_flight[game]
+        self._dispatch(model_id)
+
+    def _dispatch(self, model_id: str):
+        """在名额允许的范围内按优先级唤醒等待的请求"""
+        waiting = self._waiting.get(model_id, {})
+        in_flight = self._in_flight.setdefault(model_id, {})
+        capacity = max(1, self.capacity(model_id) if self.capacity else self.default_capacity)
+
+        while sum(in_flight.values()) < capacity:
+            # 丢弃已取消的等待
+            for game in list(waiting):
+                queue = waiting[game]
+                while queue and queue[0][0].done():
+                    queue.popleft()
+                if not queue:
+                    del waiting[game]
+            if not waiting:
+                return
+
+            game = min(waiting, key=lambda g: (g not in self._interactive, in_flight.get(g, 0),
+                                               self._last_served.get(g, -1)))
+            future, enqueued = waiting[game].popleft()
+            in_flight[game] = in_flight.get(game, 0) + 1
+            self._last_served[game] = next(self._ticks)
+            self.granted[game] = self.granted.get(game, 0) + 1
+            self.total_wait[game] = self.total_wait.get(game, 0.0) + time.monotonic() - enqueued
+            future.set_result(None)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """
+        各模型当前的调度状态
+
+        Returns:
+            {model_id: {capacity, in_flight: {对局: 数量}, waiting: {对局: 数量}}}
+        """
+        models = set(self._in_flight) | set(self._waiting)
+        return {
+            model_id: {
+                "capacity": self.capacity(model_id) if self.capacity else self.default_capacity,
+                "in_flight": dict(self._in_flight.get(model_id, {})),
+                "waiting": {game: len(queue) for game, queue in self._waiting.get(model_id, {}).items()}
+            }
+            for model_id in models
+        }
@@ -0,0 +1,252 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import deque
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+from src.utils.backends import LLMBackend
+from src.utils.usage_tracker import current_call_context
+
+
+# 录制文件格式版本
+TRANSCRIPT_VERSION = 1
+
+# 录制时保留的调用标签（用于定位分歧）
+TRANSCRIPT_TAGS = ("day", "phase", "player_id", "role")
+
+
+def request_key(model_id: str, request_body: Dict) -> str:
+    """请求的内容哈希（模型ID + 完整请求体）"""
+    payload = json.dumps([model_id, request_body], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ReplayDivergenceError(Exception):
+    """回放时引擎发出了录制中没有的请求"""
+    pass
+
+
+class ReplayedError(Exception):
+    """回放录制时发生的调用错误"""
+
+    def __init__(self, message: str, throttled: bool = False):
+        super().__init__(message)
+        self.throttled = throttled
+
+
+class RecordingBackend(LLMBackend):
+    """
+    录制后端：包装真实后端，记录每次请求和响应（流式请求记录全部事件，失败的请求记录错误）
+
+    与对局的随机种子一起保存后，可以用 ReplayBackend 不访问网络地重跑同一局。
+    """
+
+    def __init__(self, backend: LLMBackend):
+        """
+        Args:
+            backend: 实际发出请求的后端
+        """
+        self.backend = backend
+        self.rate_limited = backend.rate_limited
+        self.billable = backend.billable
+        self.calls: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def invoke(self, model_id: str, request_body: Dict) -> Dict:
+        entry = self._new_entry(model_id, request_body)
+        try:
+            response = self.backend.invoke(model_id, request_body)
+        except Exception as e:
+            entry["error"] = {"message": str(e), "throttled": self.backend.is_throttling_error(e)}
+            self._append(entry)
+            raise
+        entry["response"] = response
+        self._append(entry)
+        return response
+
+    def invoke_stream(self, model_id: str, request_body: Dict) -> Iterator[Dict]:
+        entry = self._new_entry(model_id, request_body)
+        entry["events"] = []
+        try:
+            for event in self.backend.invoke_stream(model_id, request_body):
+                entry["events"].append(event)
+                yield event
+        except Exception as e:
+            entry["error"] = {"message": str(e), "throttled": self.backend.is_throttling_error(e)}
+            raise
+        finally:
+            self._append(entry)
+
+    def is_throttling_error(self, error: Exception) -> bool:
+        return self.backend.is_throttling_error(error)
+
+    @staticmethod
+    def _new_entry(model_id: str, request_body: Dict) -> Dict:
+        context = current_call_context()
+        return {
+            "key": request_key(model_id, request_body),
+            "model_id": model_id,
+            "request": request_body,
+            "tags": {tag: context[tag] for tag in TRANSCRIPT_TAGS if tag in context}
+        }
+
+    def _append(self, entry: Dict):
+        with self._lock:
+            entry["index"] = len(self.calls)
+            self.calls.append(entry)
+
+    def save(self, path: str, metadata: Optional[Dict] = None):
+        """
+        保存录制（gzip压缩的JSONL：第一行为文件头，之后每行一次调用）
+
+        Args:
+            path: 文件路径
+            metadata: 写入文件头的信息（随机种子、人类玩家数等）
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        header = {"type": "header", "version": TRANSCRIPT_VERSION, **(metadata or {})}
+        with self._lock:
+            calls = list(self.calls)
+
+        temp_path = path + ".tmp"
+        with gzip.open(temp_path, "wt", encoding="utf-8") as f:
+            f.write(json.dumps(header, ensure_ascii=False, separators=(",", ":")) + "\n")
+            for entry in calls:
+                f.write(json.dumps({"type": "call", **entry}, ensure_ascii=False, separators=(",", ":")) + "\n")
+        os.replace(temp_path, path)
+
+
+def load_transcript(path: str) -> Tuple[Dict, List[Dict]]:
+    """
+    读取录制文件
+
+    Returns:
+        (文件头, 按录制顺序排列的调用)
+
+    Raises:
+        ValueError: 文件版本与当前代码不兼容
+    """
+    header: Dict = {}
+    calls: List[Dict] = []
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if record.pop("type") == "header":
+                header = record
+            else:
+                calls.append(record)
+
+    if header.get("version") != TRANSCRIPT_VERSION:
+        raise ValueError(f"录制文件版本不兼容：{header.get('version')}（当前版本 {TRANSCRIPT_VERSION}）")
+    return header, calls
+
+
+class ReplayBackend(LLMBackend):
+    """
+    回放后端：按请求内容从录制中取回响应，不访问网络
+
+    并发请求的完成顺序每次不同，因此按请求内容（而不是顺序）匹配，
+    内容完全相同的请求按录制顺序依次取用。引擎发出录制中没有的请求时抛出 ReplayDivergenceError，
+    并指出与录制中对应调用（同一天、阶段和玩家）的第一处不同。
+    """
+
+    rate_limited = False
+    billable = False
+
+    def __init__(self, calls: List[Dict]):
+        """
+        Args:
+            calls: load_transcript 读出的调用
+        """
+        self.recorded = calls
+        self._pending: Dict[str, Deque[Dict]] = {}
+        for entry in calls:
+            self._pending.setdefault(entry["key"], deque()).append(entry)
+        self._consumed: set = set()  # 已回放的录制序号
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.divergence: Optional[str] = None  # 第一次分歧的说明
+
+    def invoke(self, model_id: str, request_body: Dict) -> Dict:
+        entry = self._take(model_id, request_body)
+        if "error" in entry:
+            raise ReplayedError(entry["error"]["message"], entry["error"]["throttled"])
+        return entry["response"]
+
+    def invoke_stream(self, model_id: str, request_body: Dict) -> Iterator[Dict]:
+        entry = self._take(model_id, request_body)
+        for event in entry.get("events", []):
+            yield event
+        if "error" in entry:
+            raise ReplayedError(entry["error"]["message"], entry["error"]["throttled"])
+
+    def is_throttling_error(self, error: Exception) -> bool:
+        return isinstance(error, ReplayedError) and error.throttled
+
+    def is_fatal_error(self, error: Exception) -> bool:
+        return isinstance(error, ReplayDivergenceError)
+
+    @property
+    def unused(self) -> int:
+        """录制中没有被回放的调用数（如对冲请求的备份请求）"""
+        with self._lock:
+            return len(self.recorded) - len(self._consumed)
+
+    def _take(self, model_id: str, request_body: Dict) -> Dict:
+        """取出与请求匹配的录制；没有匹配时报告分歧"""
+        key = request_key(model_id, request_body)
+        with self._lock:
+            self.calls += 1
+            queue = self._pending.get(key)
+            if queue:
+                entry = queue.popleft()
+                self._consumed.add(entry["index"])
+                return entry
+
+            message = self._describe_divergence(model_id, request_body)
+            if self.divergence is None:
+                self.divergence = message
+        raise ReplayDivergenceError(message)
+
+    def _describe_divergence(self, model_id: str, request_body: Dict) -> str:
+        """说明分歧：找到录制中同一天、阶段和玩家的第一个未回放的调用，指出第一处不同"""
+        context = current_call_context()
+        tags = {tag: context[tag] for tag in TRANSCRIPT_TAGS if tag in context}
+        location = "，".join(f"{tag}={value}" for tag, value in tags.items()) or "无标签"
+        lines = [f"第 {self.calls} 次调用（{location}，模型 {model_id}）在录制中没有匹配的请求"]
+
+        candidates = [entry for entry in self.recorded
+                      if entry["index"] not in self._consumed and entry.get("tags") == tags]
+        if not candidates:
+            lines.append("录制中没有同一天、阶段和玩家的未回放调用")
+            return "\n".join(lines)
+
+        recorded = candidates[0]
+        lines.append(f"对应的录制调用：#{recorded['index']}")
+        if recorded["model_id"] != model_id:
+            lines.append(f"  模型不同：录制 {recorded['model_id']}，本次 {model_id}")
+        lines.extend(self._first_difference(recorded["request"], request_body))
+        return "\n".join(lines)
+
+    @staticmethod
+    def _first_difference(recorded: Dict, actual: Dict) -> List[str]:
+        """逐字段比较请求体，给出第一处不同的字段和行"""
+        for field in sorted(set(recorded) | set(actual)):
+            if recorded.get(field) == actual.get(field):
+                continue
+            old = json.dumps(recorded.get(field), ensure_ascii=False, indent=1, sort_keys=True)
+            new = json.dumps(actual.get(field), ensure_ascii=False, indent=1, sort_keys=True)
+            # 文本字段中的换行在JSON中被转义，还原后按行比较
+            old_lines = old.replace("\\n", "\n").split("\n")
+            new_lines = new.replace("\\n", "\n").split("\n")
+            for number, (old_line, new_line) in enumerate(zip(old_lines, new_lines), 1):
+                if old_line != new_line:
+                    return [f"  字段 {field} 第 {number} 行不同：",
+                            f"    录制：{old_line.strip()}",
+                            f"    本次：{new_line.strip()}"]
+            return [f"  字段 {field} 长度不同：录制 {len(old_lines)} 行，本次 {len(new_lines)} 行"]
+        return []
@@ -0,0 +1,213 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+
+# 当前LLM调用的标签（对局ID、天数、阶段等），由游戏引擎在各阶段设置
+_CALL_CONTEXT: ContextVar[Dict] = ContextVar("llm_call_context", default={})
+
+
+@contextmanager
+def call_context(**tags) -> Iterator[None]:
+    """
+    在代码块内为LLM调用附加标签（与外层标签合并，内层优先）
+
+    例如：with call_context(game_id="a1b2", day=2, phase="_vote_phase"): ...
+    标签随contextvars传播到asyncio任务；提交到线程池时需要复制上下文。
+    """
+    token = _CALL_CONTEXT.set({**_CALL_CONTEXT.get(), **tags})
+    try:
+        yield
+    finally:
+        _CALL_CONTEXT.reset(token)
+
+
+def current_call_context() -> Dict:
+    """获取当前的调用标签"""
+    return dict(_CALL_CONTEXT.get())
+
+
+# 各模型价格（美元/百万token）：输入、输出、缓存写入、缓存读取
+MODEL_PRICING = {
+    "us.anthropic.claude-opus-4-1-20250805-v1:0": (15.0, 75.0, 18.75, 1.5),
+    "us.anthropic.claude-opus-4-20250514-v1:0": (15.0, 75.0, 18.75, 1.5),
+    "us.anthropic.claude-sonnet-4-5-20250929-v1:0": (3.0, 15.0, 3.75, 0.3),
+    "us.anthropic.claude-sonnet-4-20250514-v1:0": (3.0, 15.0, 3.75, 0.3),
+    "us.anthropic.claude-3-7-sonnet-20250219-v1:0": (3.0, 15.0, 3.75, 0.3),
+    "us.anthropic.claude-haiku-4-5-20251001-v1:0": (1.0, 5.0, 1.25, 0.1)
+}
+
+
+class CallRecord:
+    """一次模型调用的用量记录"""
+
+    def __init__(self, model_id: str, latency: float, success: bool, retries: int = 0,
+                 input_tokens: int = 0, output_tokens: int = 0,
+                 cache_read_input_tokens: int = 0, cache_creation_input_tokens: int = 0,
+                 streamed: bool = False, response_cached: bool = False, synthetic: bool = False,
+                 tags: Optional[Dict] = None):
+        self.model_id = model_id
+        self.latency = latency
+        self.success = success
+        self.retries = retries
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+        self.cache_read_input_tokens = cache_read_input_tokens
+        self.cache_creation_input_tokens = cache_creation_input_tokens
+        self.streamed = streamed
+        self.response_cached = response_cached  # 命中磁盘响应缓存，未访问网络
+        self.synthetic = synthetic  # 由不计费的后端（假后端、回放）应答的模拟调用
+        self.tags = tags or {}
+        self.timestamp = time.time()
+
+    @property
+    def cost(self) -> float:
+        """本次调用的费用（美元），缓存命中、模拟调用和未知模型按0计算"""
+        if self.response_cached or self.synthetic or self.model_id not in MODEL_PRICING:
+            return 0.0
+        input_price, output_price, write_price, read_price = MODEL_PRICING[self.model_id]
+        return (self.input_tokens * input_price
+                + self.output_tokens * output_price
+                + self.cache_creation_input_tokens * write_price
+                + self.cache_read_input_tokens * read_price) / 1_000_000
+
+    def to_dict(self) -> Dict:
+        """转换为可序列化的字典"""
+        return {
+            "timestamp": self.timestamp,
+            "model_id": self.model_id,
+            "latency": round(self.latency, 4),
+            "success": self.success,
+            "retries": self.retries,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cache_read_input_tokens": self.cache_read_input_tokens,
+            "cache_creation_input_tokens": self.cache_creation_input_tokens,
+            "streamed": self.streamed,
+            "response_cached": self.response_cached,
+            "synthetic": self.synthetic,
+            "cost_usd": round(self.cost, 6),
+            **self.tags
+        }
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    """已排序数据的百分位数（最近秩法）"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * fraction))
+    return sorted_values[index]
+
+
+class UsageTracker:
+    """
+    LLM调用用量统计：记录每次调用的token、延迟、重试次数和模型，
+    并按对局、天数、阶段、玩家、角色等标签汇总
+    """
+
+    def __init__(self):
+        self.records: List[CallRecord] = []
+        self._lock = threading.Lock()
+
+    def record(self, record: CallRecord):
+        """添加一条调用记录"""
+        with self._lock:
+            self.records.append(record)
+
+    def get_records(self, game_id: Optional[str] = None) -> List[CallRecord]:
+        """获取调用记录（可按对局过滤）"""
+        with self._lock:
+            records = list(self.records)
+        if game_id is not None:
+            records = [r for r in records if r.tags.get("game_id") == game_id]
+        return records
+
+    def summarize(self, group_by: Optional[str] = None, game_id: Optional[str] = None) -> Dict[str, Dict]:
+        """
+        汇总用量
+
+        Args:
+            group_by: 分组字段（"model_id" 或任一标签名，如 "phase"、"role"、"player_id"），None表示不分组
+            game_id: 只统计指定对局
+
+        Returns:
+            {分组值: {calls, failures, retries, input_tokens, output_tokens,
+                      cache_read_input_tokens, cache_creation_input_tokens, cost_usd,
+                      latency_p50, latency_p95, latency_p99, latency_max}}
+        """
+        groups: Dict[str, List[CallRecord]] = {}
+        for record in self.get_records(game_id):
+            if group_by is None:
+                key = "total"
+            elif group_by == "model_id":
+                key = record.model_id
+            else:
+                key = str(record.tags.get(group_by, "-"))
+            groups.setdefault(key, []).append(record)
+
+        summary = {}
+        for key, records in groups.items():
+            latencies = sorted(r.latency for r in records if not r.response_cached)
+            summary[key] = {
+                "calls": len(records),
+                "failures": sum(1 for r in records if not r.success),
+                "retries": sum(r.retries for r in records),
+                "input_tokens": sum(r.input_tokens for r in records),
+                "output_tokens": sum(r.output_tokens for r in records),
+                "cache_read_input_tokens": sum(r.cache_read_input_tokens for r in records),
+                "cache_creation_input_tokens": sum(r.cache_creation_input_tokens for r in records),
+                "cost_usd": round(sum(r.cost for r in records), 4),
+                "latency_p50": round(_percentile(latencies, 0.5), 3),
+                "latency_p95": round(_percentile(latencies, 0.95), 3),
+                "latency_p99": round(_percentile(latencies, 0.99), 3),
+                "latency_max": round(latencies[-1], 3) if latencies else 0.0
+            }
+        return summary
+
+    def report(self, game_id: Optional[str] = None) -> str:
+        """生成可读的用量报告（总计，以及按模型、角色、阶段分组）"""
+        total = self.summarize(game_id=game_id).get("total")
+        if not total:
+            return "没有LLM调用记录"
+
+        lines = [
+            "LLM调用统计：",
+            f"  调用 {total['calls']} 次（失败 {total['failures']}，重试 {total['retries']}），"
+            f"输入 {total['input_tokens']} / 输出 {total['output_tokens']} token，"
+            f"缓存读取 {total['cache_read_input_tokens']} / 写入 {total['cache_creation_input_tokens']} token",
+            f"  延迟 p50 {total['latency_p50']}s / p95 {total['latency_p95']}s / 最大 {total['latency_max']}s，"
+            f"费用约 ${total['cost_usd']}"
+        ]
+
+        for title, group_by in [("按模型", "model_id"), ("按角色", "role"), ("按阶段", "phase")]:
+            lines.append(f"\n  {title}：")
+            groups = self.summarize(group_by=group_by, game_id=game_id)
+            for key, stats in sorted(groups.items(), key=lambda item: -item[1]["cost_usd"]):
+                lines.append(
+                    f"    {key}: {stats['calls']}次, 输入{stats['input_tokens']}/输出{stats['output_tokens']} token, "
+                    f"p50 {stats['latency_p50']}s, p95 {stats['latency_p95']}s, ${stats['cost_usd']}"
+                )
+
+        return "\n".join(lines)
+
+    def export_jsonl(self, path: str, game_id: Optional[str] = None):
+        """导出调用记录（每行一条JSON，便于导入看板）"""
+        with open(path, "w", encoding="utf-8") as f:
+            for record in self.get_records(game_id):
+                f.write(json.dumps(record.to_dict(), ensure_ascii=False) + "\n")
+
+    def export_summary(self, path: str, game_id: Optional[str] = None):
+        """导出汇总结果（JSON）"""
+        data = {
+            "total": self.summarize(game_id=game_id).get("total", {}),
+            "by_model": self.summarize("model_id", game_id),
+            "by_role": self.summarize("role", game_id),
+            "by_phase": self.summarize("phase", game_id),
+            "by_player": self.summarize("player_id", game_id),
+            "by_day": self.summarize("day", game_id)
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,75 @@
+"""人类玩家在终端输入时按 Ctrl+C 应立即中断对局"""
+
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 在终端输入处等待的对局片段：决策（HumanPlayer.amake_decision）和发言（WerewolfGame._stream_speech）
+SCRIPTS = {
+    "decision": """
+import asyncio
+from src.players.player import HumanPlayer
+asyncio.run(HumanPlayer(1).amake_decision("测试：请选择目标", {}))
+""",
+    "speech": """
+import asyncio
+from src.game.output import NullSink
+from src.game.werewolf_game import WerewolfGame
+from src.players.player import HumanPlayer
+from src.utils.backends import FakeBackend
+from src.utils.llm_client import LLMClient
+game = WerewolfGame(LLMClient(backend=FakeBackend()), output=NullSink())
+asyncio.run(game._stream_speech(HumanPlayer(1), "测试：请发言", {}))
+"""
+}
+
+
+def _wait_for_output(proc: subprocess.Popen, text: str, timeout: float) -> str:
+    """读取子进程输出，直到出现指定文本"""
+    output = []
+
+    def reader():
+        while True:
+            chunk = proc.stdout.read1(1024)
+            if not chunk:
+                return
+            output.append(chunk.decode("utf-8", errors="replace"))
+
+    threading.Thread(target=reader, daemon=True).start()
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if text in "".join(output):
+            return "".join(output)
+        time.sleep(0.05)
+    raise AssertionError(f"没有等到输出 {text!r}：{''.join(output)!r}")
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="需要 SIGINT")
+@pytest.mark.parametrize("kind", sorted(SCRIPTS))
+def test_interrupt_during_human_prompt(kind):
+    proc = subprocess.Popen([sys.executable, "-u", "-c", SCRIPTS[kind]], cwd=ROOT,
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        _wait_for_output(proc, "请输入", timeout=15)
+        start = time.monotonic()
+        proc.send_signal(signal.SIGINT)
+        # 标准输入一直没有数据：中断不能等到用户按下回车
+        proc.wait(timeout=5)
+        elapsed = time.monotonic() - start
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        proc.stdin.close()
+
+    assert proc.returncode != 0
+    assert b"KeyboardInterrupt" in proc.stderr.read()
+    assert elapsed < 2
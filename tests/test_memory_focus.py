@@ -0,0 +1,47 @@
+"""决策时的记忆检索只偏向上下文给出的相关玩家，不受问题文本中列出的玩家影响"""
+
+from src.game.event_log import EventType, GameEventLog
+from src.models.roles import RoleType, create_role
+from src.players.player import AIPlayer
+from src.utils.backends import FakeBackend
+from src.utils.llm_client import LLMClient
+
+
+# 警长投票：问题文本列出全部存活玩家，上下文中只有一名候选人
+PROMPT = """现在是警长投票阶段。
+
+存活的玩家：玩家1, 玩家2, 玩家3, 玩家4, 玩家5, 玩家6, 玩家7, 玩家8, 玩家9
+上警的玩家：玩家4
+
+请投票选出警长（直接回答玩家编号）："""
+CONTEXT = {"sheriff_candidates": [4], "choices": [4]}
+
+
+def _player_with_speeches() -> AIPlayer:
+    """第1天玩家2~9依次发言，每条发言只提到发言者自己"""
+    event_log = GameEventLog()
+    for player_id in range(2, 10):
+        event_log.public(f"第1天玩家{player_id}发言：我是玩家{player_id}，我是好人。", 1,
+                         EventType.SPEECH, exclude=player_id, actor=player_id)
+    player = AIPlayer(1, "玩家1", "fake-model", LLMClient(backend=FakeBackend()), event_log=event_log)
+    player.assign_role(create_role(RoleType.VILLAGER))
+    return player
+
+
+def test_focus_comes_from_context_not_prompt_text():
+    assert AIPlayer._focus_players(CONTEXT) == [4]
+    assert AIPlayer._focus_players({"choices": ["是", "否"], "target": 6}) == [6]
+    assert AIPlayer._focus_players({"votable_player_ids": [2, 3], "last_speaker": 9}) == [2, 3, 9]
+    assert AIPlayer._focus_players({"last_speaker": None}) == []
+
+
+def test_only_candidate_is_boosted_in_decision_prompt():
+    player = _player_with_speeches()
+    player.DECISION_MEMORY_LIMIT = 1
+
+    content = player._build_full_prompt(PROMPT, CONTEXT)
+    text = "".join(block["text"] for block in content)
+
+    # 候选人的发言排在最前；没有焦点时应当选中最新的发言（玩家9）
+    assert "第1天玩家4发言" in text
+    assert "第1天玩家9发言" not in text
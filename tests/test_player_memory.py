@@ -0,0 +1,71 @@
+"""记忆的环形缓冲区：被挤出的记录不再参与检索，但在天数边界仍然写入摘要；模型摘要的结果缓存有上限"""
+
+from typing import List
+
+from src.game.event_log import EventType, GameEvent, Visibility
+from src.players.memory import PlayerMemory
+from src.players.memory_summary import LLMSummarizer, MemorySummarizer
+from src.utils.backends import FakeBackend
+from src.utils.llm_client import LLMClient
+
+
+class RecordingSummarizer(MemorySummarizer):
+    """记下每次折叠收到的记录"""
+
+    def __init__(self):
+        self.folded: List[List[GameEvent]] = []
+
+    def summarize(self, summary: str, events: List[GameEvent]) -> str:
+        self.folded.append(list(events))
+        return summary + "".join(event.text for event in events)
+
+
+def _speech(seq: int, day: int, player_id: int) -> GameEvent:
+    return GameEvent(seq, day, EventType.SPEECH, f"第{day}天玩家{player_id}发言", Visibility.PUBLIC)
+
+
+def test_overflowed_records_are_folded_at_the_day_boundary():
+    summarizer = RecordingSummarizer()
+    memory = PlayerMemory(retention={EventType.SPEECH.value: 3}, summarizer=summarizer)
+
+    # 12人局的一天：发言条数超过保留条数，最早的发言被挤出缓冲区
+    for player_id in range(1, 13):
+        memory.add(_speech(player_id, 1, player_id))
+    assert [event.text for event in memory.records()] == [f"第1天玩家{pid}发言" for pid in (10, 11, 12)]
+    memory.fold()
+    assert summarizer.folded == []  # 一天之内摘要不变
+
+    memory.add(_speech(13, 2, 1))
+    memory.fold()
+
+    assert [event.seq for event in summarizer.folded[0]] == list(range(1, 13))
+    assert "第1天玩家1发言" in memory.summary
+
+
+def test_overflow_survives_a_checkpoint():
+    events = [_speech(seq, 1, seq + 1) for seq in range(5)]
+    memory = PlayerMemory(retention={EventType.SPEECH.value: 2})
+    for event in events:
+        memory.add(event)
+
+    summarizer = RecordingSummarizer()
+    restored = PlayerMemory(retention={EventType.SPEECH.value: 2}, summarizer=summarizer)
+    restored.load_state(memory.dump_state(), events)
+    restored.add(_speech(5, 2, 1))
+    restored.fold()
+
+    assert [event.seq for event in summarizer.folded[0]] == [0, 1, 2, 3, 4]
+
+
+def test_llm_summary_cache_is_bounded():
+    backend = FakeBackend()
+    summarizer = LLMSummarizer(LLMClient(backend=backend), cache_size=2)
+
+    for day in (1, 2, 3):
+        summarizer.summarize("", [_speech(day, day, 1)])
+    assert len(summarizer._cache) == 2
+
+    # 最近使用过的结果仍然命中，不再调用模型
+    calls = backend.calls
+    summarizer.summarize("", [_speech(3, 3, 1)])
+    assert backend.calls == calls
@@ -0,0 +1,38 @@
+"""提示词预算：先裁剪历史记录，被裁剪的摘要不留在缓存前缀中"""
+
+from src.utils.prompt_budget import PromptBudgeter, PromptSection
+
+
+def _sections(summary_count: int, history_count: int):
+    """与 AIPlayer 的用户消息结构相同：身份、摘要（前缀），历史、当前情况"""
+    return [
+        PromptSection("identity", ["玩家编号：1"], required=True),
+        PromptSection("summary", [f"第{day}天摘要" + "。" * 50 for day in range(summary_count)],
+                      priority=20, header="\n\n前情摘要：\n"),
+        PromptSection("history", [f"历史记录{i}" + "。" * 50 for i in range(history_count)],
+                      priority=10, header="\n\n历史信息：\n"),
+        PromptSection("situation", ["当前情况：请投票"], required=True)
+    ]
+
+
+def test_history_is_trimmed_before_the_cached_summary():
+    budgeter = PromptBudgeter(default_budget=400)
+    sections = _sections(summary_count=2, history_count=10)
+
+    prefix, suffix = budgeter.assemble_split(sections, prefix_count=2)
+
+    assert len(sections[1].items) == 2  # 摘要完整保留
+    assert len(sections[2].items) < 10  # 从最旧的历史记录开始裁剪
+    assert "第1天摘要" in prefix and "历史记录9" in suffix
+    assert budgeter.dropped_items == {"history": 10 - len(sections[2].items)}
+
+
+def test_trimmed_summary_moves_after_the_breakpoint():
+    budgeter = PromptBudgeter(default_budget=100)
+    sections = _sections(summary_count=3, history_count=2)
+
+    prefix, suffix = budgeter.assemble_split(sections, prefix_count=2)
+
+    assert not sections[2].items and len(sections[1].items) < 3
+    assert prefix == "玩家编号：1"
+    assert suffix.startswith("\n\n前情摘要：\n")
@@ -0,0 +1,78 @@
+"""自适应限流器：只有在限制确实生效时才加性增"""
+
+import threading
+import time
+
+from src.utils.rate_limiter import AdaptiveConcurrencyLimiter, ModelRateLimiter
+
+
+def test_idle_successes_do_not_raise_concurrency_limit():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=32)
+    for _ in range(100):
+        at_limit = limiter.acquire()
+        limiter.release(success=True, at_limit=at_limit)
+    assert limiter.limit == 4
+
+
+def test_saturated_successes_raise_concurrency_limit():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=32)
+    flags = [limiter.acquire() for _ in range(4)]
+    assert flags == [False, False, False, True]
+    for at_limit in flags:
+        limiter.release(success=True, at_limit=at_limit)
+    assert limiter.limit > 4
+
+
+def test_model_limiter_stays_put_under_light_load():
+    limiter = ModelRateLimiter("model", initial_concurrency=4, max_concurrency=32, initial_rate=1000.0,
+                               max_rate=5000.0)
+    for _ in range(50):
+        with limiter.slot(measure_latency=False):
+            pass
+        time.sleep(0.005)  # 请求稀疏：令牌总是充足，在途请求最多1个
+    assert limiter.concurrency.limit == 4
+    assert limiter.bucket.rate == 1000.0
+
+
+def test_model_limiter_grows_when_concurrency_is_reached():
+    limiter = ModelRateLimiter("model", initial_concurrency=2, max_concurrency=32, initial_rate=1000.0)
+    barrier = threading.Barrier(2)
+
+    def call():
+        with limiter.slot(measure_latency=False):
+            barrier.wait(timeout=5)  # 两个请求同时在途，占满上限
+
+    for _ in range(5):
+        threads = [threading.Thread(target=call) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert limiter.concurrency.limit > 2
+
+
+def test_model_limiter_raises_rate_only_after_waiting_for_tokens():
+    limiter = ModelRateLimiter("model", initial_concurrency=1, initial_rate=20.0)
+    for _ in range(5):
+        with limiter.slot(measure_latency=False):
+            pass
+    # 桶容量为1：之后的请求都要等待令牌，速率随之增加
+    assert limiter.bucket.rate > 20.0
+
+
+def test_queued_requests_do_not_spend_tokens_while_waiting_for_a_slot():
+    # 并发上限1、每个请求0.3秒：并发才是瓶颈，令牌总在名额空出之前补满
+    limiter = ModelRateLimiter("model", initial_concurrency=1, max_concurrency=1, initial_rate=5.0)
+
+    def call():
+        with limiter.slot(measure_latency=False):
+            time.sleep(0.3)
+
+    threads = [threading.Thread(target=call) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert limiter.snapshot()["total_wait_seconds"] == 0.0
+    assert limiter.bucket.rate == 5.0
@@ -0,0 +1,17 @@
+"""响应缓存：共用缓存目录的进程能读到彼此运行期间写入的条目"""
+
+from src.utils.response_cache import ResponseCache
+
+
+def test_entries_written_by_another_instance_are_hits(tmp_path):
+    # 两个实例都在写入之前创建（相当于同时启动的两个批量对局进程）
+    reader = ResponseCache(str(tmp_path))
+    writer = ResponseCache(str(tmp_path))
+    key = ResponseCache.make_key("model", "system", [{"role": "user", "content": "投票"}], 0.9, 100)
+
+    assert reader.get(key) is None
+    writer.put(key, "3")
+
+    assert reader.get(key) == "3"
+    stats = reader.get_stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
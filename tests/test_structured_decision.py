@@ -0,0 +1,44 @@
+"""结构化决策：工具定义固定不变，选择不合法时不把原始JSON交给引擎解析"""
+
+import json
+
+from src.players.player import AIPlayer
+from src.utils.backends import FakeBackend
+from src.utils.llm_client import LLMClient
+
+
+def _player() -> AIPlayer:
+    return AIPlayer(1, "玩家1", "fake-model", LLMClient(backend=FakeBackend()))
+
+
+def _tool_call(target=None, answer=None, reason="玩家3昨天的发言很可疑，玩家5是好人。") -> str:
+    return json.dumps({"target": target, "answer": answer, "reason": reason}, ensure_ascii=False)
+
+
+def test_tool_schema_is_the_same_for_every_decision():
+    player = _player()
+    vote = player._decision_request("投票", {"choices": [2, 3, 4]})
+    badge = player._decision_request("移交警徽", {"choices": [5, 6], "skip_answer": "不传"})
+    antidote = player._decision_request("是否救人", {"choices": ["是", "否"], "target": 3})
+
+    assert vote["tools"] == badge["tools"] == antidote["tools"]
+    # 合法选项写在用户消息中
+    assert "合法的玩家编号（填入 target）：5、6" in json.dumps(badge["messages"], ensure_ascii=False)
+
+
+def test_valid_choices_are_normalized():
+    player = _player()
+    assert player._finalize_decision(_tool_call(target=4), {"choices": [2, 3, 4]}) == "4"
+    assert player._finalize_decision(_tool_call(answer="是"), {"choices": ["是", "否"]}) == "是"
+    assert player._finalize_decision(_tool_call(), {"choices": [5, 6], "skip_answer": "不传"}) == "不传"
+
+
+def test_invalid_choice_is_not_returned_as_raw_json():
+    player = _player()
+    context = {"choices": [2, 3, 4]}
+
+    # 不在合法选项中的目标、没有放弃选项时的null：理由里提到的玩家3不能被当成选择
+    assert player._finalize_decision(_tool_call(target=7), context) == ""
+    assert player._finalize_decision(_tool_call(target=None), context) == ""
+    assert player._finalize_decision(_tool_call(answer="都不投"), context) == ""
+    assert player.last_decision_reason.startswith("玩家3")